@@ -0,0 +1,259 @@
+"""Local columnar copy of the tracker tables for ad-hoc portfolio analytics.
+
+Rows are pulled from Azure SQL through the row-version change feed and appended to Parquet
+files, one directory per table. DuckDB then reads the files, so heavy scans never touch the
+production database. A refresh only reads rows changed since the previous
+one; schedule it with:
+
+    python analytics.py
+
+Each Parquet part holds the changed rows as of one refresh. Queries see the newest version of
+every row, which also folds archived weekly and milestone updates in with the hot ones.
+
+The change feed does not report deletes. After appending, a refresh therefore compares each
+table's row count in the store with the database and rebuilds any table that holds rows the
+database no longer has, e.g. after the dedupe migration, "Fix qeProjects Table" or a manual
+delete. Force a rebuild of every table with:
+
+    python analytics.py --full
+"""
+import argparse
+import glob
+import os
+
+import duckdb
+import pandas as pd
+import streamlit as st
+
+from changefeed import iter_changes, load_watermarks, save_watermarks
+from db import create_db_engine
+from models import milestone_updates, milestones, projects, weekly_updates
+from services import change_feed_watermark, fetch_data_version
+
+# Compact a table's parts into one file once it has more than this many
+ANALYTICS_MAX_PARTS = 20
+
+# Change feed table -> (model table whose columns are kept, primary key)
+ANALYTICS_SOURCES = {
+    'qeProjects': (projects, 'project_id'),
+    'qeWeekly_Updates': (weekly_updates, 'update_id'),
+    'qeWeekly_Updates_Archive': (weekly_updates, 'update_id'),
+    'Milestones': (milestones, 'milestone_id'),
+    'Milestone_Updates': (milestone_updates, 'update_id'),
+    'Milestone_Updates_Archive': (milestone_updates, 'update_id'),
+}
+
+# DuckDB view -> change feed tables it reads (hot tier first)
+ANALYTICS_VIEWS = {
+    'projects': ['qeProjects'],
+    'weekly_updates': ['qeWeekly_Updates', 'qeWeekly_Updates_Archive'],
+    'milestones': ['Milestones'],
+    'milestone_updates': ['Milestone_Updates', 'Milestone_Updates_Archive'],
+}
+
+SAVED_ANALYTICS = {
+    "Automation coverage by technology (last 4 quarters)": """
+        SELECT p.technology_used,
+               strftime(date_trunc('quarter', w.week_ending_date), '%Y-%m') AS quarter,
+               COUNT(DISTINCT w.project_id) AS projects,
+               round(100.0 * SUM(w.tc_automated) / NULLIF(SUM(w.tc_created), 0), 1) AS automation_coverage_pct
+        FROM weekly_updates w
+        JOIN projects p USING (project_id)
+        WHERE w.week_ending_date >= date_trunc('quarter', current_date) - INTERVAL 9 MONTH
+        GROUP BY ALL
+        ORDER BY p.technology_used, quarter
+    """,
+    "Defect leakage by client and quarter": """
+        SELECT p.client,
+               strftime(date_trunc('quarter', w.week_ending_date), '%Y-%m') AS quarter,
+               SUM(w.defects_raised_internal) AS internal_defects,
+               SUM(w.sit_defects) AS sit_defects,
+               SUM(w.uat_defects) AS uat_defects,
+               round(100.0 * SUM(w.uat_defects)
+                     / NULLIF(SUM(w.defects_raised_internal) + SUM(w.sit_defects) + SUM(w.uat_defects), 0), 1) AS leakage_pct
+        FROM weekly_updates w
+        JOIN projects p USING (project_id)
+        GROUP BY ALL
+        ORDER BY p.client, quarter
+    """,
+    "RAG mix by month": """
+        SELECT strftime(date_trunc('month', week_ending_date), '%Y-%m') AS month,
+               COUNT(*) FILTER (WHERE qe_overall_status = 'GREEN') AS green,
+               COUNT(*) FILTER (WHERE qe_overall_status = 'AMBER') AS amber,
+               COUNT(*) FILTER (WHERE qe_overall_status = 'RED') AS red
+        FROM weekly_updates
+        GROUP BY ALL
+        ORDER BY month
+    """,
+    "Milestone progress gained per project (last 12 weeks)": """
+        SELECT p.project_name,
+               COUNT(DISTINCT m.milestone_id) AS milestones_updated,
+               round(100 * SUM(mu.actual_progress - coalesce(mu.previous_progress, 0)), 1) AS progress_points_gained
+        FROM (
+            SELECT *, lag(actual_progress) OVER (PARTITION BY milestone_id ORDER BY week_ending_date) AS previous_progress
+            FROM milestone_updates
+        ) mu
+        JOIN milestones m USING (milestone_id)
+        JOIN projects p ON p.project_id = m.project_id
+        WHERE mu.week_ending_date >= current_date - INTERVAL 12 WEEK
+        GROUP BY ALL
+        ORDER BY progress_points_gained DESC
+    """,
+}
+
+_DUCKDB_TYPES = {'INTEGER': 'BIGINT', 'FLOAT': 'DOUBLE', 'DATE': 'DATE'}
+
+
+def analytics_dir():
+    return st.secrets.get("analytics_dir", "analytics_store")
+
+
+def _schema(table, versioned=True):
+    """DuckDB column definitions for a model table, plus the change feed version."""
+    columns = [f"{column.name} {_DUCKDB_TYPES.get(type(column.type).__name__.upper(), 'VARCHAR')}" for column in table.columns]
+    return ", ".join(columns + (["_version BIGINT"] if versioned else []))
+
+
+def _parts(store, source):
+    return sorted(glob.glob(os.path.join(store, source, "*.parquet")))
+
+
+def _latest_rows_sql(files, key):
+    """SQL returning the newest version of every row across the given Parquet files."""
+    file_list = ", ".join(f"'{path}'" for path in files)
+    return f"""
+        SELECT * EXCLUDE (_version)
+        FROM read_parquet([{file_list}], union_by_name = true)
+        QUALIFY row_number() OVER (PARTITION BY {key} ORDER BY _version DESC) = 1
+    """
+
+
+def _compact(duck, store, source, key, until):
+    parts = _parts(store, source)
+    if len(parts) <= ANALYTICS_MAX_PARTS:
+        return
+    compacted = os.path.join(store, source, f"part-{until:020d}-compact.parquet")
+    file_list = ", ".join(f"'{path}'" for path in parts)
+    duck.execute(f"""
+        COPY (
+            SELECT * FROM read_parquet([{file_list}])
+            QUALIFY row_number() OVER (PARTITION BY {key} ORDER BY _version DESC) = 1
+        ) TO '{compacted}' (FORMAT PARQUET)
+    """)
+    for path in parts:
+        os.remove(path)
+
+
+def _stored_rows(duck, store, source, key):
+    """Number of distinct rows the store holds for a table."""
+    parts = _parts(store, source)
+    if not parts:
+        return 0
+    file_list = ", ".join(f"'{path}'" for path in parts)
+    return duck.execute(f"SELECT count(DISTINCT {key}) FROM read_parquet([{file_list}])").fetchone()[0]
+
+
+def _write_part(duck, conn, source, table, since, until, part):
+    """Write the rows changed in (since, until] to one Parquet part; returns how many."""
+    columns = [column.name for column in table.columns]
+    rows = [[row.get(column) for column in columns] + [row['_version']] for row in iter_changes(conn, source, since, until)]
+    if rows:
+        os.makedirs(os.path.dirname(part), exist_ok=True)
+        # Load through a typed table so all-NULL columns keep their real types in Parquet
+        batch = pd.DataFrame(rows, columns=columns + ['_version'])
+        duck.execute(f"CREATE OR REPLACE TEMP TABLE batch ({_schema(table)})")
+        duck.register('batch_rows', batch)
+        duck.execute("INSERT INTO batch SELECT * FROM batch_rows")
+        duck.unregister('batch_rows')
+        duck.execute(f"COPY batch TO '{part}' (FORMAT PARQUET)")
+    return len(rows)
+
+
+def refresh_analytics_store(conn, store=None, full=False):
+    """Bring the Parquet store up to date with the database.
+
+    Appends rows changed since the last refresh. A table is instead reloaded in full when
+    `full` is set or when, after appending, the store holds more rows than the database,
+    which only deletes cause. Returns ({table: rows written}, [tables rebuilt]).
+    """
+    store = store or analytics_dir()
+    state_path = os.path.join(store, "_watermarks.json")
+    os.makedirs(store, exist_ok=True)
+    watermarks = load_watermarks(state_path)
+    until = change_feed_watermark(conn)
+
+    counts, rebuilt = {}, []
+    duck = duckdb.connect()
+    try:
+        for source, (table, key) in ANALYTICS_SOURCES.items():
+            rebuild = full
+            if not rebuild:
+                since = watermarks.get(source, 0)
+                counts[source] = _write_part(duck, conn, source, table, since, until,
+                                             os.path.join(store, source, f"part-{until:020d}.parquet"))
+                # Rows inserted after `until` only raise the database count, so they never cause a rebuild
+                [(database_rows, _)] = fetch_data_version(conn, [source])
+                rebuild = _stored_rows(duck, store, source, key) > database_rows
+                if not rebuild and counts[source]:
+                    _compact(duck, store, source, key, until)
+            if rebuild:
+                stale_parts = _parts(store, source)
+                part = os.path.join(store, source, f"part-{until:020d}-full.parquet")
+                counts[source] = _write_part(duck, conn, source, table, 0, until, part)
+                # The new part is complete, so the old ones can go
+                for path in stale_parts:
+                    if path != part:
+                        os.remove(path)
+                rebuilt.append(source)
+            watermarks[source] = max(watermarks.get(source, 0), until)
+    finally:
+        duck.close()
+    save_watermarks(state_path, watermarks)
+    return counts, rebuilt
+
+
+def open_analytics(store=None):
+    """Return a sandboxed in-memory DuckDB connection with a table per view over the Parquet store.
+
+    The newest rows are loaded into memory first. External access is then switched off and the
+    configuration locked, so SQL run on the connection cannot read or write files (read_csv,
+    COPY, ATTACH) or turn access back on. A table that has never been refreshed is empty, so
+    saved queries still run.
+    """
+    store = store or analytics_dir()
+    duck = duckdb.connect()
+    try:
+        for view, sources in ANALYTICS_VIEWS.items():
+            table, key = ANALYTICS_SOURCES[sources[0]]
+            files = [path for source in sources for path in _parts(store, source)]
+            duck.execute(f"CREATE TABLE {view} ({_schema(table, versioned=False)})")
+            if files:
+                duck.execute(f"INSERT INTO {view} BY NAME {_latest_rows_sql(files, key)}")
+        duck.execute("SET enable_external_access = false")
+        duck.execute("SET lock_configuration = true")
+    except Exception:
+        duck.close()
+        raise
+    return duck
+
+
+def run_analytics_query(sql, store=None):
+    """Run saved or user-written SQL against the sandboxed store."""
+    duck = open_analytics(store)
+    try:
+        return duck.execute(sql).df()
+    finally:
+        duck.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the local Parquet copy used by Portfolio Analytics")
+    parser.add_argument('--full', action='store_true', help="rebuild every table instead of pulling changes")
+    args = parser.parse_args()
+
+    engine = create_db_engine()
+    with engine.connect() as conn:
+        counts, rebuilt = refresh_analytics_store(conn, full=args.full)
+    engine.dispose()
+    print("Analytics store refreshed: " + ", ".join(f"{source}: {count}" for source, count in counts.items())
+          + (f"; rebuilt {', '.join(rebuilt)}" if rebuilt else ""))
@@ -0,0 +1,136 @@
+"""Anomaly detection on weekly QE metrics.
+
+Flags values that break sharply from a project's own recent history, using a rolling
+z-score and a rolling IQR fence computed for every project and metric at once. Flags
+are written to qeMetric_Anomalies for the report views to highlight.
+
+Run nightly for the whole portfolio with:
+
+    python anomalies.py
+"""
+import json
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from db import create_db_engine
+
+ANOMALY_METRICS = [
+    'qe_progress_percentage', 'qe_team_size', 'tc_created', 'tc_executed', 'tc_passed_first_round',
+    'effort_tc_execution', 'tc_automated', 'effort_tc_automation', 'defects_raised_internal',
+    'sit_defects', 'uat_defects', 'reopened_defects'
+]
+ANOMALY_WINDOW = 8
+ANOMALY_MIN_HISTORY = 3
+ANOMALY_Z_THRESHOLD = 3.0
+ANOMALY_IQR_FENCE = 3.0
+# A flat history has no spread, so flag any relative move at least this large
+ANOMALY_FLAT_CHANGE = 0.5
+
+
+def detect_anomalies(updates, window=ANOMALY_WINDOW, z_threshold=ANOMALY_Z_THRESHOLD):
+    """Return one row per flagged (project_id, week_ending_date, metric).
+
+    Each value is compared with the preceding `window` weeks of the same project and metric,
+    so a bad week never dilutes its own baseline.
+    """
+    columns = ['project_id', 'week_ending_date', 'metric', 'value', 'baseline', 'score', 'method']
+    if updates.empty:
+        return pd.DataFrame(columns=columns)
+    long = (
+        updates.melt(id_vars=['project_id', 'week_ending_date'], value_vars=ANOMALY_METRICS,
+                     var_name='metric', value_name='value')
+        .dropna(subset=['value'])
+        .sort_values(['project_id', 'metric', 'week_ending_date'], ignore_index=True)
+    )
+    keys = [long['project_id'], long['metric']]
+    previous = long.groupby(keys)['value'].shift(1)
+    rolling = previous.groupby(keys).rolling(window, min_periods=ANOMALY_MIN_HISTORY)
+
+    def aligned(series):
+        return series.reset_index(level=[0, 1], drop=True)
+
+    mean = aligned(rolling.mean())
+    std = aligned(rolling.std())
+    q1 = aligned(rolling.quantile(0.25))
+    q3 = aligned(rolling.quantile(0.75))
+    iqr = q3 - q1
+
+    z = (long['value'] - mean) / std.where(std > 0)
+    z_flag = z.abs() >= z_threshold
+    iqr_flag = (iqr > 0) & ((long['value'] < q1 - ANOMALY_IQR_FENCE * iqr) | (long['value'] > q3 + ANOMALY_IQR_FENCE * iqr))
+    relative_change = (long['value'] - mean).abs() / mean.abs().where(mean != 0)
+    flat_flag = (std == 0) & (relative_change >= ANOMALY_FLAT_CHANGE)
+
+    long['baseline'] = mean
+    long['score'] = z.where(z.notna(), np.sign(long['value'] - mean) * relative_change)
+    long['method'] = np.select([z_flag, iqr_flag, flat_flag], ['z-score', 'iqr', 'flat-baseline'], default='')
+    return long.loc[long['method'] != '', columns].reset_index(drop=True)
+
+
+def load_metric_history(conn, project_id=None):
+    """Load the weekly metrics for one project, or for the whole portfolio."""
+    query = f"SELECT project_id, week_ending_date, {', '.join(ANOMALY_METRICS)} FROM qeWeekly_Updates WHERE week_ending_date IS NOT NULL"
+    params = {}
+    if project_id is not None:
+        query += " AND project_id = :pid"
+        params['pid'] = project_id
+    return pd.read_sql(text(query), conn, params=params, parse_dates=['week_ending_date'])
+
+
+def save_anomalies(conn, flags, project_id=None):
+    """Replace the stored flags for the scanned scope with `flags`, in one transaction."""
+    try:
+        if project_id is None:
+            conn.execute(text("DELETE FROM qeMetric_Anomalies"))
+        else:
+            conn.execute(text("DELETE FROM qeMetric_Anomalies WHERE project_id = :pid"), {'pid': project_id})
+        if not flags.empty:
+            payload = flags.assign(week_ending_date=flags['week_ending_date'].dt.strftime('%Y-%m-%d'))
+            conn.execute(text("""
+                INSERT INTO qeMetric_Anomalies (project_id, week_ending_date, metric, value, baseline, score, method)
+                SELECT project_id, week_ending_date, metric, value, baseline, score, method
+                FROM OPENJSON(:payload) WITH (
+                    project_id INT, week_ending_date DATE, metric NVARCHAR(50), value FLOAT,
+                    baseline FLOAT, score FLOAT, method NVARCHAR(20)
+                )
+            """), {'payload': json.dumps(payload.astype(object).where(payload.notna(), None).to_dict('records'))})
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def scan_anomalies(conn, project_id=None):
+    """Detect and store anomalies for one project (on submit) or the whole portfolio (nightly)."""
+    flags = detect_anomalies(load_metric_history(conn, project_id))
+    save_anomalies(conn, flags, project_id)
+    return flags
+
+
+def load_week_anomalies(conn, week_ending_date):
+    """Return {project_id: [flag, ...]} for the flags raised in a given week."""
+    rows = conn.execute(text("""
+        SELECT project_id, metric, value, baseline, method
+        FROM qeMetric_Anomalies
+        WHERE week_ending_date = :week
+        ORDER BY project_id, metric
+    """), {'week': str(week_ending_date)}).fetchall()
+    flags = {}
+    for row in rows:
+        flags.setdefault(row.project_id, []).append(row)
+    return flags
+
+
+def describe_anomaly(flag):
+    baseline = "n/a" if flag.baseline is None else f"{flag.baseline:.1f}"
+    return f"{flag.metric.replace('_', ' ')} = {flag.value:g} (recent average {baseline}, {flag.method})"
+
+
+if __name__ == "__main__":
+    engine = create_db_engine()
+    with engine.connect() as conn:
+        flags = scan_anomalies(conn)
+    print(f"Anomaly scan complete: {len(flags)} flags across {flags['project_id'].nunique()} projects")
+    engine.dispose()
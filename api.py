@@ -0,0 +1,266 @@
+"""Read-only JSON API over projects, weekly updates and milestone status.
+
+Runs as its own process next to the Streamlit app and reads through the same service layer:
+
+    python api.py --port 8502
+
+Endpoints (all GET):
+    /projects?search=&status=Active&limit=&cursor=
+    /projects/<project_id>/weekly-updates?limit=&cursor=
+    /projects/<project_id>/milestones?week=YYYY-MM-DD
+    /weekly-updates?week=YYYY-MM-DD&limit=&cursor=
+    /changes/<table>?since=&limit=
+
+List endpoints return {"data": [...], "next_cursor": ...}; pass next_cursor back as `cursor`
+for the following page. /changes returns rows changed after row version `since` together
+with `next_since`; keep calling with it until `has_more` is false, then store it as the
+watermark for the next sync. Every response carries an ETag, and a matching If-None-Match gets
+an empty 304. Project, update and milestone ETags come from the row counts and row versions of
+the tables behind them, so a 304 is answered before the data query runs. Bodies are
+gzip-compressed for clients that accept it.
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import hmac
+import json
+import re
+from datetime import date, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import streamlit as st
+
+from sqlalchemy.exc import OperationalError
+
+from db import create_db_engine, create_read_engine
+from services import (
+    CHANGE_FEED_BATCH_SIZE, CHANGE_FEED_TABLES, PROJECT_PAGE_SIZE, change_feed_watermark, fetch_changes,
+    fetch_data_version, fetch_milestone_status, fetch_project_page, fetch_weekly_updates
+)
+
+MAX_PAGE_SIZE = 200
+GZIP_MIN_BYTES = 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, default=str).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, parse_sort_key=str):
+    """Decode a [sort key, id] cursor, converting the sort key with `parse_sort_key`."""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not (isinstance(key, list) and len(key) == 2 and isinstance(key[0], str)
+                and isinstance(key[1], int) and not isinstance(key[1], bool)):
+            raise ValueError(key)
+        return [parse_sort_key(key[0]), key[1]]
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid cursor")
+
+
+def parse_limit(query, default=PROJECT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        limit = int(query.get('limit', default))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "limit must be an integer")
+    return min(max(limit, 1), maximum)
+
+
+def _parse_cursor_week(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def parse_week(query, required=False):
+    week = query.get('week')
+    if not week:
+        if required:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "week is required (YYYY-MM-DD)")
+        return None
+    try:
+        return datetime.strptime(week, '%Y-%m-%d').date()
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "week must be YYYY-MM-DD")
+
+
+def page(rows, limit, key):
+    """Trim the extra look-ahead row and build the next cursor from the last row kept."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {'data': [row._asdict() for row in rows], 'next_cursor': encode_cursor(key(rows[-1])) if has_more else None}
+
+
+def list_projects(conn, query):
+    limit = parse_limit(query)
+    rows = fetch_project_page(
+        conn, query.get('search', '').strip(), query.get('status', 'Active'),
+        after=decode_cursor(query.get('cursor')), limit=limit
+    )
+    return page(rows, limit, lambda row: [row.project_name, row.project_id])
+
+
+def list_weekly_updates(conn, query, project_id=None):
+    limit = parse_limit(query)
+    rows = fetch_weekly_updates(
+        conn, week_ending_date=parse_week(query), project_id=project_id,
+        after=decode_cursor(query.get('cursor'), _parse_cursor_week), limit=limit,
+        include_archive=project_id is not None
+    )
+    return page(rows, limit, lambda row: [row.week_ending_date, row.update_id])
+
+
+def project_milestones(conn, query, project_id):
+    week = parse_week(query) or date.today()
+    milestones = [milestone._asdict() for milestone in fetch_milestone_status(conn, project_id, week)]
+    return {'project_id': project_id, 'week_ending_date': week, 'data': milestones}
+
+
+def list_changes(conn, query, table):
+    if table not in CHANGE_FEED_TABLES:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Change feed tables: {', '.join(CHANGE_FEED_TABLES)}")
+    try:
+        since = int(query.get('since', 0))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "since must be an integer row version")
+    limit = parse_limit(query, CHANGE_FEED_BATCH_SIZE, CHANGE_FEED_BATCH_SIZE)
+    watermark = change_feed_watermark(conn)
+    rows = fetch_changes(conn, table, since, watermark, limit)
+    has_more = len(rows) == limit
+    return {
+        'table': table,
+        'data': rows,
+        'next_since': rows[-1]['_version'] if has_more else max(since, watermark),
+        'has_more': has_more
+    }
+
+
+# (path pattern, handler, whether the read replica may serve it, validator). The change feed
+# stays on the primary because MIN_ACTIVE_ROWVERSION() only sees the primary's open transactions.
+# A validator returns a cheap value that changes whenever the handler's response could; routes
+# without one get an ETag hashed from the body.
+ROUTES = [
+    (re.compile(r'^/projects/?$'), lambda conn, query: list_projects(conn, query), True,
+     lambda conn, query: fetch_data_version(conn, ['qeProjects'])),
+    (re.compile(r'^/projects/(\d+)/weekly-updates/?$'), lambda conn, query, pid: list_weekly_updates(conn, query, int(pid)), True,
+     lambda conn, query, pid: fetch_data_version(conn, ['qeProjects', 'qeWeekly_Updates', 'qeWeekly_Updates_Archive'], int(pid))),
+    (re.compile(r'^/projects/(\d+)/milestones/?$'), lambda conn, query, pid: project_milestones(conn, query, int(pid)), True,
+     # Expected progress without an explicit week is as of today
+     lambda conn, query, pid: [date.today(), fetch_data_version(
+         conn, ['Milestones', 'Milestone_Updates', 'Milestone_Updates_Archive'], int(pid)
+     )]),
+    (re.compile(r'^/weekly-updates/?$'), lambda conn, query: list_weekly_updates(conn, query), True,
+     lambda conn, query: fetch_data_version(conn, ['qeProjects', 'qeWeekly_Updates'])),
+    (re.compile(r'^/changes/(\w+)/?$'), lambda conn, query, table: list_changes(conn, query, table), False, None),
+]
+
+
+def make_etag(content):
+    return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    engine = None
+    read_engine = None
+    api_token = None
+
+    def connect(self, use_replica):
+        """Connect to the read replica when allowed and configured, else to the primary."""
+        if use_replica and self.read_engine is not None:
+            try:
+                return self.read_engine.connect()
+            except OperationalError as e:
+                self.log_error("Read replica unavailable, using the primary: %s", e)
+        return self.engine.connect()
+
+    def do_GET(self):
+        try:
+            if self.api_token and not hmac.compare_digest(self.headers.get('Authorization', ''), f"Bearer {self.api_token}"):
+                raise ApiError(HTTPStatus.UNAUTHORIZED, "Missing or invalid bearer token")
+            url = urlsplit(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            for pattern, handler, use_replica, validator in ROUTES:
+                match = pattern.match(url.path)
+                if match:
+                    with self.connect(use_replica) as conn:
+                        etag = None
+                        if validator is not None:
+                            version = validator(conn, query, *match.groups())
+                            etag = make_etag(json.dumps([url.path, sorted(query.items()), version], default=str).encode('utf-8'))
+                            if self.etag_matches(etag):
+                                self.send_not_modified(etag)
+                                return
+                        payload = handler(conn, query, *match.groups())
+                    break
+            else:
+                raise ApiError(HTTPStatus.NOT_FOUND, "Unknown endpoint")
+            self.send_json(HTTPStatus.OK, payload, etag)
+        except ApiError as e:
+            self.send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            self.log_error("Request failed: %s", e)
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "Internal server error"})
+
+    def etag_matches(self, etag):
+        return etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]
+
+    def send_not_modified(self, etag):
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header('ETag', etag)
+        self.end_headers()
+
+    def send_json(self, status, payload, etag=None):
+        """Send `payload`; without a precomputed `etag`, a 200 is tagged with a hash of its body."""
+        body = json.dumps(payload, default=lambda v: v.isoformat() if isinstance(v, (date, datetime)) else str(v)).encode('utf-8')
+        etag = etag or make_etag(body)
+        if status == HTTPStatus.OK and self.etag_matches(etag):
+            self.send_not_modified(etag)
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if status == HTTPStatus.OK:
+            self.send_header('ETag', etag)
+        if len(body) >= GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only JSON API for the QE Weekly Status Dashboard")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    args = parser.parse_args()
+
+    ApiHandler.engine = create_db_engine(pool_pre_ping=True)
+    ApiHandler.read_engine = create_read_engine(pool_pre_ping=True)
+    ApiHandler.api_token = st.secrets.get("api_token")
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    print(f"Serving QE API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        ApiHandler.engine.dispose()
+        if ApiHandler.read_engine is not None:
+            ApiHandler.read_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,38 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import json
 from dotenv import load_dotenv
 import os
-from sqlalchemy import create_engine, text
-from xhtml2pdf import pisa
-import io
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+import re
 import bcrypt
+import hashlib
+from analytics import SAVED_ANALYTICS, analytics_dir, refresh_analytics_store, run_analytics_query
+from cache import get_shared_cache
+from db import create_db_engine, create_read_engine
+from anomalies import scan_anomalies, load_week_anomalies, describe_anomaly
+from audit import fetch_audit_log, get_audit_log
+from bulk_import import (
+    MILESTONE_IMPORT_COLUMNS, WEEKLY_IMPORT_COLUMNS, WEEKLY_UPDATE_COLUMNS, bulk_load_updates,
+    read_import_file, validate_milestone_import, validate_weekly_import
+)
+from archive import ARCHIVED_MILESTONE_COLUMNS, ARCHIVED_WEEKLY_COLUMNS, archive_project, restore_project, set_project_status
+from gantt import render_milestone_gantt
+from migrations import ensure_unique_update_indexes
+from models import Milestone, milestones as milestones_table, select_columns
+from reports import (
+    convert_html_to_pdf, format_delta, milestone_rows, milestone_updates_document, project_section_html, report_document,
+    rollup_document
+)
+from services import (
+    CHANGE_FEED_TABLES, FORECAST_WINDOW_WEEKS, PROJECT_PAGE_SIZE, ROLLUP_DIMENSIONS, derive_milestone_status,
+    fetch_latest_milestone_progress, fetch_latest_weekly_update, fetch_milestone_forecasts, fetch_milestone_status,
+    fetch_project_page, fetch_replica_lag, fetch_rollup_summaries, format_forecast_slip, group_report_sections,
+    stream_weekly_report
+)
 
 # Custom CSS for enhanced UI
 st.markdown("""
@@ -188,19 +213,14 @@ st.markdown("""
 # Azure SQL Database connection
 def init_db():
     try:
-        server = st.secrets["db_server"]
-        database = st.secrets["db_name"]
-        username = st.secrets["db_user"]
-        password = st.secrets["db_password"]
-        connection_url = f"mssql+pymssql://{username}:{password}@{server}:1433/{database}"
-        engine = create_engine(connection_url)
+        engine = create_db_engine()
         conn = engine.connect()
         
         # Check if tables exist
         tables_check = conn.execute(text("""
             SELECT TABLE_NAME 
             FROM INFORMATION_SCHEMA.TABLES 
-            WHERE TABLE_NAME IN ('qeUsers', 'qeProjects', 'qeWeekly_Updates', 'Milestones', 'Milestone_Updates')
+            WHERE TABLE_NAME IN ('qeUsers', 'qeProjects', 'qeWeekly_Updates', 'Milestones', 'Milestone_Updates', 'qeMetric_Anomalies')
         """)).fetchall()
         existing_tables = [row[0] for row in tables_check]
         st.info(f"Existing tables: {existing_tables}")
@@ -308,18 +328,227 @@ def init_db():
             """))
             st.success("Milestone_Updates table created successfully.")
 
+        # Create qeMetric_Anomalies table if it doesn't exist
+        if 'qeMetric_Anomalies' not in existing_tables:
+            conn.execute(text("""
+                CREATE TABLE qeMetric_Anomalies (
+                    anomaly_id INT IDENTITY(1,1) PRIMARY KEY,
+                    project_id INT NOT NULL,
+                    week_ending_date DATE NOT NULL,
+                    metric NVARCHAR(50) NOT NULL,
+                    value FLOAT NOT NULL,
+                    baseline FLOAT NULL,
+                    score FLOAT NULL,
+                    method NVARCHAR(20) NOT NULL,
+                    detected_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+                    FOREIGN KEY (project_id) REFERENCES qeProjects(project_id),
+                    CONSTRAINT UQ_Anomalies_project_week_metric UNIQUE (project_id, week_ending_date, metric)
+                )
+            """))
+            st.success("qeMetric_Anomalies table created successfully.")
+
         conn.commit()
+        pending_migrations = apply_schema_upgrades(engine)
+        # Counted once per process with the upgrade; re-check after running the migration
+        for table, duplicates in pending_migrations.items():
+            st.warning(f"{table} has {duplicates} repeated submissions for the same week, so its unique index was not created. "
+                       "Run `python migrations.py dedupe-updates` to move them to a backup table.")
+        if pending_migrations and st.button("Check Migrations Again"):
+            apply_schema_upgrades.clear()
+            st.rerun()
         return conn, engine
     except Exception as e:
         st.error(f"DB Connection or Schema Validation Failed: {e}")
         raise
 
-def convert_html_to_pdf(html_content):
-    result = io.BytesIO()
-    pdf = pisa.pisaDocument(io.StringIO(html_content), dest=result)
-    if not pdf.err:
-        return result.getvalue()
-    return None
+def init_read_db(conn):
+    """Open the connection used for report reads on the read replica, falling back to the primary.
+
+    Returns (read_conn, read_engine); read_engine is None when reads go to the primary.
+    """
+    try:
+        read_engine = create_read_engine()
+        if read_engine is None:
+            return conn, None
+        return read_engine.connect(), read_engine
+    except Exception as e:
+        st.warning(f"Read replica unavailable, reports will read from the primary: {e}")
+        return conn, None
+
+@st.cache_resource
+def apply_schema_upgrades(_engine):
+    """Run upgrade_schema and ensure_fulltext_indexes once per process instead of on every rerun.
+
+    Returns the pending migrations reported by upgrade_schema.
+    """
+    with _engine.connect() as upgrade_conn:
+        pending_migrations = upgrade_schema(upgrade_conn)
+        upgrade_conn.commit()
+    ensure_fulltext_indexes(_engine)
+    return pending_migrations
+
+def upgrade_schema(conn):
+    """Apply additive column and index upgrades to tables created by earlier versions.
+
+    Returns {table: duplicate rows} for unique indexes that wait on `python migrations.py dedupe-updates`.
+    """
+    existing_columns = {
+        (row[0], row[1]) for row in conn.execute(text("""
+            SELECT TABLE_NAME, COLUMN_NAME
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_NAME IN ('qeProjects', 'qeWeekly_Updates', 'Milestones', 'Milestone_Updates',
+                                 'qeWeekly_Updates_Archive', 'Milestone_Updates_Archive',
+                                 'qeWeekly_Updates_All', 'Milestone_Updates_All')
+        """)).fetchall()
+    }
+    existing_indexes = {row[0] for row in conn.execute(text("SELECT name FROM sys.indexes WHERE name IS NOT NULL")).fetchall()}
+
+    # Lifecycle status used to filter the project selector
+    if ('qeProjects', 'project_status') not in existing_columns:
+        conn.execute(text("""
+            ALTER TABLE qeProjects
+            ADD project_status NVARCHAR(20) NOT NULL CONSTRAINT DF_qeProjects_project_status DEFAULT 'Active'
+        """))
+
+    # Prefix search and keyset pagination for the project selector
+    if 'IX_qeProjects_status_name' not in existing_indexes:
+        conn.execute(text("""
+            CREATE INDEX IX_qeProjects_status_name
+            ON qeProjects (project_status, project_name, project_id)
+            INCLUDE (client)
+        """))
+    if 'IX_qeProjects_status_client' not in existing_indexes:
+        conn.execute(text("""
+            CREATE INDEX IX_qeProjects_status_client
+            ON qeProjects (project_status, client, project_id)
+            INCLUDE (project_name)
+        """))
+
+    # One weekly update per project and week, and one progress value per milestone and week;
+    # resubmits are upserted against these keys.
+    # Repeated submissions from before these keys existed are only removed by migrations.py
+    pending_migrations = ensure_unique_update_indexes(conn, existing_indexes)
+
+    # Covers the portfolio KPI aggregation and the client/SPOC roll-ups so they never touch the
+    # wide base rows; replaces the earlier week-only index, which could not join to projects
+    if 'IX_qeWeekly_Updates_week_rollup' not in existing_indexes:
+        conn.execute(text("""
+            CREATE INDEX IX_qeWeekly_Updates_week_rollup
+            ON qeWeekly_Updates (week_ending_date, project_id)
+            INCLUDE (qe_overall_status, qe_progress_percentage, tc_created, tc_executed, tc_passed_first_round,
+                     tc_automated, defects_raised_internal, sit_defects, uat_defects, reopened_defects)
+        """))
+    if 'IX_qeWeekly_Updates_week_kpis' in existing_indexes:
+        conn.execute(text("DROP INDEX IX_qeWeekly_Updates_week_kpis ON qeWeekly_Updates"))
+
+    # Cold tier for archived projects. No foreign keys, so archival can move rows with DELETE ... OUTPUT INTO
+    conn.execute(text("""
+        IF OBJECT_ID('qeWeekly_Updates_Archive') IS NULL
+        CREATE TABLE qeWeekly_Updates_Archive (
+            update_id INT PRIMARY KEY,
+            project_id INT NOT NULL,
+            week_ending_date DATE,
+            qe_overall_status NVARCHAR(10),
+            qe_progress_percentage INT,
+            current_week_progress_entry NVARCHAR(MAX),
+            next_release_date DATE,
+            qe_team_size INT,
+            qe_current_week_task NVARCHAR(MAX),
+            qe_automation_tools_used NVARCHAR(MAX),
+            tc_created INT,
+            tc_executed INT,
+            tc_passed_first_round INT,
+            effort_tc_execution FLOAT,
+            tc_automated INT,
+            effort_tc_automation FLOAT,
+            defects_raised_internal INT,
+            sit_defects INT,
+            uat_defects INT,
+            reopened_defects INT,
+            archived_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+            INDEX IX_qeWeekly_Updates_Archive_project_week (project_id, week_ending_date)
+        )
+    """))
+    conn.execute(text("""
+        IF OBJECT_ID('Milestone_Updates_Archive') IS NULL
+        CREATE TABLE Milestone_Updates_Archive (
+            update_id INT PRIMARY KEY,
+            milestone_id INT NOT NULL,
+            week_ending_date DATE NOT NULL,
+            actual_progress FLOAT NOT NULL,
+            archived_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+            INDEX IX_Milestone_Updates_Archive_milestone_week (milestone_id, week_ending_date) INCLUDE (actual_progress)
+        )
+    """))
+    # History views that read both tiers; portfolio-wide queries stay on the hot tables. Altering a
+    # view takes a schema-modification lock, so only do it when the view is missing or its columns changed
+    for view, (hot, archive, columns) in {
+        'qeWeekly_Updates_All': ('qeWeekly_Updates', 'qeWeekly_Updates_Archive', ARCHIVED_WEEKLY_COLUMNS),
+        'Milestone_Updates_All': ('Milestone_Updates', 'Milestone_Updates_Archive', ARCHIVED_MILESTONE_COLUMNS),
+    }.items():
+        view_columns = {column for table, column in existing_columns if table == view}
+        if view_columns != {column.strip() for column in columns.split(',')}:
+            conn.execute(text(f"""
+                CREATE OR ALTER VIEW {view} AS
+                SELECT {columns} FROM {hot}
+                UNION ALL
+                SELECT {columns} FROM {archive}
+            """))
+
+    # Audit trail written by audit.AuditLog; append-only, so the clustered key is the insert order
+    conn.execute(text("""
+        IF OBJECT_ID('qeAudit_Log') IS NULL
+        CREATE TABLE qeAudit_Log (
+            audit_id BIGINT IDENTITY(1,1) PRIMARY KEY,
+            occurred_at DATETIME2 NOT NULL,
+            username NVARCHAR(50),
+            action NVARCHAR(50) NOT NULL,
+            entity NVARCHAR(50) NOT NULL,
+            entity_id NVARCHAR(100),
+            before_values NVARCHAR(MAX),
+            after_values NVARCHAR(MAX),
+            INDEX IX_qeAudit_Log_entity (entity, entity_id),
+            INDEX IX_qeAudit_Log_username (username)
+        )
+    """))
+
+    # Row versions for optimistic concurrency on milestone edits and the incremental change feed
+    for table in CHANGE_FEED_TABLES:
+        if (table, 'row_version') not in existing_columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD row_version ROWVERSION"))
+        if f'IX_{table}_row_version' not in existing_indexes:
+            conn.execute(text(f"CREATE INDEX IX_{table}_row_version ON {table} (row_version)"))
+
+    return pending_migrations
+
+# Free-text columns covered by the update search
+FULLTEXT_COLUMNS = {
+    'qeWeekly_Updates': ['current_week_progress_entry', 'qe_current_week_task', 'qe_automation_tools_used'],
+    'Milestones': ['notes']
+}
+
+def ensure_fulltext_indexes(engine):
+    """Create the full-text catalog and indexes behind the update search, where supported.
+
+    Full-text DDL cannot run inside a transaction, so this uses its own autocommit connection.
+    CHANGE_TRACKING AUTO keeps the indexes current as rows are inserted or updated.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as ddl_conn:
+        if not ddl_conn.execute(text("SELECT FULLTEXTSERVICEPROPERTY('IsFullTextInstalled')")).scalar():
+            return
+        if not ddl_conn.execute(text("SELECT 1 FROM sys.fulltext_catalogs WHERE name = 'qeSearchCatalog'")).fetchone():
+            ddl_conn.execute(text("CREATE FULLTEXT CATALOG qeSearchCatalog AS DEFAULT"))
+        for table, columns in FULLTEXT_COLUMNS.items():
+            if ddl_conn.execute(text("SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID(:table)"), {'table': table}).fetchone():
+                continue
+            key_index = ddl_conn.execute(text("""
+                SELECT name FROM sys.indexes WHERE object_id = OBJECT_ID(:table) AND is_primary_key = 1
+            """), {'table': table}).scalar()
+            ddl_conn.execute(text(f"""
+                CREATE FULLTEXT INDEX ON {table} ({', '.join(columns)})
+                KEY INDEX [{key_index}] ON qeSearchCatalog
+                WITH CHANGE_TRACKING AUTO
+            """))
 
 # User authentication functions
 def hash_password(password):
@@ -341,6 +570,402 @@ def check_credentials(username, password, conn):
         st.error(f"Authentication error: {e}")
         return False
 
+# Searchable, keyset-paginated project selector
+PROJECT_STATUSES = ["Active", "Closed", "Archived"]
+def select_project(conn, key, label="Select Project", include_all=False):
+    """Render a searchable project picker that only loads one page of projects.
+
+    Returns (project_id, project_name), (None, "All") when `include_all` is chosen, or None
+    when nothing matches.
+    """
+    pages = st.session_state.setdefault(f"{key}_pages", {'filter': None, 'cursors': [None]})
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        search = st.text_input("Search by project name or client", key=f"{key}_search").strip()
+    with col2:
+        status = st.selectbox("Status", PROJECT_STATUSES, key=f"{key}_status")
+    if pages['filter'] != (search, status):
+        pages['filter'] = (search, status)
+        pages['cursors'] = [None]
+
+    rows = fetch_project_page(conn, search, status, after=pages['cursors'][-1])
+    has_more = len(rows) > PROJECT_PAGE_SIZE
+    rows = rows[:PROJECT_PAGE_SIZE]
+    options = [(row.project_id, row.project_name, row.client) for row in rows]
+    if include_all:
+        options = [(None, "All", None)] + options
+    if not options:
+        return None
+
+    choice = st.selectbox(
+        label, options, key=f"{key}_choice",
+        format_func=lambda o: o[1] if not o[2] else f"{o[1]} ({o[2]})"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("◀ Previous", key=f"{key}_prev", disabled=len(pages['cursors']) == 1):
+            pages['cursors'].pop()
+            st.rerun()
+    with col2:
+        if st.button("Next ▶", key=f"{key}_next", disabled=not has_more):
+            pages['cursors'].append((rows[-1].project_name, rows[-1].project_id))
+            st.rerun()
+    return choice[0], choice[1]
+
+# Report caches, shared across app replicas when cache_url is configured (see cache.py).
+# They are always filled from the primary: a read replica that is still catching up after
+# invalidate_report_caches() would otherwise cache pre-submit rows for every app instance.
+KPI_CACHE_TTL = 900
+GANTT_CACHE_TTL = 24 * 3600
+REPORT_CACHE_NAMESPACE = "reports"
+REPLICA_LAG_TTL = 30
+report_cache = get_shared_cache()
+
+@report_cache.memoize("replica_lag", ttl=REPLICA_LAG_TTL)
+def load_replica_lag(_engine):
+    """Replica lag for the sidebar, read at most once per TTL.
+
+    Uses a short-lived connection of its own, so the DMV queries and the rollback after a
+    missing permission never touch the session's primary connection.
+    """
+    with _engine.connect() as lag_conn:
+        return fetch_replica_lag(lag_conn)
+
+# Portfolio KPI aggregates
+@report_cache.memoize(REPORT_CACHE_NAMESPACE, ttl=KPI_CACHE_TTL)
+def load_portfolio_kpis(_conn, since):
+    """Return one row per week with RAG counts and summed test/defect metrics since `since`."""
+    query = """
+        SELECT week_ending_date,
+               COUNT(*) AS projects,
+               SUM(CASE WHEN qe_overall_status = 'GREEN' THEN 1 ELSE 0 END) AS green,
+               SUM(CASE WHEN qe_overall_status = 'AMBER' THEN 1 ELSE 0 END) AS amber,
+               SUM(CASE WHEN qe_overall_status = 'RED' THEN 1 ELSE 0 END) AS red,
+               SUM(tc_created) AS tc_created,
+               SUM(tc_executed) AS tc_executed,
+               SUM(tc_passed_first_round) AS tc_passed_first_round,
+               SUM(tc_automated) AS tc_automated,
+               SUM(defects_raised_internal) AS defects_raised_internal,
+               SUM(sit_defects) AS sit_defects,
+               SUM(uat_defects) AS uat_defects,
+               SUM(reopened_defects) AS reopened_defects
+        FROM qeWeekly_Updates
+        WHERE week_ending_date IS NOT NULL
+    """
+    params = {}
+    if since is not None:
+        query += " AND week_ending_date >= :since"
+        params['since'] = str(since)
+    query += " GROUP BY week_ending_date ORDER BY week_ending_date"
+    kpis = pd.read_sql(text(query), _conn, params=params, parse_dates=['week_ending_date'])
+    return kpis.set_index('week_ending_date')
+
+def portfolio_kpi_trends(kpis):
+    """Derive portfolio rates from the weekly aggregates; weeks with a zero denominator are left empty."""
+    def ratio(numerator, denominator):
+        return (kpis[numerator] / kpis[denominator].where(kpis[denominator] > 0)) * 100
+
+    total_defects = kpis[['defects_raised_internal', 'sit_defects', 'uat_defects']].sum(axis=1)
+    return pd.DataFrame({
+        'Test Execution Rate %': ratio('tc_executed', 'tc_created'),
+        'First-Pass Rate %': ratio('tc_passed_first_round', 'tc_executed'),
+        'Automation Coverage %': ratio('tc_automated', 'tc_created'),
+        'Defect Leakage %': kpis['uat_defects'] / total_defects.where(total_defects > 0) * 100
+    }, index=kpis.index)
+
+# Milestone progress history
+@report_cache.memoize(REPORT_CACHE_NAMESPACE, ttl=KPI_CACHE_TTL)
+def load_milestone_history(_conn, project_id):
+    """Return the project's milestones and their weekly progress as (milestones, long history) frames."""
+    rows = pd.read_sql(text("""
+        SELECT m.milestone_id, m.milestone_name, m.parent_milestone_id, m.planned_start_date,
+               m.planned_end_date, m.total_days, m.weightage, mu.week_ending_date, mu.actual_progress
+        FROM Milestones m
+        LEFT JOIN Milestone_Updates_All mu ON mu.milestone_id = m.milestone_id
+        WHERE m.project_id = :pid
+        ORDER BY m.milestone_id, mu.week_ending_date
+    """), _conn, params={'pid': project_id}, parse_dates=['planned_start_date', 'planned_end_date', 'week_ending_date'])
+    milestones = rows.drop(columns=['week_ending_date', 'actual_progress']).drop_duplicates('milestone_id').set_index('milestone_id')
+    history = rows.dropna(subset=['week_ending_date'])[['milestone_id', 'week_ending_date', 'actual_progress']]
+    return milestones, history
+
+def expected_progress_frame(weeks, milestones):
+    """Expected progress (0-1) of every milestone at every week, as a weeks x milestones frame.
+
+    Matches the per-row rule used in the forms: 0 up to the planned start, 1 after the planned
+    end, and days elapsed / total_days in between.
+    """
+    week_values = pd.DatetimeIndex(weeks).to_numpy()[:, None]
+    start = milestones['planned_start_date'].to_numpy()[None, :]
+    end = milestones['planned_end_date'].to_numpy()[None, :]
+    total_days = milestones['total_days'].to_numpy(dtype=float)[None, :]
+    elapsed = (week_values - start) / pd.Timedelta(days=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = np.where(week_values <= start, 0.0, np.where(week_values > end, 1.0, elapsed / total_days))
+    expected = np.where(total_days > 0, expected, 0.0)
+    return pd.DataFrame(expected, index=pd.DatetimeIndex(weeks), columns=milestones.index)
+
+def milestone_burnup(milestones, history):
+    """Pivot the history into weeks x milestones and return (actual, expected) frames.
+
+    Progress is cumulative, so weeks without an update carry the last reported value forward.
+    """
+    actual = (
+        history.pivot(index='week_ending_date', columns='milestone_id', values='actual_progress')
+        .reindex(columns=milestones.index)
+        .sort_index()
+        .ffill()
+        .fillna(0.0)
+    )
+    return actual, expected_progress_frame(actual.index, milestones)
+
+def weighted_project_progress(frame, milestones):
+    """Weight top-level milestone progress by weightage into a single project series."""
+    top_level = milestones[milestones['parent_milestone_id'].isna()]
+    weights = top_level['weightage'].fillna(0.0)
+    if weights.sum() == 0:
+        weights = pd.Series(1.0, index=top_level.index)
+    return frame[top_level.index].mul(weights, axis=1).sum(axis=1) / weights.sum()
+
+@report_cache.memoize(REPORT_CACHE_NAMESPACE, ttl=KPI_CACHE_TTL)
+def load_milestone_forecasts(_engine, as_of, window=FORECAST_WINDOW_WEEKS):
+    """Portfolio milestone forecasts as of a week, cached until the next submit.
+
+    Opens its own primary connection, as report streams call it from worker threads.
+    """
+    with _engine.connect() as forecast_conn:
+        return fetch_milestone_forecasts(forecast_conn, as_of, window)
+
+# Milestone Gantt charts
+def milestone_data_version(milestone_data):
+    """Fingerprint of everything the Gantt chart draws, so edits produce a new cache key."""
+    fields = [
+        (m.milestone_id, m.parent_id, m.name, str(m.planned_start), str(m.planned_end), m.actual_progress, m.rag)
+        for m in milestone_data
+    ]
+    return hashlib.sha1(repr(fields).encode('utf-8')).hexdigest()
+
+# Keyed by the data version, so charts never need invalidating
+@report_cache.memoize("gantt", ttl=GANTT_CACHE_TTL)
+def milestone_gantt_png(project_id, week_ending_date, data_version, _milestone_data, title=None):
+    """Render a project's Gantt chart once per (project, week, data version)."""
+    return render_milestone_gantt(_milestone_data, week_ending_date, title)
+
+# Form defaults carried forward from each project's latest submission
+@report_cache.memoize(REPORT_CACHE_NAMESPACE, ttl=KPI_CACHE_TTL)
+def load_weekly_prefill(_conn, project_id):
+    return fetch_latest_weekly_update(_conn, project_id) or {}
+
+@report_cache.memoize(REPORT_CACHE_NAMESPACE, ttl=KPI_CACHE_TTL)
+def load_milestone_prefill(_conn, project_id):
+    return fetch_latest_milestone_progress(_conn, project_id)
+
+def invalidate_report_caches():
+    """Drop cached report data on every replica after a submit so the next page view reads fresh rows."""
+    report_cache.invalidate(REPORT_CACHE_NAMESPACE)
+
+# Audit trail; entries are queued and written in the background by audit.AuditLog
+audit_log = get_audit_log()
+
+def audit(action, entity, entity_id=None, before=None, after=None, username=None):
+    """Record a change made by the signed-in user, or by `username` for the pre-login admin forms."""
+    audit_log.record(username or st.session_state.get('username'), action, entity, entity_id, before, after)
+
+# Search over weekly progress entries, tasks and milestone notes
+SEARCH_RESULT_LIMIT = 50
+
+def _search_terms(query):
+    return re.findall(r"\w+", query.lower())
+
+def _snippet(text_value, terms, width=160):
+    # Show the first line mentioning a search term, trimmed around the match
+    for line in (text_value or '').splitlines():
+        lowered = line.lower()
+        positions = [lowered.find(term) for term in terms if term in lowered]
+        if positions:
+            start = max(min(positions) - width // 4, 0)
+            return ("…" if start else "") + line[start:start + width].strip()
+    return (text_value or '')[:width]
+
+def search_updates(conn, query, limit=SEARCH_RESULT_LIMIT):
+    """Return ranked search hits across weekly updates and milestone notes.
+
+    Uses CONTAINSTABLE when the full-text indexes exist, and falls back to a LIKE scan
+    on servers without full-text search.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return pd.DataFrame(columns=['Source', 'Project', 'Week Ending', 'Milestone', 'Match', 'Rank'])
+    fulltext_ready = conn.execute(text("""
+        SELECT COUNT(*) FROM sys.fulltext_indexes
+        WHERE object_id IN (OBJECT_ID('qeWeekly_Updates'), OBJECT_ID('Milestones'))
+    """)).scalar() == len(FULLTEXT_COLUMNS)
+
+    params = {'limit': limit}
+    if fulltext_ready:
+        # Every term must match, each as a word prefix
+        params['condition'] = ' AND '.join(f'"{term}*"' for term in terms)
+        weekly_source = """
+            CONTAINSTABLE(qeWeekly_Updates, (current_week_progress_entry, qe_current_week_task, qe_automation_tools_used), :condition, :limit) ft
+            JOIN qeWeekly_Updates w ON w.update_id = ft.[KEY]
+        """
+        milestone_source = """
+            CONTAINSTABLE(Milestones, notes, :condition, :limit) ft
+            JOIN Milestones m ON m.milestone_id = ft.[KEY]
+        """
+        rank = "ft.[RANK]"
+        weekly_filter = milestone_filter = "1 = 1"
+    else:
+        weekly_source, milestone_source, rank = "qeWeekly_Updates w", "Milestones m", "0"
+        weekly_clauses, milestone_clauses = [], []
+        for i, term in enumerate(terms):
+            params[f'term{i}'] = f"%{term}%"
+            weekly_clauses.append("(" + " OR ".join(f"w.{col} LIKE :term{i}" for col in FULLTEXT_COLUMNS['qeWeekly_Updates']) + ")")
+            milestone_clauses.append(f"m.notes LIKE :term{i}")
+        weekly_filter, milestone_filter = " AND ".join(weekly_clauses), " AND ".join(milestone_clauses)
+
+    rows = conn.execute(text(f"""
+        SELECT TOP (:limit) * FROM (
+            SELECT 'Weekly Update' AS source, p.project_name, w.week_ending_date, NULL AS milestone_name,
+                   CONCAT(w.current_week_progress_entry, CHAR(10), w.qe_current_week_task, CHAR(10), w.qe_automation_tools_used) AS body,
+                   {rank} AS hit_rank
+            FROM {weekly_source}
+            JOIN qeProjects p ON p.project_id = w.project_id
+            WHERE {weekly_filter}
+            UNION ALL
+            SELECT 'Milestone Notes', p.project_name, NULL, m.milestone_name, m.notes, {rank}
+            FROM {milestone_source}
+            JOIN qeProjects p ON p.project_id = m.project_id
+            WHERE {milestone_filter}
+        ) hits
+        ORDER BY hit_rank DESC, week_ending_date DESC
+    """), params).fetchall()
+    return pd.DataFrame([
+        {
+            'Source': row.source,
+            'Project': row.project_name,
+            'Week Ending': row.week_ending_date,
+            'Milestone': row.milestone_name,
+            'Match': _snippet(row.body, terms),
+            'Rank': row.hit_rank
+        } for row in rows
+    ], columns=['Source', 'Project', 'Week Ending', 'Milestone', 'Match', 'Rank'])
+
+# Milestone progress form
+def load_milestone_frame(conn, project_id):
+    """Load a project's milestones once for the progress form, with native dates."""
+    query = (
+        select(*select_columns(milestones_table, Milestone))
+        .where(milestones_table.c.project_id == project_id)
+        .order_by(milestones_table.c.parent_milestone_id, milestones_table.c.milestone_id)
+    )
+    return [Milestone._make(row) for row in conn.execute(query)]
+
+def group_milestones(milestones):
+    """Group milestones into (parent, [sub-milestones]) pairs in display order."""
+    children = {}
+    for m in milestones:
+        if m.parent_milestone_id is not None:
+            children.setdefault(m.parent_milestone_id, []).append(m)
+    top_level_ids = {m.milestone_id for m in milestones if m.parent_milestone_id is None}
+    groups = [(m, children.get(m.milestone_id, [])) for m in milestones if m.parent_milestone_id is None]
+    # Sub-milestones whose parent belongs elsewhere are shown on their own
+    groups += [(m, []) for m in milestones if m.parent_milestone_id is not None and m.parent_milestone_id not in top_level_ids]
+    return groups
+
+@st.fragment
+def milestone_group_editor(parent, children, week_ending_date, prefill):
+    """Progress inputs and derived columns for one top-level milestone and its sub-milestones.
+
+    Runs as a fragment, so editing a value reruns only this group rather than the whole page.
+    `prefill` maps milestone_id to the progress (0-1) each input starts from.
+    """
+    rows = []
+    for m in [parent] + children:
+        label = m.milestone_name if m is parent else f"  - {m.milestone_name}"
+        actual_progress = st.number_input(
+            f"Actual Progress % for {label}",
+            min_value=0.0,
+            max_value=100.0,
+            format="%.2f",
+            value=prefill.get(m.milestone_id, 0.0) * 100,
+            key=f"progress_{m.milestone_id}"
+        ) / 100
+        current_status, expected_progress, rag = derive_milestone_status(
+            actual_progress, m.planned_start_date, m.planned_end_date, m.total_days, week_ending_date
+        )
+        rows.append({
+            'Milestone': label,
+            'Actual Progress %': f"{actual_progress*100:.2f}%",
+            'Current Status': current_status,
+            'Expected Progress %': f"{expected_progress*100:.2f}%",
+            'Progress Status (RAG)': rag
+        })
+    if children:
+        weights = [c.weightage or 0 for c in children]
+        progress = [st.session_state[f"progress_{c.milestone_id}"] for c in children]
+        total_weight = sum(weights)
+        rolled_up = (
+            sum(w * p for w, p in zip(weights, progress)) / total_weight if total_weight
+            else sum(progress) / len(progress)
+        )
+        st.caption(f"Rolled-up progress of sub-milestones: {rolled_up:.2f}%")
+    st.table(pd.DataFrame(rows))
+
+# Optimistic concurrency for milestone progress edits
+def load_milestone_versions(conn, project_id, week_ending_date):
+    """Return {milestone_id: (actual_progress, row_version)} for the project's updates in a week."""
+    rows = conn.execute(text("""
+        SELECT mu.milestone_id, mu.actual_progress, mu.row_version
+        FROM Milestone_Updates mu
+        JOIN Milestones m ON mu.milestone_id = m.milestone_id
+        WHERE m.project_id = :pid AND mu.week_ending_date = :week
+    """), {'pid': project_id, 'week': str(week_ending_date)}).fetchall()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+def save_milestone_updates(conn, week_ending_date, progress_by_milestone, versions):
+    """Compare-and-swap milestone progress against the row versions read with the form.
+
+    Only milestones whose value changed (or that have no row yet) are written. Returns the
+    ids of milestones another user changed in the meantime; nothing is committed if any.
+    """
+    conflicts = []
+    try:
+        for m_id, actual_progress in progress_by_milestone.items():
+            seen = versions.get(m_id)
+            params = {'mid': m_id, 'week': str(week_ending_date), 'progress': actual_progress}
+            if seen is None:
+                try:
+                    result = conn.execute(text("""
+                        INSERT INTO Milestone_Updates (milestone_id, week_ending_date, actual_progress)
+                        SELECT :mid, :week, :progress
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM Milestone_Updates WHERE milestone_id = :mid AND week_ending_date = :week
+                        )
+                    """), params)
+                except IntegrityError:
+                    # A concurrent insert won the race on the unique index
+                    conflicts.append(m_id)
+                    continue
+            elif seen[0] == actual_progress:
+                continue
+            else:
+                result = conn.execute(text("""
+                    UPDATE Milestone_Updates
+                    SET actual_progress = :progress
+                    WHERE milestone_id = :mid AND week_ending_date = :week AND row_version = :version
+                """), params | {'version': seen[1]})
+            if result.rowcount == 0:
+                conflicts.append(m_id)
+        if conflicts:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return conflicts
+
 # Initialize session state
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
@@ -373,12 +998,13 @@ if not st.session_state.authenticated:
         with st.form("add_user_form"):
             new_username = st.text_input("New Username")
             new_password = st.text_input("New Password", type="password")
+            operator = st.text_input("Your Name", help="Recorded in the audit log as the admin who added the user")
             auth_code = st.text_input("Authentication Code", type="password")
             add_user_button = st.form_submit_button("Add User")
             
             if add_user_button:
-                if not new_username or not new_password or not auth_code:
-                    st.error("Please enter all fields including the Authentication Code")
+                if not new_username or not new_password or not operator.strip() or not auth_code:
+                    st.error("Please enter all fields including your name and the Authentication Code")
                 elif auth_code != "SECURE123":
                     st.error("Invalid Authentication Code")
                 else:
@@ -389,6 +1015,7 @@ if not st.session_state.authenticated:
                             {'username': new_username, 'password_hash': password_hash}
                         )
                         conn.commit()
+                        audit("insert", "qeUsers", new_username, after={'authorized_with': "auth code"}, username=operator.strip())
                         st.success(f"User {new_username} added successfully")
                     except Exception as e:
                         st.error(f"Failed to add user: {e}")
@@ -396,17 +1023,21 @@ if not st.session_state.authenticated:
     # Admin option to fix qeProjects table
     with st.expander("Admin: Fix qeProjects Table"):
         with st.form("fix_projects_form"):
+            operator = st.text_input("Your Name", help="Recorded in the audit log as the admin who recreated the tables")
             auth_code = st.text_input("Authentication Code", type="password")
             fix_button = st.form_submit_button("Fix qeProjects Table")
             
             if fix_button:
-                if not auth_code:
-                    st.error("Please enter the Authentication Code")
+                if not operator.strip() or not auth_code:
+                    st.error("Please enter your name and the Authentication Code")
                 elif auth_code != "SECURE123":
                     st.error("Invalid Authentication Code")
                 else:
                     try:
                         # Drop dependent tables first due to foreign key constraints
+                        conn.execute(text("DROP TABLE IF EXISTS qeMetric_Anomalies"))
+                        conn.execute(text("DROP TABLE IF EXISTS qeWeekly_Updates_Archive"))
+                        conn.execute(text("DROP TABLE IF EXISTS Milestone_Updates_Archive"))
                         conn.execute(text("DROP TABLE IF EXISTS qeWeekly_Updates"))
                         conn.execute(text("DROP TABLE IF EXISTS Milestones"))
                         conn.execute(text("DROP TABLE IF EXISTS Milestone_Updates"))
@@ -479,7 +1110,14 @@ if not st.session_state.authenticated:
                                 CONSTRAINT CHK_ActualProgress CHECK (actual_progress >= 0 AND actual_progress <= 1)
                             )
                         """))
+                        upgrade_schema(conn)
                         conn.commit()
+                        apply_schema_upgrades.clear()
+                        audit("recreate", "qeProjects", after={'authorized_with': "auth code", 'dropped_tables': [
+                            'qeMetric_Anomalies', 'qeWeekly_Updates_Archive', 'Milestone_Updates_Archive',
+                            'qeWeekly_Updates', 'Milestones', 'Milestone_Updates', 'qeProjects'
+                        ]}, username=operator.strip())
+                        ensure_fulltext_indexes(engine)
                         st.success("qeProjects table and dependent tables recreated successfully.")
                     except Exception as e:
                         st.error(f"Failed to recreate qeProjects table: {e}")
@@ -505,11 +1143,145 @@ else:
         "Add Milestone", 
         "Submit Milestone Update", 
         "View Reports", 
-        "View Milestone Updates"
+        "Roll-up Reports",
+        "View Milestone Updates",
+        "Milestone Burn-up",
+        "Portfolio Dashboard",
+        "Portfolio Analytics",
+        "Search Updates",
+        "Bulk Import Updates",
+        "Project Lifecycle",
+        "Audit Log"
     ])
 
+    # Uncached report and search queries read from the replica; submits, edits and the shared
+    # report caches use the primary
+    read_conn, read_engine = init_read_db(conn)
+    with st.sidebar.expander("Performance"):
+        if read_engine is None:
+            st.write("Report reads: primary")
+        else:
+            st.write(f"Report reads: replica ({read_engine.url.host})")
+            lag = load_replica_lag(engine)
+            st.metric("Replication Lag", "n/a" if lag is None else f"{lag:.0f} s")
+
+    # Milestone Burn-up
+    if option == "Milestone Burn-up":
+        st.header("Milestone Burn-up")
+        project_id, project_name = select_project(read_conn, "burnup_project") or (None, None)
+        if project_id is None:
+            st.error("No projects found. Adjust the search or add a project first.")
+        else:
+            try:
+                milestones, history = load_milestone_history(conn, project_id)
+                if milestones.empty:
+                    st.warning("No milestones found for this project.")
+                elif history.empty:
+                    st.warning("No milestone updates have been submitted for this project yet.")
+                else:
+                    actual, expected = milestone_burnup(milestones, history)
+                    labels = {
+                        m_id: m['milestone_name'] if pd.isna(m['parent_milestone_id']) else f"  - {m['milestone_name']}"
+                        for m_id, m in milestones.iterrows()
+                    }
+                    scope = st.selectbox(
+                        "Milestone", [None] + list(milestones.index),
+                        format_func=lambda m_id: "Whole Project (weighted)" if m_id is None else labels[m_id]
+                    )
+                    if scope is None:
+                        chart = pd.DataFrame({
+                            'Actual Progress %': weighted_project_progress(actual, milestones) * 100,
+                            'Expected Progress %': weighted_project_progress(expected, milestones) * 100
+                        })
+                    else:
+                        chart = pd.DataFrame({
+                            'Actual Progress %': actual[scope] * 100,
+                            'Expected Progress %': expected[scope] * 100
+                        })
+                    st.line_chart(chart)
+
+                    st.subheader("Weekly Actual Progress %")
+                    st.dataframe(
+                        (actual * 100).round(2).rename(columns=labels).rename(index=lambda d: d.strftime('%Y-%m-%d')),
+                        use_container_width=True
+                    )
+            except Exception as e:
+                st.error(f"Error loading milestone history: {e}")
+
+    # Portfolio Dashboard
+    elif option == "Portfolio Dashboard":
+        st.header("Portfolio KPI Dashboard")
+        lookback = st.selectbox("Period", ["Last 12 Weeks", "Last 26 Weeks", "Last 52 Weeks", "All Time"])
+        weeks = {"Last 12 Weeks": 12, "Last 26 Weeks": 26, "Last 52 Weeks": 52}.get(lookback)
+        since = (datetime.now() - pd.Timedelta(weeks=weeks)).date() if weeks else None
+
+        try:
+            kpis = load_portfolio_kpis(conn, since)
+            if kpis.empty:
+                st.warning("No weekly updates found for the selected period.")
+            else:
+                trends = portfolio_kpi_trends(kpis)
+                latest = trends.iloc[-1]
+                st.markdown(f"**Latest Week**: {kpis.index[-1].strftime('%Y-%m-%d')} ({int(kpis['projects'].iloc[-1])} projects reporting)")
+                cols = st.columns(4)
+                for col, metric in zip(cols, trends.columns):
+                    col.metric(metric, "N/A" if pd.isna(latest[metric]) else f"{latest[metric]:.1f}%")
+
+                st.subheader("RAG Distribution")
+                st.bar_chart(kpis[['green', 'amber', 'red']].rename(columns=str.upper), color=["#28a745", "#ffc107", "#dc3545"])
+
+                st.subheader("Test Execution & Automation")
+                st.line_chart(trends[['Test Execution Rate %', 'First-Pass Rate %', 'Automation Coverage %']])
+
+                st.subheader("Defect Leakage")
+                st.line_chart(trends[['Defect Leakage %']])
+                st.bar_chart(kpis[['defects_raised_internal', 'sit_defects', 'uat_defects']].rename(columns={
+                    'defects_raised_internal': 'Internal', 'sit_defects': 'SIT', 'uat_defects': 'UAT'
+                }))
+        except Exception as e:
+            st.error(f"Error loading portfolio KPIs: {e}")
+
+    # Portfolio Analytics
+    elif option == "Portfolio Analytics":
+        st.header("Portfolio Analytics")
+        st.caption(f"Queries run in DuckDB over the local Parquet copy in `{analytics_dir()}`, not against the database.")
+        # The change feed reads up to MIN_ACTIVE_ROWVERSION, which only the primary reports reliably
+        if st.button("Refresh Analytics Store"):
+            try:
+                with st.spinner("Pulling changed rows..."):
+                    counts, rebuilt = refresh_analytics_store(conn)
+                st.success("Analytics store refreshed: " + ", ".join(f"{table} {count}" for table, count in counts.items())
+                           + (f". Rebuilt after deletes: {', '.join(rebuilt)}" if rebuilt else ""))
+            except Exception as e:
+                st.error(f"Error refreshing analytics store: {e}")
+
+        view_name = st.selectbox("Saved View", list(SAVED_ANALYTICS) + ["Custom SQL"])
+        if view_name == "Custom SQL":
+            sql = st.text_area("SQL", value="SELECT * FROM weekly_updates LIMIT 100", height=150,
+                               help="Tables: projects, weekly_updates, milestones, milestone_updates. "
+                                    "Queries run in a sandbox without file or network access.")
+        else:
+            sql = SAVED_ANALYTICS[view_name]
+            with st.expander("SQL"):
+                st.code(sql.strip(), language="sql")
+
+        try:
+            result = run_analytics_query(sql)
+            if result.empty:
+                st.warning("No rows. Refresh the analytics store if it has not been loaded yet.")
+            else:
+                st.dataframe(result, hide_index=True, use_container_width=True)
+                st.download_button(
+                    label="📄 Download CSV",
+                    data=result.to_csv(index=False).encode('utf-8'),
+                    file_name=f"{re.sub(r'[^A-Za-z0-9]+', '_', view_name).strip('_').lower()}.csv",
+                    mime="text/csv"
+                )
+        except Exception as e:
+            st.error(f"Error running analytics query: {e}")
+
     # Add Project
-    if option == "Add Project":
+    elif option == "Add Project":
         st.header("Add New Project")
         with st.form("project_form"):
             project_name = st.text_input("Project Name")
@@ -543,6 +1315,10 @@ else:
                         else:
                             project_id = row[0]
                             conn.commit()
+                            audit("insert", "qeProjects", project_id, after={
+                                'project_name': project_name.strip(), 'client': client.strip(), 'project_spoc': project_spoc.strip(),
+                                'technology_used': technology_used.strip(), 'artifacts_link': artifacts_link.strip()
+                            })
                             st.success(f"Project added successfully with project_id: {project_id}")
                     except Exception as e:
                         st.error(f"Failed to add project: {e}")
@@ -552,63 +1328,85 @@ else:
     # Submit Weekly Update
     elif option == "Submit Weekly Update":
         st.header("Weekly QE Update")
-        projects = conn.execute(text("SELECT project_id, project_name FROM qeProjects")).fetchall()
-        project_dict = {row.project_name: row.project_id for row in projects}
+        selected_project = select_project(conn, "weekly_update_project")
 
-        if not project_dict:
-            st.error("No projects found in the database. Please add a project first using the 'Add Project' section.")
+        if selected_project is None:
+            st.error("No projects found. Adjust the search or add a project first using the 'Add Project' section.")
         else:
+            project_id, project_name = selected_project
+            # Carry forward status, team, cumulative counts and release date from the last update;
+            # the week's narrative and effort fields start empty
+            previous = load_weekly_prefill(conn, project_id)
+            if previous:
+                st.caption(f"Prefilled from the update for week ending {previous['week_ending_date']}.")
+            statuses = ["GREEN", "AMBER", "RED"]
             with st.form("update_form"):
-                project_name = st.selectbox("Select Project", list(project_dict.keys()))
                 week_ending_date = st.date_input("Week Ending Date")
 
                 st.subheader("QE Status & Progress")
-                qe_overall_status = st.selectbox("QE Overall Status", ["GREEN", "AMBER", "RED"])
-                qe_progress_percentage = st.number_input("QE Progress Percentage", min_value=0, max_value=100, step=1)
+                qe_overall_status = st.selectbox(
+                    "QE Overall Status", statuses,
+                    index=statuses.index(previous['qe_overall_status']) if previous.get('qe_overall_status') in statuses else 0
+                )
+                qe_progress_percentage = st.number_input("QE Progress Percentage", min_value=0, max_value=100, step=1, value=previous.get('qe_progress_percentage') or 0)
                 current_week_progress_entry = st.text_area("Current Week Entry on Overall Progress")
-                next_release_date = st.date_input("Next Release Date")
+                next_release_date = st.date_input("Next Release Date", value=previous.get('next_release_date') or datetime.now().date())
 
                 st.subheader("QE Team & Resources")
-                qe_team_size = st.number_input("QE Team Size", min_value=0, step=1)
+                qe_team_size = st.number_input("QE Team Size", min_value=0, step=1, value=previous.get('qe_team_size') or 0)
                 qe_current_week_task = st.text_area("QE Current Week Task")
-                qe_automation_tools_used = st.text_area("QE Automation Tools Used")
+                qe_automation_tools_used = st.text_area("QE Automation Tools Used", value=previous.get('qe_automation_tools_used') or "")
 
                 st.subheader("Test Case Metrics")
-                tc_created = st.number_input("#TC Created", min_value=0, step=1)
-                tc_executed = st.number_input("#TC Executed", min_value=0, step=1)
-                tc_passed_first_round = st.number_input("#TC Passed in First Round of Validation", min_value=0, step=1)
+                tc_created = st.number_input("#TC Created", min_value=0, step=1, value=previous.get('tc_created') or 0)
+                tc_executed = st.number_input("#TC Executed", min_value=0, step=1, value=previous.get('tc_executed') or 0)
+                tc_passed_first_round = st.number_input("#TC Passed in First Round of Validation", min_value=0, step=1, value=previous.get('tc_passed_first_round') or 0)
                 effort_tc_execution = st.number_input("Effort Spent on TC Execution (hours)", min_value=0.0, format="%.2f")
-                tc_automated = st.number_input("#TC Automated", min_value=0, step=1)
+                tc_automated = st.number_input("#TC Automated", min_value=0, step=1, value=previous.get('tc_automated') or 0)
                 effort_tc_automation = st.number_input("Efforts Spent on TC Automation (hours)", min_value=0.0, format="%.2f")
 
                 st.subheader("Defects & Quality Metrics")
-                defects_raised_internal = st.number_input("Defects Raised (Internal)", min_value=0, step=1)
-                sit_defects = st.number_input("#SIT Defects", min_value=0, step=1)
-                uat_defects = st.number_input("#UAT Defects", min_value=0, step=1)
-                reopened_defects = st.number_input("#Reopened Defects", min_value=0, step=1)
+                defects_raised_internal = st.number_input("Defects Raised (Internal)", min_value=0, step=1, value=previous.get('defects_raised_internal') or 0)
+                sit_defects = st.number_input("#SIT Defects", min_value=0, step=1, value=previous.get('sit_defects') or 0)
+                uat_defects = st.number_input("#UAT Defects", min_value=0, step=1, value=previous.get('uat_defects') or 0)
+                reopened_defects = st.number_input("#Reopened Defects", min_value=0, step=1, value=previous.get('reopened_defects') or 0)
 
                 submit_update = st.form_submit_button("Submit Update")
                 if submit_update:
                     try:
-                        project_id = project_dict[project_name]
-                        insert_update = text("""
-                            INSERT INTO qeWeekly_Updates (
-                                project_id, week_ending_date, qe_overall_status, qe_progress_percentage,
-                                current_week_progress_entry, next_release_date, qe_team_size,
-                                qe_current_week_task, qe_automation_tools_used, tc_created,
-                                tc_executed, tc_passed_first_round, effort_tc_execution,
-                                tc_automated, effort_tc_automation, defects_raised_internal,
-                                sit_defects, uat_defects, reopened_defects
-                            )
-                            OUTPUT INSERTED.update_id
-                            VALUES (
-                                :pid, :week, :status, :progress, :entry, :release, :size,
-                                :task, :tools, :tc_created, :tc_executed, :tc_passed,
-                                :effort_exec, :tc_auto, :effort_auto, :def_internal,
-                                :sit, :uat, :reopened
-                            )
+                        # DELETED.* holds the overwritten values on a resubmit, for the audit log
+                        upsert_update = text(f"""
+                            MERGE qeWeekly_Updates WITH (HOLDLOCK) AS target
+                            USING (SELECT :pid AS project_id, CAST(:week AS DATE) AS week_ending_date) AS source
+                            ON target.project_id = source.project_id AND target.week_ending_date = source.week_ending_date
+                            WHEN MATCHED THEN
+                                UPDATE SET
+                                    qe_overall_status = :status, qe_progress_percentage = :progress,
+                                    current_week_progress_entry = :entry, next_release_date = :release,
+                                    qe_team_size = :size, qe_current_week_task = :task,
+                                    qe_automation_tools_used = :tools, tc_created = :tc_created,
+                                    tc_executed = :tc_executed, tc_passed_first_round = :tc_passed,
+                                    effort_tc_execution = :effort_exec, tc_automated = :tc_auto,
+                                    effort_tc_automation = :effort_auto, defects_raised_internal = :def_internal,
+                                    sit_defects = :sit, uat_defects = :uat, reopened_defects = :reopened
+                            WHEN NOT MATCHED THEN
+                                INSERT (
+                                    project_id, week_ending_date, qe_overall_status, qe_progress_percentage,
+                                    current_week_progress_entry, next_release_date, qe_team_size,
+                                    qe_current_week_task, qe_automation_tools_used, tc_created,
+                                    tc_executed, tc_passed_first_round, effort_tc_execution,
+                                    tc_automated, effort_tc_automation, defects_raised_internal,
+                                    sit_defects, uat_defects, reopened_defects
+                                )
+                                VALUES (
+                                    source.project_id, source.week_ending_date, :status, :progress, :entry, :release, :size,
+                                    :task, :tools, :tc_created, :tc_executed, :tc_passed,
+                                    :effort_exec, :tc_auto, :effort_auto, :def_internal,
+                                    :sit, :uat, :reopened
+                                )
+                            OUTPUT $action, {', '.join(f'DELETED.{col}' for col in WEEKLY_UPDATE_COLUMNS)};
                         """)
-                        result = conn.execute(insert_update, {
+                        result = conn.execute(upsert_update, {
                             'pid': project_id,
                             'week': str(week_ending_date),
                             'status': qe_overall_status,
@@ -629,9 +1427,40 @@ else:
                             'uat': uat_defects,
                             'reopened': reopened_defects
                         })
-                        update_id = result.fetchone()[0]
+                        row = result.fetchone()
+                        action = row[0]
                         conn.commit()
-                        st.success("Weekly update submitted successfully!")
+                        audit(
+                            action.lower(), "qeWeekly_Updates", f"{project_id}/{week_ending_date}",
+                            before=dict(zip(WEEKLY_UPDATE_COLUMNS, row[1:])) if action == 'UPDATE' else None,
+                            after={
+                                'qe_overall_status': qe_overall_status, 'next_release_date': next_release_date,
+                                'current_week_progress_entry': current_week_progress_entry,
+                                'qe_current_week_task': qe_current_week_task,
+                                'qe_automation_tools_used': qe_automation_tools_used,
+                                'qe_progress_percentage': qe_progress_percentage, 'qe_team_size': qe_team_size,
+                                'tc_created': tc_created, 'tc_executed': tc_executed,
+                                'tc_passed_first_round': tc_passed_first_round, 'tc_automated': tc_automated,
+                                'defects_raised_internal': defects_raised_internal, 'sit_defects': sit_defects,
+                                'uat_defects': uat_defects, 'reopened_defects': reopened_defects,
+                                'effort_tc_execution': effort_tc_execution, 'effort_tc_automation': effort_tc_automation
+                            }
+                        )
+                        invalidate_report_caches()
+                        try:
+                            flags = scan_anomalies(conn, project_id)
+                            week_flags = flags[pd.to_datetime(flags['week_ending_date']).dt.date == week_ending_date]
+                            if not week_flags.empty:
+                                st.warning(
+                                    "These values look unusual compared with recent weeks. Please double-check them:\n"
+                                    + "\n".join(f"- {describe_anomaly(flag)}" for flag in week_flags.itertuples())
+                                )
+                        except Exception as e:
+                            st.warning(f"Anomaly check skipped: {e}")
+                        if action == 'UPDATE':
+                            st.success("Weekly update for this week already existed and has been overwritten.")
+                        else:
+                            st.success("Weekly update submitted successfully!")
                     except Exception as e:
                         st.error(f"Failed to submit weekly update: {e}")
                         raise
@@ -639,14 +1468,12 @@ else:
     # Add Milestone
     elif option == "Add Milestone":
         st.header("Add New Milestone")
-        projects = conn.execute(text("SELECT project_id, project_name FROM qeProjects")).fetchall()
-        project_dict = {row.project_name: row.project_id for row in projects}
-        if not project_dict:
-            st.error("No projects found. Please add a project first.")
+        selected_project = select_project(conn, "milestone_project")
+        if selected_project is None:
+            st.error("No projects found. Adjust the search or add a project first.")
         else:
+            project_id, project_name = selected_project
             with st.form("milestone_form"):
-                project_name = st.selectbox("Select Project", list(project_dict.keys()))
-                project_id = project_dict[project_name]
                 milestone_name = st.text_input("Milestone Name")
                 parent_milestones = conn.execute(text("SELECT milestone_id, milestone_name FROM Milestones WHERE project_id = :pid AND parent_milestone_id IS NULL"), {'pid': project_id}).fetchall()
                 parent_dict = {"None": None} | {row.milestone_name: row.milestone_id for row in parent_milestones}
@@ -683,6 +1510,13 @@ else:
                             })
                             milestone_id = result.fetchone()[0]
                             conn.commit()
+                            audit("insert", "Milestones", milestone_id, after={
+                                'project_id': project_id, 'parent_milestone_id': parent_id, 'milestone_name': milestone_name.strip(),
+                                'planned_start_date': planned_start_date, 'planned_end_date': planned_end_date,
+                                'total_days': total_days, 'weightage': weightage / 100, 'notes': notes
+                            })
+                            invalidate_report_caches()
+                            st.session_state.pop(f"milestone_frame_{project_id}", None)
                             st.success(f"Milestone added successfully with milestone_id: {milestone_id}")
                         except Exception as e:
                             st.error(f"Failed to add milestone: {e}")
@@ -690,131 +1524,85 @@ else:
     # Submit Milestone Update
     elif option == "Submit Milestone Update":
         st.header("Submit Milestone Weekly Update")
-        projects = conn.execute(text("SELECT project_id, project_name FROM qeProjects")).fetchall()
-        project_dict = {row.project_name: row.project_id for row in projects}
-        if not project_dict:
-            st.error("No projects found. Please add a project first.")
+        selected_project = select_project(conn, "milestone_update_project")
+        if selected_project is None:
+            st.error("No projects found. Adjust the search or add a project first.")
         else:
-            with st.form("milestone_update_form"):
-                project_name = st.selectbox("Select Project", list(project_dict.keys()))
-                week_ending_date = st.date_input("Week Ending Date")
-                project_id = project_dict[project_name]
-                milestones = conn.execute(
-                    text("""
-                        SELECT milestone_id, milestone_name, parent_milestone_id, planned_start_date, planned_end_date, total_days
-                        FROM Milestones 
-                        WHERE project_id = :pid 
-                        ORDER BY parent_milestone_id, milestone_id
-                    """), 
-                    {'pid': project_id}
-                ).fetchall()
-                
-                if not milestones:
-                    st.error("No milestones found for this project. Please add milestones first.")
-                else:
-                    # Prepare a table to display milestones and their calculated fields
-                    st.subheader("Milestone Progress Updates")
-                    progress_data = []
-                    for m in milestones:
-                        m_id, m_name, parent_id, start_str, end_str, total_days = m
-                        label = m_name if parent_id is None else f"  - {m_name}"
-                        actual_progress = st.number_input(
-                            f"Actual Progress % for {label}", 
-                            min_value=0.0, 
-                            max_value=100.0, 
-                            format="%.2f", 
-                            value=0.0, 
-                            key=f"progress_{m_id}"
-                        )
-                        actual_progress = actual_progress / 100  # Convert to fraction for calculations
-                        
-                        # Calculate derived fields
-                        start = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else None
-                        end = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else None
-                        reference_date = week_ending_date
-                        
-                        # Current Status
-                        current_status = (
-                            "✅Completed" if actual_progress == 1 
-                            else "⏳ Pending" if actual_progress == 0 
-                            else "🕒 In Progress"
-                        )
-                        
-                        # Expected Progress
-                        expected_progress = 0
-                        if start and end and total_days:
-                            if reference_date <= start:
-                                expected_progress = 0
-                            elif reference_date > end:
-                                expected_progress = 1
-                            else:
-                                days_passed = (reference_date - start).days
-                                expected_progress = days_passed / total_days
-                                
-                        # Progress Status (RAG)
-                        rag = (
-                            "" if not start or start > reference_date 
-                            else "🚩 Critical" if actual_progress < expected_progress - 0.2 
-                            else "⚠️ At Risk" if actual_progress < expected_progress - 0.05 
-                            else "✅ On Track"
+            project_id, project_name = selected_project
+            week_ending_date = st.date_input("Week Ending Date")
+
+            # Milestones are loaded once per project; edits below only rerun their own group
+            frame_key = f"milestone_frame_{project_id}"
+            if frame_key not in st.session_state:
+                st.session_state[frame_key] = load_milestone_frame(conn, project_id)
+            milestones = st.session_state[frame_key]
+
+            if not milestones:
+                st.error("No milestones found for this project. Please add milestones first.")
+            else:
+                # Remember the row versions as of when the form was first shown for this week
+                versions_key = f"milestone_versions_{project_id}_{week_ending_date}"
+                if versions_key not in st.session_state:
+                    st.session_state[versions_key] = load_milestone_versions(conn, project_id, week_ending_date)
+
+                # Start from this week's saved values, else each milestone's latest update
+                prefill = load_milestone_prefill(conn, project_id) | {
+                    m_id: progress for m_id, (progress, _) in st.session_state[versions_key].items()
+                }
+
+                st.subheader("Milestone Progress Updates")
+                for parent, children in group_milestones(milestones):
+                    with st.container(border=True):
+                        milestone_group_editor(parent, children, week_ending_date, prefill)
+
+                submit_m_update = st.button("Submit Milestone Update", type="primary")
+                if submit_m_update:
+                    try:
+                        progress_by_milestone = {
+                            m.milestone_id: st.session_state[f"progress_{m.milestone_id}"] / 100 for m in milestones
+                        }
+                        conflicts = save_milestone_updates(
+                            conn, week_ending_date, progress_by_milestone, st.session_state[versions_key]
                         )
-                        
-                        progress_data.append({
-                            'milestone_id': m_id,
-                            'Milestone': label,
-                            'Actual Progress %': f"{actual_progress*100:.2f}%",
-                            'Current Status': current_status,
-                            'Expected Progress %': f"{expected_progress*100:.2f}%",
-                            'Progress Status (RAG)': rag
-                        })
-                    
-                    # Display calculated fields in a table
-                    if progress_data:
-                        st.table(pd.DataFrame(progress_data))
-                    
-                    submit_m_update = st.form_submit_button("Submit Milestone Update")
-                    if submit_m_update:
-                        try:
-                            for m_id, m_name, parent_id, start_str, end_str, total_days in milestones:
-                                actual_progress = st.session_state[f"progress_{m_id}"] / 100
-                                # Check if update already exists for this week
-                                existing = conn.execute(
-                                    text("SELECT 1 FROM Milestone_Updates WHERE milestone_id = :mid AND week_ending_date = :week"),
-                                    {'mid': m_id, 'week': str(week_ending_date)}
-                                ).fetchone()
-                                if existing:
-                                    conn.execute(
-                                        text("""
-                                            UPDATE Milestone_Updates 
-                                            SET actual_progress = :progress
-                                            WHERE milestone_id = :mid AND week_ending_date = :week
-                                        """),
-                                        {'progress': actual_progress, 'mid': m_id, 'week': str(week_ending_date)}
-                                    )
-                                else:
-                                    conn.execute(
-                                        text("""
-                                            INSERT INTO Milestone_Updates (milestone_id, week_ending_date, actual_progress)
-                                            VALUES (:mid, :week, :progress)
-                                        """),
-                                        {'mid': m_id, 'week': str(week_ending_date), 'progress': actual_progress}
-                                    )
-                            conn.commit()
+                        if conflicts:
+                            current = load_milestone_versions(conn, project_id, week_ending_date)
+                            names = {m.milestone_id: m.milestone_name for m in milestones}
+                            st.error(
+                                "Another user updated these milestones after you opened the form. "
+                                "No changes were saved. Review their values and submit again to overwrite."
+                            )
+                            st.table(pd.DataFrame([
+                                {
+                                    'Milestone': names[m_id],
+                                    'Your Progress %': f"{progress_by_milestone[m_id]*100:.2f}%",
+                                    'Current Progress %': f"{current[m_id][0]*100:.2f}%" if m_id in current else "",
+                                } for m_id in conflicts
+                            ]))
+                            # Resubmitting now compares against the values just shown
+                            st.session_state[versions_key] = current
+                        else:
+                            saved = st.session_state.pop(versions_key)
+                            for m_id, actual_progress in progress_by_milestone.items():
+                                if m_id not in saved:
+                                    audit("insert", "Milestone_Updates", f"{m_id}/{week_ending_date}",
+                                          after={'actual_progress': actual_progress})
+                                elif saved[m_id][0] != actual_progress:
+                                    audit("update", "Milestone_Updates", f"{m_id}/{week_ending_date}",
+                                          before={'actual_progress': saved[m_id][0]}, after={'actual_progress': actual_progress})
+                            invalidate_report_caches()
                             st.success("Milestone updates submitted successfully!")
-                        except Exception as e:
-                            st.error(f"Failed to submit milestone updates: {e}")
-                            raise
+                    except Exception as e:
+                        st.error(f"Failed to submit milestone updates: {e}")
+                        raise
 
     # View Reports
     elif option == "View Reports":
         st.header("QE Report Generator")
+        report_project_id, project_name = select_project(read_conn, "report_project", "Select Project (Optional)", include_all=True)
 
         with st.form("report_form"):
             report_type = st.selectbox("Report Type", ["Weekly Summary", "Project History"])
             week_ending_date = st.date_input("Select Week Ending Date")
-            projects = conn.execute(text("SELECT project_id, project_name FROM qeProjects")).fetchall()
-            project_dict = {row.project_name: row.project_id for row in projects}
-            project_name = st.selectbox("Select Project (Optional)", ["All"] + list(project_dict.keys()))
             col1, col2 = st.columns(2)
             with col1:
                 preview_report = st.form_submit_button("Preview Report")
@@ -822,278 +1610,98 @@ else:
                 download_report = st.form_submit_button("Download PDF Report")
 
         if preview_report or download_report:
-            base_query = """
-                SELECT p.project_name, p.client, p.project_spoc, p.technology_used, p.artifacts_link,
-                       w.qe_overall_status, w.qe_progress_percentage, w.current_week_progress_entry, w.next_release_date,
-                       w.qe_team_size, w.qe_current_week_task, w.qe_automation_tools_used,
-                       w.tc_created, w.tc_executed, w.tc_passed_first_round, w.effort_tc_execution,
-                       w.tc_automated, w.effort_tc_automation,
-                       w.defects_raised_internal, w.sit_defects, w.uat_defects, w.reopened_defects
-                FROM qeWeekly_Updates w
-                JOIN qeProjects p ON w.project_id = p.project_id
-                WHERE CAST(w.week_ending_date AS DATE) = :week
-            """
-            params = {'week': str(week_ending_date)}
-            if project_name != "All":
-                base_query += " AND p.project_name = :project_name"
-                params['project_name'] = project_name
-
             try:
-                result = conn.execute(text(base_query), params)
-                data = result.fetchall()
-
-                if data:
-                    project_data = {}
-                    for row in data:
-                        pname = row[0]
-                        if pname not in project_data:
-                            project_data[pname] = {
-                                'client': row[1],
-                                'project_spoc': row[2],
-                                'technology_used': row[3],
-                                'artifacts_link': row[4],
-                                'qe_overall_status': row[5],
-                                'qe_progress_percentage': row[6],
-                                'current_week_progress_entry': row[7],
-                                'next_release_date': row[8],
-                                'qe_team_size': row[9],
-                                'qe_current_week_task': row[10],
-                                'qe_automation_tools_used': row[11],
-                                'tc_created': row[12],
-                                'tc_executed': row[13],
-                                'tc_passed_first_round': row[14],
-                                'effort_tc_execution': row[15],
-                                'tc_automated': row[16],
-                                'effort_tc_automation': row[17],
-                                'defects_raised_internal': row[18],
-                                'sit_defects': row[19],
-                                'uat_defects': row[20],
-                                'reopened_defects': row[21]
-                            }
+                # Updates, anomaly flags and forecasts load concurrently; each project's milestones
+                # stream in behind them so the preview can draw projects as they arrive
+                extras, sections = stream_weekly_report(
+                    read_engine or engine, week_ending_date, report_project_id,
+                    extra_queries={
+                        'anomalies': lambda c: load_week_anomalies(c, week_ending_date),
+                        'forecasts': lambda c: load_milestone_forecasts(engine, week_ending_date)
+                    }
+                )
+                anomalies, forecasts = extras['anomalies'], extras['forecasts']
 
-                    # Fetch milestone data for each project
-                    milestone_data = {}
-                    for pname, details in project_data.items():
-                        pid = project_dict[pname]
-                        milestone_query = """
-                            SELECT m.milestone_id, m.milestone_name, m.parent_milestone_id, m.planned_start_date, m.planned_end_date, m.total_days, m.weightage, m.notes,
-                                   mu.actual_progress
-                            FROM Milestones m
-                            LEFT JOIN Milestone_Updates mu ON m.milestone_id = mu.milestone_id AND CAST(mu.week_ending_date AS DATE) = :week
-                            WHERE m.project_id = :pid
-                        """
-                        milestone_params = {'week': str(week_ending_date), 'pid': pid}
-                        milestone_result = conn.execute(text(milestone_query), milestone_params)
-                        milestones = milestone_result.fetchall()
-                        milestone_list = []
-                        for m in milestones:
-                            m_id, m_name, parent_id, start_str, end_str, total_days, weightage, notes, actual_progress = m
-                            actual_progress = actual_progress or 0.0
-                            start = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else None
-                            end = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else None
-                            reference_date = week_ending_date
-                            current_status = "✅Completed" if actual_progress == 1 else "⏳ Pending" if actual_progress == 0 else "🕒 In Progress"
-                            expected_progress = 0
-                            if start and end and total_days:
-                                if reference_date <= start:
-                                    expected_progress = 0
-                                elif reference_date > end:
-                                    expected_progress = 1
-                                else:
-                                    days_passed = (reference_date - start).days
-                                    expected_progress = days_passed / total_days
-                            rag = "" if not start or start > reference_date else "🚩 Critical" if actual_progress < expected_progress - 0.2 else "⚠️ At Risk" if actual_progress < expected_progress - 0.05 else "✅ On Track"
-                            milestone_list.append({
-                                'milestone_id': m_id,
-                                'name': m_name,
-                                'parent_id': parent_id,
-                                'planned_start': start_str,
-                                'planned_end': end_str,
-                                'total_days': total_days,
-                                'weightage': weightage,
-                                'current_status': current_status,
-                                'actual_progress': actual_progress * 100,
-                                'expected_progress': expected_progress * 100,
-                                'rag': rag,
-                                'notes': notes
-                            })
-                        milestone_data[pname] = milestone_list
-
-                    # Generate HTML for PDF
-                    html = f"""
-                    <!DOCTYPE html>
-                    <html>
-                    <head>
-                        <style>
-                            body {{ font-family: Arial, sans-serif; margin: 20px; line-height: 1.5; }}
-                            h2 {{ color: #003366; margin-bottom: 10px; }}
-                            h4 {{ color: #004080; margin-top: 15px; margin-bottom: 8px; }}
-                            p {{ margin: 5px 0; }}
-                            ul {{ margin: 5px 0; padding-left: 25px; }}
-                            li {{ margin-bottom: 5px; }}
-                            .project-container {{ margin-bottom: 30px; page-break-inside: avoid; }}
-                            .header {{ text-align: center; margin-bottom: 20px; }}
-                            .status-green {{ color: green; }}
-                            .status-amber {{ color: orange; }}
-                            .status-red {{ color: red; }}
-                            table {{ width: 100%; border-collapse: collapse; margin-top: 10px; }}
-                            th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                            th {{ background-color: #f2f2f2; }}
-                            .sub-milestone {{ padding-left: 20px; }}
-                        </style>
-                    </head>
-                    <body>
-                        <div class="header">
-                            <h2>Weekly QE Status Report</h2>
-                            <p>Week Ending: {week_ending_date.strftime('%Y-%m-%d')}</p>
-                        </div>
-                    """
-                    for idx, (pname, details) in enumerate(project_data.items()):
-                        status_class = details['qe_overall_status'].lower()
-                        html += f"""
-                        <div class="project-container" style="{'page-break-before: always;' if idx > 0 else ''}">
-                            <h2>{pname}</h2>
-                            <p><strong>Client:</strong> {details['client']}</p>
-                            <p><strong>Project SPOC:</strong> {details['project_spoc']}</p>
-                            <p><strong>Technology Used:</strong> {details['technology_used']}</p>
-                            <p><strong>Artifacts Link:</strong> <a href="{details['artifacts_link']}">{details['artifacts_link']}</a></p>
-
-                            <h4>QE Status & Progress</h4>
-                            <p><strong>Overall Status:</strong> <span class="status-{status_class}">{details['qe_overall_status']}</span></p>
-                            <p><strong>Progress Percentage:</strong> {details['qe_progress_percentage']}%</p>
-                            <p><strong>Next Release Date:</strong> {details['next_release_date'] or 'N/A'}</p>
-                            <h5>Current Week Progress Entry</h5>
-                            <ul>
-                                {"".join([f"<li>{line.strip()}</li>" for line in (details['current_week_progress_entry'] or '').splitlines() if line.strip()]) or "<li>No entry</li>"}
-                            </ul>
-
-                            <h4>QE Team & Resources</h4>
-                            <p><strong>Team Size:</strong> {details['qe_team_size']}</p>
-                            <h5>Current Week Task</h5>
-                            <ul>
-                                {"".join([f"<li>{line.strip()}</li>" for line in (details['qe_current_week_task'] or '').splitlines() if line.strip()]) or "<li>No tasks</li>"}
-                            </ul>
-                            <h5>Automation Tools Used</h5>
-                            <ul>
-                                {"".join([f"<li>{line.strip()}</li>" for line in (details['qe_automation_tools_used'] or '').splitlines() if line.strip()]) or "<li>None</li>"}
-                            </ul>
-
-                            <h4>Test Case Metrics</h4>
-                            <p><strong>#TC Created:</strong> {details['tc_created']}</p>
-                            <p><strong>#TC Executed:</strong> {details['tc_executed']}</p>
-                            <p><strong>#TC Passed in First Round:</strong> {details['tc_passed_first_round']}</p>
-                            <p><strong>Effort on TC Execution:</strong> {details['effort_tc_execution']} hours</p>
-                            <p><strong>#TC Automated:</strong> {details['tc_automated']}</p>
-                            <p><strong>Effort on TC Automation:</strong> {details['effort_tc_automation']} hours</p>
-
-                            <h4>Defects & Quality Metrics</h4>
-                            <p><strong>Defects Raised (Internal):</strong> {details['defects_raised_internal']}</p>
-                            <p><strong>#SIT Defects:</strong> {details['sit_defects']}</p>
-                            <p><strong>#UAT Defects:</strong> {details['uat_defects']}</p>
-                            <p><strong>#Reopened Defects:</strong> {details['reopened_defects']}</p>
-
-                            <h4 style="page-break-before: always;">Milestone Tracking</h4>
-                            <table>
-                                <tr>
-                                    <th>Milestone</th>
-                                    <th>Planned Start Date</th>
-                                    <th>Planned End Date</th>
-                                    <th>Total Days</th>
-                                    <th>Weightage</th>
-                                    <th>Current Status</th>
-                                    <th>Actual Progress %</th>
-                                    <th>Expected Progress %</th>
-                                    <th>Progress Status (RAG)</th>
-                                    <th>Notes</th>
-                                </tr>
-                                {''.join([
-                                    f'<tr><td class="{"" if m["parent_id"] is None else "sub-milestone"}">{m["name"]}</td><td>{m["planned_start"]}</td><td>{m["planned_end"]}</td><td>{m["total_days"]}</td><td>{m["weightage"]*100 if m["weightage"] else ""}%</td><td>{m["current_status"]}</td><td>{m["actual_progress"]}%</td><td>{m["expected_progress"]}%</td><td>{m["rag"]}</td><td>{m["notes"]}</td></tr>'
-                                    for m in milestone_data[pname]
-                                ]) or '<tr><td colspan="10">No milestones available</td></tr>'}
-                            </table>
-                        </div>
-                        """
-                    html += """
-                    </body>
-                    </html>
-                    """
+                body = ""
+                project_count = 0
+                for idx, (details, milestone_list) in enumerate(sections):
+                    pname = details.project_name
+                    milestone_list = [
+                        m._replace(forecast_slip=format_forecast_slip(forecasts, m.milestone_id)) for m in milestone_list
+                    ]
+                    body += project_section_html(details, milestone_list, anomalies, page_break=idx > 0)
+                    project_count += 1
 
+                    if preview_report:
+                        # Display each project's preview as soon as its section is ready
+                        if idx == 0:
+                            st.markdown("## 📝 Report Preview")
+                        with st.container():
+                            st.markdown(f"### {pname}")
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                st.markdown(f"**Client**: {details.client}")
+                                st.markdown(f"**Project SPOC**: {details.project_spoc}")
+                                st.markdown(f"**Technology Used**: {details.technology_used}")
+                            with col2:
+                                st.markdown(f"**Artifacts Link**: [{details.artifacts_link}]({details.artifacts_link})")
+                                st.markdown(f"**Overall Status**: {details.qe_overall_status}")
+                                st.markdown(f"**Progress Percentage**: {details.qe_progress_percentage}%{format_delta(details.qe_progress_percentage_delta, ' pts')}")
+                            st.markdown(f"**Next Release Date**: {details.next_release_date or 'N/A'}")
+                            
+                            st.subheader("Current Week Progress Entry")
+                            for line in [l.strip() for l in (details.current_week_progress_entry or '').splitlines() if l.strip()]:
+                                st.markdown(f"- {line}")
+                            if not details.current_week_progress_entry:
+                                st.markdown("- No entry")
+                            
+                            st.subheader("QE Team & Resources")
+                            st.markdown(f"**Team Size**: {details.qe_team_size}")
+                            st.markdown("**Current Week Task**")
+                            for line in [l.strip() for l in (details.qe_current_week_task or '').splitlines() if l.strip()]:
+                                st.markdown(f"- {line}")
+                            if not details.qe_current_week_task:
+                                st.markdown("- No tasks")
+                            st.markdown("**Automation Tools Used**")
+                            for line in [l.strip() for l in (details.qe_automation_tools_used or '').splitlines() if l.strip()]:
+                                st.markdown(f"- {line}")
+                            if not details.qe_automation_tools_used:
+                                st.markdown("- None")
+                            
+                            st.subheader("Test Case Metrics")
+                            st.markdown(f"- **#TC Created**: {details.tc_created}")
+                            st.markdown(f"- **#TC Executed**: {details.tc_executed}{format_delta(details.tc_executed_delta)}")
+                            st.markdown(f"- **#TC Passed in First Round**: {details.tc_passed_first_round}")
+                            st.markdown(f"- **Effort on TC Execution**: {details.effort_tc_execution} hours")
+                            st.markdown(f"- **#TC Automated**: {details.tc_automated}{format_delta(details.tc_automated_delta)}")
+                            st.markdown(f"- **Effort on TC Automation**: {details.effort_tc_automation} hours")
+                            
+                            st.subheader("Defects & Quality Metrics")
+                            st.markdown(f"- **Defects Raised (Internal)**: {details.defects_raised_internal}{format_delta(details.defects_raised_internal_delta)}")
+                            st.markdown(f"- **#SIT Defects**: {details.sit_defects}{format_delta(details.sit_defects_delta)}")
+                            st.markdown(f"- **#UAT Defects**: {details.uat_defects}{format_delta(details.uat_defects_delta)}")
+                            st.markdown(f"- **#Reopened Defects**: {details.reopened_defects}{format_delta(details.reopened_defects_delta)}")
+                            if details.project_id in anomalies:
+                                st.warning(
+                                    "**Data Quality Flags**\n"
+                                    + "\n".join(f"- {describe_anomaly(flag)}" for flag in anomalies[details.project_id])
+                                )
+                            
+                            st.subheader("Milestone Tracking")
+                            if milestone_list:
+                                df = pd.DataFrame(milestone_rows(milestone_list))
+                                st.table(df)
+                            else:
+                                st.markdown("- No milestones available")
+                            st.markdown("---")
+
+                if project_count:
                     # Generate PDF
-                    pdf_data = convert_html_to_pdf(html)
+                    pdf_data = convert_html_to_pdf(report_document(
+                        "Weekly QE Status Report", f"Week Ending: {week_ending_date.strftime('%Y-%m-%d')}", body
+                    ))
 
                     if pdf_data:
-                        if preview_report:
-                            # Display preview
-                            st.markdown("## 📝 Report Preview")
-                            for pname, details in project_data.items():
-                                with st.container():
-                                    st.markdown(f"### {pname}")
-                                    col1, col2 = st.columns(2)
-                                    with col1:
-                                        st.markdown(f"**Client**: {details['client']}")
-                                        st.markdown(f"**Project SPOC**: {details['project_spoc']}")
-                                        st.markdown(f"**Technology Used**: {details['technology_used']}")
-                                    with col2:
-                                        st.markdown(f"**Artifacts Link**: [{details['artifacts_link']}]({details['artifacts_link']})")
-                                        st.markdown(f"**Overall Status**: {details['qe_overall_status']}")
-                                        st.markdown(f"**Progress Percentage**: {details['qe_progress_percentage']}%")
-                                    st.markdown(f"**Next Release Date**: {details['next_release_date'] or 'N/A'}")
-                                    
-                                    st.subheader("Current Week Progress Entry")
-                                    for line in [l.strip() for l in (details['current_week_progress_entry'] or '').splitlines() if l.strip()]:
-                                        st.markdown(f"- {line}")
-                                    if not details['current_week_progress_entry']:
-                                        st.markdown("- No entry")
-                                    
-                                    st.subheader("QE Team & Resources")
-                                    st.markdown(f"**Team Size**: {details['qe_team_size']}")
-                                    st.markdown("**Current Week Task**")
-                                    for line in [l.strip() for l in (details['qe_current_week_task'] or '').splitlines() if l.strip()]:
-                                        st.markdown(f"- {line}")
-                                    if not details['qe_current_week_task']:
-                                        st.markdown("- No tasks")
-                                    st.markdown("**Automation Tools Used**")
-                                    for line in [l.strip() for l in (details['qe_automation_tools_used'] or '').splitlines() if l.strip()]:
-                                        st.markdown(f"- {line}")
-                                    if not details['qe_automation_tools_used']:
-                                        st.markdown("- None")
-                                    
-                                    st.subheader("Test Case Metrics")
-                                    st.markdown(f"- **#TC Created**: {details['tc_created']}")
-                                    st.markdown(f"- **#TC Executed**: {details['tc_executed']}")
-                                    st.markdown(f"- **#TC Passed in First Round**: {details['tc_passed_first_round']}")
-                                    st.markdown(f"- **Effort on TC Execution**: {details['effort_tc_execution']} hours")
-                                    st.markdown(f"- **#TC Automated**: {details['tc_automated']}")
-                                    st.markdown(f"- **Effort on TC Automation**: {details['effort_tc_automation']} hours")
-                                    
-                                    st.subheader("Defects & Quality Metrics")
-                                    st.markdown(f"- **Defects Raised (Internal)**: {details['defects_raised_internal']}")
-                                    st.markdown(f"- **#SIT Defects**: {details['sit_defects']}")
-                                    st.markdown(f"- **#UAT Defects**: {details['uat_defects']}")
-                                    st.markdown(f"- **#Reopened Defects**: {details['reopened_defects']}")
-                                    
-                                    st.subheader("Milestone Tracking")
-                                    if milestone_data.get(pname):
-                                        df = pd.DataFrame([
-                                            {
-                                                'Milestone': m['name'] if m['parent_id'] is None else f"  - {m['name']}",
-                                                'Planned Start Date': m['planned_start'],
-                                                'Planned End Date': m['planned_end'],
-                                                'Total Days': m['total_days'],
-                                                'Weightage': f"{m['weightage']*100}%" if m['weightage'] else "",
-                                                'Current Status': m['current_status'],
-                                                'Actual Progress %': f"{m['actual_progress']}%",
-                                                'Expected Progress %': f"{m['expected_progress']}%",
-                                                'Progress Status (RAG)': m['rag'],
-                                                'Notes': m['notes']
-                                            } for m in milestone_data[pname]
-                                        ])
-                                        st.table(df)
-                                    else:
-                                        st.markdown("- No milestones available")
-                                    st.markdown("---")
-
-                        # Always provide download option
                         st.download_button(
                             label="📄 Download PDF Report",
                             data=pdf_data,
@@ -1109,124 +1717,109 @@ else:
             except Exception as e:
                 st.error(f"Error generating report: {str(e)}")
 
+    # Roll-up Reports
+    elif option == "Roll-up Reports":
+        st.header("Client & SPOC Roll-up Reports")
+        with st.form("rollup_form"):
+            dimension = st.radio("Group By", list(ROLLUP_DIMENSIONS), horizontal=True)
+            week_ending_date = st.date_input("Select Week Ending Date")
+            if st.form_submit_button("Show Roll-up"):
+                st.session_state.rollup = (dimension, week_ending_date)
+
+        # Kept in session state so the export button below survives its own rerun
+        if 'rollup' in st.session_state:
+            dimension, week_ending_date = st.session_state.rollup
+            try:
+                summaries = fetch_rollup_summaries(read_conn, week_ending_date, dimension)
+                if not summaries:
+                    st.warning("No weekly updates found for the selected week.")
+                else:
+                    labels = {summary.group_name: summary.group_name or "Unassigned" for summary in summaries}
+                    st.subheader(f"By {dimension} — Week Ending {week_ending_date.strftime('%Y-%m-%d')}")
+                    st.dataframe(
+                        pd.DataFrame(summaries).assign(group_name=lambda df: df['group_name'].fillna("Unassigned")).rename(columns={
+                            'group_name': dimension, 'projects': 'Projects', 'green': 'GREEN', 'amber': 'AMBER', 'red': 'RED',
+                            'avg_progress': 'Avg. Progress %', 'milestone_progress': 'Milestone Progress % (weighted)',
+                            'milestone_expected': 'Expected Progress %', 'milestone_rag': 'Milestone Status'
+                        }).round(1),
+                        hide_index=True,
+                        use_container_width=True
+                    )
+
+                    selected = st.multiselect(f"{dimension} Reports to Generate", list(labels), default=list(labels), format_func=labels.get)
+                    if st.button("Generate Consolidated PDFs") and selected:
+                        # Only the selected clients or SPOCs are loaded
+                        extras, sections = stream_weekly_report(
+                            read_engine or engine, week_ending_date,
+                            extra_queries={
+                                'anomalies': lambda c: load_week_anomalies(c, week_ending_date),
+                                'forecasts': lambda c: load_milestone_forecasts(engine, week_ending_date)
+                            },
+                            dimension=dimension, group_names=selected
+                        )
+                        anomalies, forecasts = extras['anomalies'], extras['forecasts']
+                        rendered = []
+                        with st.spinner("Rendering reports..."):
+                            groups = group_report_sections(sections, dimension)
+                            for summary in summaries:
+                                if summary.group_name not in selected:
+                                    continue
+                                group_sections = [
+                                    (details, [m._replace(forecast_slip=format_forecast_slip(forecasts, m.milestone_id)) for m in milestone_list])
+                                    for details, milestone_list in groups.get(summary.group_name, [])
+                                ]
+                                label = labels[summary.group_name]
+                                rendered.append((label, convert_html_to_pdf(
+                                    rollup_document(week_ending_date, dimension, summary, group_sections, anomalies)
+                                )))
+                        # Downloading one PDF reruns the script, so the rest must outlive this button press
+                        st.session_state.rollup_pdfs = (st.session_state.rollup, rendered)
+
+                    if st.session_state.get('rollup_pdfs', (None,))[0] == st.session_state.rollup:
+                        for label, pdf_data in st.session_state.rollup_pdfs[1]:
+                            if pdf_data:
+                                st.download_button(
+                                    label=f"📄 Download {label} Report",
+                                    data=pdf_data,
+                                    file_name=f"{dimension}_QE_Report_{re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')}_{week_ending_date.strftime('%Y%m%d')}.pdf",
+                                    mime="application/pdf",
+                                    key=f"rollup_download_{label}"
+                                )
+                            else:
+                                st.error(f"Failed to generate PDF for {label}.")
+            except Exception as e:
+                st.error(f"Error generating roll-up report: {e}")
+
     # View Milestone Updates
     elif option == "View Milestone Updates":
         st.header("Milestone Updates Viewer")
+        project_id, project_name = select_project(read_conn, "milestone_updates_project") or (None, None)
 
         with st.form("milestone_updates_form"):
             week_ending_date = st.date_input("Select Week Ending Date")
-            projects = conn.execute(text("SELECT project_id, project_name FROM qeProjects")).fetchall()
-            project_dict = {row.project_name: row.project_id for row in projects}
-            project_name = st.selectbox("Select Project", list(project_dict.keys()))
             col1, col2 = st.columns(2)
             with col1:
                 preview_updates = st.form_submit_button("Preview Updates")
             with col2:
                 download_updates = st.form_submit_button("Download PDF")
 
-        if preview_updates or download_updates:
-            project_id = project_dict[project_name]
-            milestone_query = """
-                SELECT m.milestone_id, m.milestone_name, m.parent_milestone_id, m.planned_start_date, 
-                       m.planned_end_date, m.total_days, m.weightage, m.notes, mu.actual_progress
-                FROM Milestones m
-                LEFT JOIN Milestone_Updates mu ON m.milestone_id = mu.milestone_id 
-                AND CAST(mu.week_ending_date AS DATE) = :week
-                WHERE m.project_id = :pid
-                ORDER BY m.parent_milestone_id, m.milestone_id
-            """
-            params = {'week': str(week_ending_date), 'pid': project_id}
-            
+        if (preview_updates or download_updates) and project_id is None:
+            st.error("No projects found. Adjust the search or add a project first.")
+        elif preview_updates or download_updates:
             try:
-                milestone_result = conn.execute(text(milestone_query), params)
-                milestones = milestone_result.fetchall()
-
-                if milestones:
-                    milestone_data = []
-                    for m in milestones:
-                        m_id, m_name, parent_id, start_str, end_str, total_days, weightage, notes, actual_progress = m
-                        actual_progress = actual_progress or 0.0
-                        start = datetime.strptime(start_str, '%Y-%m-%d').date() if start_str else None
-                        end = datetime.strptime(end_str, '%Y-%m-%d').date() if end_str else None
-                        reference_date = week_ending_date
-                        current_status = (
-                            "✅Completed" if actual_progress == 1 
-                            else "⏳ Pending" if actual_progress == 0 
-                            else "🕒 In Progress"
-                        )
-                        expected_progress = 0
-                        if start and end and total_days:
-                            if reference_date <= start:
-                                expected_progress = 0
-                            elif reference_date > end:
-                                expected_progress = 1
-                            else:
-                                days_passed = (reference_date - start).days
-                                expected_progress = days_passed / total_days
-                        rag = (
-                            "" if not start or start > reference_date 
-                            else "🚩 Critical" if actual_progress < expected_progress - 0.2 
-                            else "⚠️ At Risk" if actual_progress < expected_progress - 0.05 
-                            else "✅ On Track"
-                        )
-                        milestone_data.append({
-                            'milestone_id': m_id,
-                            'name': m_name,
-                            'parent_id': parent_id,
-                            'planned_start': start_str,
-                            'planned_end': end_str,
-                            'total_days': total_days,
-                            'weightage': weightage,
-                            'current_status': current_status,
-                            'actual_progress': actual_progress * 100,
-                            'expected_progress': expected_progress * 100,
-                            'rag': rag,
-                            'notes': notes
-                        })
+                milestone_data = fetch_milestone_status(read_conn, project_id, week_ending_date)
+
+                if milestone_data:
+                    forecasts = load_milestone_forecasts(engine, week_ending_date)
+                    milestone_data = [
+                        m._replace(forecast_slip=format_forecast_slip(forecasts, m.milestone_id)) for m in milestone_data
+                    ]
+
+                    gantt_png = milestone_gantt_png(
+                        project_id, week_ending_date, milestone_data_version(milestone_data), milestone_data
+                    )
 
-                    # Generate HTML for PDF
-                    html = f"""
-                    <!DOCTYPE html>
-                    <html>
-                    <head>
-                        <style>
-                            body {{ font-family: Arial, sans-serif; margin: 20px; line-height: 1.5; }}
-                            h2 {{ color: #003366; margin-bottom: 10px; }}
-                            h4 {{ color: #004080; margin-top: 15px; margin-bottom: 8px; }}
-                            .header {{ text-align: center; margin-bottom: 20px; }}
-                            table {{ width: 100%; border-collapse: collapse; margin-top: 10px; }}
-                            th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                            th {{ background-color: #f2f2f2; }}
-                            .sub-milestone {{ padding-left: 20px; }}
-                        </style>
-                    </head>
-                    <body>
-                        <div class="header">
-                            <h2>Milestone Updates for {project_name}</h2>
-                            <p>Week Ending: {week_ending_date.strftime('%Y-%m-%d')}</p>
-                        </div>
-                        <h4>Milestone Tracking</h4>
-                        <table>
-                            <tr>
-                                <th>Milestone</th>
-                                <th>Planned Start Date</th>
-                                <th>Planned End Date</th>
-                                <th>Total Days</th>
-                                <th>Weightage</th>
-                                <th>Current Status</th>
-                                <th>Actual Progress %</th>
-                                <th>Expected Progress %</th>
-                                <th>Progress Status (RAG)</th>
-                                <th>Notes</th>
-                            </tr>
-                            {''.join([
-                                f'<tr><td class="{"" if m["parent_id"] is None else "sub-milestone"}">{m["name"]}</td><td>{m["planned_start"]}</td><td>{m["planned_end"]}</td><td>{m["total_days"]}</td><td>{m["weightage"]*100 if m["weightage"] else ""}%</td><td>{m["current_status"]}</td><td>{m["actual_progress"]}%</td><td>{m["expected_progress"]}%</td><td>{m["rag"]}</td><td>{m["notes"]}</td></tr>'
-                                for m in milestone_data
-                            ]) or '<tr><td colspan="10">No milestone updates available</td></tr>'}
-                        </table>
-                    </body>
-                    </html>
-                    """
+                    html = milestone_updates_document(project_name, week_ending_date, milestone_data, gantt_png)
 
                     # Generate PDF
                     pdf_data = convert_html_to_pdf(html)
@@ -1239,23 +1832,13 @@ else:
                             st.markdown(f"**Week Ending**: {week_ending_date.strftime('%Y-%m-%d')}")
                             st.subheader("Milestone Tracking")
                             if milestone_data:
-                                df = pd.DataFrame([
-                                    {
-                                        'Milestone': m['name'] if m['parent_id'] is None else f"  - {m['name']}",
-                                        'Planned Start Date': m['planned_start'],
-                                        'Planned End Date': m['planned_end'],
-                                        'Total Days': m['total_days'],
-                                        'Weightage': f"{m['weightage']*100}%" if m['weightage'] else "",
-                                        'Current Status': m['current_status'],
-                                        'Actual Progress %': f"{m['actual_progress']}%",
-                                        'Expected Progress %': f"{m['expected_progress']}%",
-                                        'Progress Status (RAG)': m['rag'],
-                                        'Notes': m['notes']
-                                    } for m in milestone_data
-                                ])
+                                df = pd.DataFrame(milestone_rows(milestone_data))
                                 st.table(df)
                             else:
                                 st.markdown("- No milestone updates available")
+
+                            st.subheader("Milestone Timeline")
+                            st.image(gantt_png, use_container_width=True)
                             
                             st.markdown("---")
                         
@@ -1275,6 +1858,160 @@ else:
             except Exception as e:
                 st.error(f"Error retrieving milestone updates: {str(e)}")
 
-    # Close database connection
+    # Search Updates
+    elif option == "Search Updates":
+        st.header("Search Weekly Updates & Milestone Notes")
+        with st.form("search_form"):
+            search_query = st.text_input("Search for", placeholder="e.g. selenium grid outage")
+            search_submit = st.form_submit_button("Search")
+
+        if search_submit and search_query.strip():
+            try:
+                hits = search_updates(read_conn, search_query)
+                if hits.empty:
+                    st.warning("No progress entries, tasks or milestone notes matched your search.")
+                else:
+                    st.dataframe(hits, hide_index=True, use_container_width=True)
+            except Exception as e:
+                st.error(f"Search failed: {e}")
+
+    # Bulk Import Updates
+    elif option == "Bulk Import Updates":
+        st.header("Bulk Import Weekly & Milestone Updates")
+        st.markdown(
+            "Upload a CSV or XLSX file. Weekly update rows need the columns "
+            f"`{', '.join(WEEKLY_IMPORT_COLUMNS)}`; milestone progress rows need "
+            f"`{', '.join(MILESTONE_IMPORT_COLUMNS)}` (progress as a percentage). "
+            "An XLSX workbook may hold one sheet of each."
+        )
+        uploaded_file = st.file_uploader("Import File", type=["csv", "xlsx"])
+
+        if uploaded_file is not None:
+            try:
+                sheets = read_import_file(uploaded_file)
+                projects = conn.execute(text("SELECT project_id, project_name FROM qeProjects")).fetchall()
+                project_dict = {row.project_name.strip(): row.project_id for row in projects}
+                milestone_lookup = pd.DataFrame(
+                    conn.execute(text("""
+                        SELECT p.project_name, m.milestone_name, m.milestone_id
+                        FROM Milestones m
+                        JOIN qeProjects p ON m.project_id = p.project_id
+                    """)).fetchall(),
+                    columns=['project_name', 'milestone_name', 'milestone_id']
+                )
+                milestone_lookup['project_name'] = milestone_lookup['project_name'].str.strip()
+                milestone_lookup['milestone_name'] = milestone_lookup['milestone_name'].str.strip()
+
+                weekly_rows = milestone_rows = None
+                error_reports = []
+                if sheets['weekly'] is not None:
+                    weekly_rows, weekly_errors = validate_weekly_import(sheets['weekly'], project_dict)
+                    error_reports.append(weekly_errors.assign(section='Weekly Updates'))
+                if sheets['milestone'] is not None:
+                    milestone_rows, milestone_errors = validate_milestone_import(sheets['milestone'], milestone_lookup)
+                    error_reports.append(milestone_errors.assign(section='Milestone Updates'))
+                error_report = pd.concat(error_reports, ignore_index=True)[['section', 'row', 'column', 'error']]
+
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Valid Weekly Rows", 0 if weekly_rows is None else len(weekly_rows))
+                col2.metric("Valid Milestone Rows", 0 if milestone_rows is None else len(milestone_rows))
+                col3.metric("Errors", len(error_report))
+
+                if not error_report.empty:
+                    st.subheader("Validation Errors")
+                    st.dataframe(error_report, hide_index=True)
+                    st.download_button(
+                        label="📄 Download Error Report",
+                        data=error_report.to_csv(index=False).encode('utf-8'),
+                        file_name="import_errors.csv",
+                        mime="text/csv"
+                    )
+                skip_invalid = st.checkbox("Import valid rows and skip rows with errors", value=False)
+
+                if st.button("Import Updates"):
+                    if not error_report.empty and not skip_invalid:
+                        st.error("Fix the validation errors or choose to skip invalid rows before importing.")
+                    else:
+                        for change in bulk_load_updates(conn, weekly_rows, milestone_rows):
+                            audit(*change)
+                        invalidate_report_caches()
+                        if weekly_rows is not None and not weekly_rows.empty:
+                            scan_anomalies(conn)
+                        st.success("Updates imported successfully!")
+            except Exception as e:
+                st.error(f"Failed to import updates: {e}")
+
+    # Project Lifecycle
+    elif option == "Project Lifecycle":
+        st.header("Project Lifecycle & Archival")
+        st.markdown(
+            "Close projects that no longer report weekly. Archiving a project moves its weekly and "
+            "milestone updates to the archive tables, so they drop out of portfolio-wide reports but "
+            "remain visible when the project is selected on its own."
+        )
+        selected = select_project(conn, "lifecycle_project")
+        if selected is None:
+            st.warning("No projects match the current filter.")
+        else:
+            project_id, project_name = selected
+            status = st.session_state["lifecycle_project_status"]
+            st.write(f"**{project_name}** is currently **{status}**.")
+            try:
+                if status == "Active" and st.button("Close Project"):
+                    set_project_status(conn, project_id, "Closed")
+                    conn.commit()
+                    audit("close", "qeProjects", project_id, {'project_status': status}, {'project_status': "Closed"})
+                    st.success(f"{project_name} closed.")
+                elif status == "Closed":
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.button("Reopen Project"):
+                            set_project_status(conn, project_id, "Active")
+                            conn.commit()
+                            audit("reopen", "qeProjects", project_id, {'project_status': status}, {'project_status': "Active"})
+                            st.success(f"{project_name} reopened.")
+                    with col2:
+                        if st.button("Archive Updates", type="primary"):
+                            weekly, milestone = archive_project(conn, project_id)
+                            audit("archive", "qeProjects", project_id, {'project_status': status},
+                                  {'project_status': "Archived", 'weekly_updates_moved': weekly, 'milestone_updates_moved': milestone})
+                            invalidate_report_caches()
+                            st.success(f"Archived {weekly} weekly and {milestone} milestone updates for {project_name}.")
+                elif status == "Archived" and st.button("Restore Project"):
+                    weekly, milestone = restore_project(conn, project_id)
+                    audit("restore", "qeProjects", project_id, {'project_status': status},
+                          {'project_status': "Active", 'weekly_updates_moved': weekly, 'milestone_updates_moved': milestone})
+                    invalidate_report_caches()
+                    st.success(f"Restored {weekly} weekly and {milestone} milestone updates for {project_name}.")
+            except Exception as e:
+                conn.rollback()
+                st.error(f"Failed to update project lifecycle: {e}")
+
+    # Audit Log
+    elif option == "Audit Log":
+        st.header("Audit Log")
+        st.caption("Entries are written in the background and can take a few seconds to appear.")
+        col1, col2 = st.columns(2)
+        with col1:
+            audit_user = st.text_input("User")
+        with col2:
+            audit_entity = st.selectbox("Table", ["All", "qeProjects", "qeWeekly_Updates", "Milestones", "Milestone_Updates", "qeUsers"])
+        try:
+            entries = fetch_audit_log(conn, audit_user.strip() or None, None if audit_entity == "All" else audit_entity)
+            if not entries:
+                st.info("No audit entries found.")
+            else:
+                st.dataframe(
+                    pd.DataFrame(entries, columns=['When (UTC)', 'User', 'Action', 'Table', 'Key', 'Before', 'After']),
+                    hide_index=True,
+                    use_container_width=True
+                )
+        except Exception as e:
+            st.error(f"Error loading audit log: {e}")
+
+    # Close database connections
+    if read_engine is not None:
+        read_conn.close()
+        read_engine.dispose()
     conn.close()
     engine.dispose()
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""Hot/cold tiering of weekly and milestone updates.
+
+Projects move through Active -> Closed -> Archived. Archiving a project moves its weekly
+and milestone updates out of qeWeekly_Updates and Milestone_Updates into the matching
+_Archive tables, so portfolio-wide queries only scan live projects. Per-project history
+reads the qeWeekly_Updates_All and Milestone_Updates_All views, which union both tiers.
+
+Archive every project that has been Closed with no updates for a while with:
+
+    python archive.py --idle-weeks 12
+"""
+import argparse
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from db import create_db_engine
+
+ARCHIVED_WEEKLY_COLUMNS = (
+    "update_id, project_id, week_ending_date, qe_overall_status, qe_progress_percentage, "
+    "current_week_progress_entry, next_release_date, qe_team_size, qe_current_week_task, "
+    "qe_automation_tools_used, tc_created, tc_executed, tc_passed_first_round, effort_tc_execution, "
+    "tc_automated, effort_tc_automation, defects_raised_internal, sit_defects, uat_defects, reopened_defects"
+)
+ARCHIVED_MILESTONE_COLUMNS = "update_id, milestone_id, week_ending_date, actual_progress"
+ARCHIVE_IDLE_WEEKS = 12
+
+
+def _deleted(columns):
+    return ", ".join(f"DELETED.{col.strip()}" for col in columns.split(","))
+
+
+@contextmanager
+def _identity_insert(conn, table):
+    """Allow explicit update_id values so restored rows keep their original keys."""
+    conn.execute(text(f"SET IDENTITY_INSERT {table} ON"))
+    try:
+        yield
+    finally:
+        conn.execute(text(f"SET IDENTITY_INSERT {table} OFF"))
+
+
+def set_project_status(conn, project_id, status):
+    conn.execute(
+        text("UPDATE qeProjects SET project_status = :status WHERE project_id = :pid"),
+        {'status': status, 'pid': project_id}
+    )
+
+
+def archive_project(conn, project_id):
+    """Move a project's updates to the cold tier and mark it Archived, in one transaction.
+
+    Returns the number of (weekly, milestone) update rows moved.
+    """
+    try:
+        weekly = conn.execute(text(f"""
+            DELETE FROM qeWeekly_Updates
+            OUTPUT {_deleted(ARCHIVED_WEEKLY_COLUMNS)}
+            INTO qeWeekly_Updates_Archive ({ARCHIVED_WEEKLY_COLUMNS})
+            WHERE project_id = :pid
+        """), {'pid': project_id}).rowcount
+        milestone = conn.execute(text(f"""
+            DELETE FROM Milestone_Updates
+            OUTPUT {_deleted(ARCHIVED_MILESTONE_COLUMNS)}
+            INTO Milestone_Updates_Archive ({ARCHIVED_MILESTONE_COLUMNS})
+            WHERE milestone_id IN (SELECT milestone_id FROM Milestones WHERE project_id = :pid)
+        """), {'pid': project_id}).rowcount
+        set_project_status(conn, project_id, "Archived")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return weekly, milestone
+
+
+def restore_project(conn, project_id):
+    """Move an archived project's updates back to the hot tier and mark it Active.
+
+    A week that was resubmitted to the hot tier while the project was archived keeps the
+    newer hot row, and the archived copy is dropped.
+    """
+    try:
+        with _identity_insert(conn, "qeWeekly_Updates"):
+            weekly = conn.execute(text(f"""
+                INSERT INTO qeWeekly_Updates ({ARCHIVED_WEEKLY_COLUMNS})
+                SELECT {ARCHIVED_WEEKLY_COLUMNS}
+                FROM qeWeekly_Updates_Archive a
+                WHERE a.project_id = :pid
+                  AND NOT EXISTS (
+                      SELECT 1 FROM qeWeekly_Updates w
+                      WHERE w.project_id = a.project_id AND w.week_ending_date = a.week_ending_date
+                  )
+            """), {'pid': project_id}).rowcount
+        conn.execute(text("DELETE FROM qeWeekly_Updates_Archive WHERE project_id = :pid"), {'pid': project_id})
+
+        with _identity_insert(conn, "Milestone_Updates"):
+            milestone = conn.execute(text(f"""
+                INSERT INTO Milestone_Updates ({ARCHIVED_MILESTONE_COLUMNS})
+                SELECT {ARCHIVED_MILESTONE_COLUMNS}
+                FROM Milestone_Updates_Archive a
+                WHERE a.milestone_id IN (SELECT milestone_id FROM Milestones WHERE project_id = :pid)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM Milestone_Updates mu
+                      WHERE mu.milestone_id = a.milestone_id AND mu.week_ending_date = a.week_ending_date
+                  )
+            """), {'pid': project_id}).rowcount
+        conn.execute(text("""
+            DELETE FROM Milestone_Updates_Archive
+            WHERE milestone_id IN (SELECT milestone_id FROM Milestones WHERE project_id = :pid)
+        """), {'pid': project_id})
+
+        set_project_status(conn, project_id, "Active")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return weekly, milestone
+
+
+def archive_idle_projects(conn, idle_weeks=ARCHIVE_IDLE_WEEKS):
+    """Archive Closed projects whose latest weekly update is older than `idle_weeks`."""
+    project_ids = conn.execute(text("""
+        SELECT p.project_id
+        FROM qeProjects p
+        WHERE p.project_status = 'Closed'
+          AND NOT EXISTS (
+              SELECT 1 FROM qeWeekly_Updates w
+              WHERE w.project_id = p.project_id
+                AND w.week_ending_date > DATEADD(WEEK, -:weeks, CAST(SYSUTCDATETIME() AS DATE))
+          )
+    """), {'weeks': idle_weeks}).scalars().all()
+    return {project_id: archive_project(conn, project_id) for project_id in project_ids}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive closed QE projects to the cold tier")
+    parser.add_argument('--idle-weeks', type=int, default=ARCHIVE_IDLE_WEEKS,
+                        help="archive Closed projects with no weekly update in this many weeks")
+    args = parser.parse_args()
+
+    engine = create_db_engine()
+    with engine.connect() as conn:
+        archived = archive_idle_projects(conn, args.idle_weeks)
+    print(f"Archived {len(archived)} projects: {sum(w for w, _ in archived.values())} weekly and "
+          f"{sum(m for _, m in archived.values())} milestone updates moved")
+    engine.dispose()
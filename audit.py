@@ -0,0 +1,153 @@
+"""Audit trail of submissions and admin actions, written off the request path.
+
+AuditLog.record() only puts the entry on an in-process queue. A background thread drains
+the queue and inserts entries into qeAudit_Log in batches on its own connection, so a submit
+never waits on the audit insert and a burst of submits costs one round trip per batch.
+A batch that fails to insert is retried with exponential backoff while new entries keep
+queuing behind it. Entries still queued when the process exits are flushed at shutdown.
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import streamlit as st
+from sqlalchemy import text
+
+from db import create_db_engine
+
+AUDIT_BATCH_SIZE = 200
+# Longest an entry waits in the queue for its batch to fill
+AUDIT_FLUSH_SECONDS = 2.0
+AUDIT_QUEUE_SIZE = 10000
+# Backoff between attempts to insert a failed batch
+AUDIT_RETRY_SECONDS = 1.0
+AUDIT_MAX_RETRY_SECONDS = 60.0
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _to_json(values):
+    return None if values is None else json.dumps(values, default=_json_default, sort_keys=True)
+
+
+class AuditLog:
+    """Queue audit entries and insert them from a background thread."""
+
+    def __init__(self, engine, batch_size=AUDIT_BATCH_SIZE, flush_seconds=AUDIT_FLUSH_SECONDS, maxsize=AUDIT_QUEUE_SIZE,
+                 retry_seconds=AUDIT_RETRY_SECONDS, max_retry_seconds=AUDIT_MAX_RETRY_SECONDS):
+        self._engine = engine
+        self._batch_size = batch_size
+        self._flush_seconds = flush_seconds
+        self._retry_seconds = retry_seconds
+        self._max_retry_seconds = max_retry_seconds
+        self._queue = queue.Queue(maxsize)
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, username, action, entity, entity_id=None, before=None, after=None):
+        """Queue an entry; `before` and `after` are dicts of column values stored as JSON."""
+        entry = {
+            'occurred_at': datetime.now(timezone.utc).replace(tzinfo=None),
+            'username': username,
+            'action': action,
+            'entity': entity,
+            'entity_id': None if entity_id is None else str(entity_id),
+            'before_values': _to_json(before),
+            'after_values': _to_json(after),
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Never block a submit on auditing; a full queue means the database is unreachable
+            logger.error("Audit queue full, dropping %s %s %s by %s", action, entity, entity_id, username)
+
+    def _next_batch(self):
+        """Block for the first entry, then gather more until the batch is full or the flush interval passes."""
+        entry = self._queue.get()
+        if entry is _STOP:
+            return [], True
+        batch, deadline = [entry], time.monotonic() + self._flush_seconds
+        while len(batch) < self._batch_size:
+            try:
+                entry = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            delay = self._retry_seconds
+            while batch and not self._write(batch):
+                if self._closing.wait(delay):
+                    # Shutting down: one last attempt rather than holding up the exit
+                    if not self._write(batch):
+                        logger.error("Dropping %d audit entries at shutdown", len(batch))
+                    break
+                delay = min(delay * 2, self._max_retry_seconds)
+
+    def _write(self, batch):
+        """Insert a batch in one transaction; returns False if it should be retried."""
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO qeAudit_Log (occurred_at, username, action, entity, entity_id, before_values, after_values)
+                    VALUES (:occurred_at, :username, :action, :entity, :entity_id, :before_values, :after_values)
+                """), batch)
+            return True
+        except Exception:
+            logger.exception("Failed to write %d audit entries, will retry", len(batch))
+            return False
+
+    def close(self, timeout=10):
+        """Flush queued entries and stop the writer thread, waiting at most about `timeout` seconds."""
+        if self._thread.is_alive():
+            self._closing.set()
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.error("Audit queue still full at shutdown; unwritten entries will be lost")
+                return
+            self._thread.join(timeout)
+
+
+def fetch_audit_log(conn, username=None, entity=None, limit=200):
+    """Return the most recent audit entries, newest first."""
+    query = "SELECT TOP (:limit) occurred_at, username, action, entity, entity_id, before_values, after_values FROM qeAudit_Log"
+    filters, params = [], {'limit': limit}
+    if username:
+        filters.append("username = :username")
+        params['username'] = username
+    if entity:
+        filters.append("entity = :entity")
+        params['entity'] = entity
+    if filters:
+        query += " WHERE " + " AND ".join(filters)
+    return conn.execute(text(query + " ORDER BY audit_id DESC"), params).fetchall()
+
+
+@st.cache_resource
+def get_audit_log():
+    """One AuditLog per app process, writing through its own single-connection pool."""
+    return AuditLog(create_db_engine(pool_size=1, max_overflow=0, pool_pre_ping=True))
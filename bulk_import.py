@@ -0,0 +1,205 @@
+"""Bulk import of weekly updates and milestone progress from CSV or XLSX files.
+
+Rows are validated against the table constraints with a per-row error report, then upserted
+set-based through OPENJSON in one transaction.
+"""
+import json
+
+import pandas as pd
+from sqlalchemy import text
+
+QE_STATUSES = ["GREEN", "AMBER", "RED"]
+WEEKLY_TEXT_COLUMNS = ['current_week_progress_entry', 'qe_current_week_task', 'qe_automation_tools_used']
+WEEKLY_INT_COLUMNS = [
+    'qe_progress_percentage', 'qe_team_size', 'tc_created', 'tc_executed', 'tc_passed_first_round',
+    'tc_automated', 'defects_raised_internal', 'sit_defects', 'uat_defects', 'reopened_defects'
+]
+WEEKLY_FLOAT_COLUMNS = ['effort_tc_execution', 'effort_tc_automation']
+WEEKLY_IMPORT_COLUMNS = (
+    ['project_name', 'week_ending_date', 'qe_overall_status', 'next_release_date']
+    + WEEKLY_TEXT_COLUMNS + WEEKLY_INT_COLUMNS + WEEKLY_FLOAT_COLUMNS
+)
+# Columns a resubmitted weekly update overwrites
+WEEKLY_UPDATE_COLUMNS = (
+    ['qe_overall_status', 'next_release_date'] + WEEKLY_TEXT_COLUMNS + WEEKLY_INT_COLUMNS + WEEKLY_FLOAT_COLUMNS
+)
+MILESTONE_IMPORT_COLUMNS = ['project_name', 'milestone_name', 'week_ending_date', 'actual_progress']
+
+
+def _collect_errors(errors, mask, column, message):
+    # Spreadsheet rows are 1-based and the first row holds the headers
+    if mask.any():
+        errors.append(pd.DataFrame({'row': mask[mask].index + 2, 'column': column, 'error': message}))
+
+
+def _finish_validation(out, errors):
+    error_report = pd.concat(errors, ignore_index=True) if errors else pd.DataFrame(columns=['row', 'column', 'error'])
+    bad_index = set(error_report['row'].dropna().astype(int) - 2)
+    valid = out.drop(index=[i for i in out.index if i in bad_index])
+    return valid, error_report.sort_values(['row', 'column'], ignore_index=True)
+
+
+def read_import_file(uploaded_file):
+    """Return {'weekly': DataFrame, 'milestone': DataFrame} from an uploaded CSV or XLSX file."""
+    if uploaded_file.name.lower().endswith('.xlsx'):
+        frames = list(pd.read_excel(uploaded_file, sheet_name=None, dtype=object).values())
+    else:
+        frames = [pd.read_csv(uploaded_file, dtype=object)]
+    sheets = {'weekly': [], 'milestone': []}
+    for frame in frames:
+        frame.columns = [str(c).strip().lower() for c in frame.columns]
+        frame = frame.dropna(how='all')
+        sheets['milestone' if 'milestone_name' in frame.columns else 'weekly'].append(frame)
+    return {kind: pd.concat(parts, ignore_index=True) if parts else None for kind, parts in sheets.items()}
+
+
+def validate_weekly_import(df, project_dict):
+    """Validate weekly update rows against the qeWeekly_Updates constraints.
+
+    Returns the rows ready to load (keyed by project_id) and a per-row error report.
+    """
+    df = df.reset_index(drop=True)
+    missing = [c for c in WEEKLY_IMPORT_COLUMNS if c not in df.columns]
+    if missing:
+        return df.iloc[0:0], pd.DataFrame({'row': None, 'column': missing, 'error': 'Missing column'})
+
+    errors = []
+    out = pd.DataFrame(index=df.index)
+    out['project_id'] = df['project_name'].astype('string').str.strip().map(project_dict)
+    _collect_errors(errors, out['project_id'].isna(), 'project_name', 'Unknown project')
+
+    week = pd.to_datetime(df['week_ending_date'], errors='coerce')
+    _collect_errors(errors, week.isna(), 'week_ending_date', 'Missing or invalid date')
+    out['week_ending_date'] = week.dt.date
+
+    status = df['qe_overall_status'].astype('string').str.strip().str.upper()
+    _collect_errors(errors, ~status.isin(QE_STATUSES).fillna(False), 'qe_overall_status', f"Must be one of {', '.join(QE_STATUSES)}")
+    out['qe_overall_status'] = status
+
+    release = pd.to_datetime(df['next_release_date'], errors='coerce')
+    _collect_errors(errors, release.isna() & df['next_release_date'].notna(), 'next_release_date', 'Invalid date')
+    out['next_release_date'] = release.dt.date
+
+    for col in WEEKLY_TEXT_COLUMNS:
+        out[col] = df[col].fillna('').astype(str)
+
+    for col in WEEKLY_INT_COLUMNS:
+        values = pd.to_numeric(df[col], errors='coerce')
+        _collect_errors(errors, values.isna() | (values < 0) | (values % 1 != 0), col, 'Must be a non-negative whole number')
+        out[col] = values
+    _collect_errors(errors, out['qe_progress_percentage'] > 100, 'qe_progress_percentage', 'Must be between 0 and 100')
+
+    for col in WEEKLY_FLOAT_COLUMNS:
+        values = pd.to_numeric(df[col], errors='coerce')
+        _collect_errors(errors, values.isna() | (values < 0), col, 'Must be a non-negative number')
+        out[col] = values
+
+    duplicated = out.duplicated(['project_id', 'week_ending_date'], keep=False) & out['project_id'].notna() & week.notna()
+    _collect_errors(errors, duplicated, 'week_ending_date', 'Duplicate project/week in file')
+
+    valid, error_report = _finish_validation(out, errors)
+    return valid.astype({col: int for col in WEEKLY_INT_COLUMNS + ['project_id']}), error_report
+
+
+def validate_milestone_import(df, milestone_lookup):
+    """Validate milestone progress rows against the Milestone_Updates constraints.
+
+    `milestone_lookup` holds project_name, milestone_name and milestone_id for every milestone.
+    """
+    df = df.reset_index(drop=True)
+    missing = [c for c in MILESTONE_IMPORT_COLUMNS if c not in df.columns]
+    if missing:
+        return df.iloc[0:0], pd.DataFrame({'row': None, 'column': missing, 'error': 'Missing column'})
+
+    errors = []
+    keys = pd.DataFrame({
+        'project_name': df['project_name'].astype('string').str.strip(),
+        'milestone_name': df['milestone_name'].astype('string').str.strip()
+    })
+    lookup = milestone_lookup.astype({'project_name': 'string', 'milestone_name': 'string'}).drop_duplicates(['project_name', 'milestone_name'])
+    out = pd.DataFrame(index=df.index)
+    out['milestone_id'] = keys.merge(lookup, on=['project_name', 'milestone_name'], how='left')['milestone_id'].to_numpy()
+    _collect_errors(errors, out['milestone_id'].isna(), 'milestone_name', 'Unknown milestone for project')
+
+    week = pd.to_datetime(df['week_ending_date'], errors='coerce')
+    _collect_errors(errors, week.isna(), 'week_ending_date', 'Missing or invalid date')
+    out['week_ending_date'] = week.dt.date
+
+    # Progress is entered as a percentage, like the Submit Milestone Update form
+    progress = pd.to_numeric(df['actual_progress'], errors='coerce')
+    _collect_errors(errors, progress.isna() | (progress < 0) | (progress > 100), 'actual_progress', 'Must be between 0 and 100')
+    out['actual_progress'] = progress / 100
+
+    duplicated = out.duplicated(['milestone_id', 'week_ending_date'], keep=False) & out['milestone_id'].notna() & week.notna()
+    _collect_errors(errors, duplicated, 'week_ending_date', 'Duplicate milestone/week in file')
+
+    valid, error_report = _finish_validation(out, errors)
+    return valid.astype({'milestone_id': int}), error_report
+
+
+def _to_json_payload(df):
+    return json.dumps(df.astype(object).where(df.notna(), None).to_dict('records'), default=str)
+
+
+def bulk_load_updates(conn, weekly_rows, milestone_rows):
+    """Upsert validated rows set-based through OPENJSON, all in a single transaction.
+
+    Returns the (action, entity, entity_id, before, after) of every row written, for the audit log.
+    """
+    changes = []
+    try:
+        if weekly_rows is not None and not weekly_rows.empty:
+            result = conn.execute(text(f"""
+                MERGE qeWeekly_Updates WITH (HOLDLOCK) AS target
+                USING (
+                    SELECT *
+                    FROM OPENJSON(:payload) WITH (
+                        project_id INT, week_ending_date DATE, qe_overall_status NVARCHAR(10),
+                        qe_progress_percentage INT, current_week_progress_entry NVARCHAR(MAX),
+                        next_release_date DATE, qe_team_size INT, qe_current_week_task NVARCHAR(MAX),
+                        qe_automation_tools_used NVARCHAR(MAX), tc_created INT, tc_executed INT,
+                        tc_passed_first_round INT, effort_tc_execution FLOAT, tc_automated INT,
+                        effort_tc_automation FLOAT, defects_raised_internal INT, sit_defects INT,
+                        uat_defects INT, reopened_defects INT
+                    )
+                ) AS source
+                ON target.project_id = source.project_id AND target.week_ending_date = source.week_ending_date
+                WHEN MATCHED THEN
+                    UPDATE SET {', '.join(f'{col} = source.{col}' for col in WEEKLY_UPDATE_COLUMNS)}
+                WHEN NOT MATCHED THEN
+                    INSERT (project_id, week_ending_date, {', '.join(WEEKLY_UPDATE_COLUMNS)})
+                    VALUES (source.project_id, source.week_ending_date, {', '.join(f'source.{col}' for col in WEEKLY_UPDATE_COLUMNS)})
+                OUTPUT $action, INSERTED.project_id, INSERTED.week_ending_date,
+                    {', '.join(f'DELETED.{col}' for col in WEEKLY_UPDATE_COLUMNS)},
+                    {', '.join(f'INSERTED.{col}' for col in WEEKLY_UPDATE_COLUMNS)};
+            """), {'payload': _to_json_payload(weekly_rows)})
+            width = len(WEEKLY_UPDATE_COLUMNS)
+            for row in result:
+                before = dict(zip(WEEKLY_UPDATE_COLUMNS, row[3:3 + width])) if row[0] == 'UPDATE' else None
+                after = dict(zip(WEEKLY_UPDATE_COLUMNS, row[3 + width:]))
+                changes.append((row[0].lower(), 'qeWeekly_Updates', f"{row[1]}/{row[2]}", before, after))
+        if milestone_rows is not None and not milestone_rows.empty:
+            result = conn.execute(text("""
+                MERGE Milestone_Updates WITH (HOLDLOCK) AS target
+                USING (
+                    SELECT milestone_id, week_ending_date, actual_progress
+                    FROM OPENJSON(:payload) WITH (milestone_id INT, week_ending_date DATE, actual_progress FLOAT)
+                ) AS source
+                ON target.milestone_id = source.milestone_id AND target.week_ending_date = source.week_ending_date
+                WHEN MATCHED THEN
+                    UPDATE SET actual_progress = source.actual_progress
+                WHEN NOT MATCHED THEN
+                    INSERT (milestone_id, week_ending_date, actual_progress)
+                    VALUES (source.milestone_id, source.week_ending_date, source.actual_progress)
+                OUTPUT $action, INSERTED.milestone_id, INSERTED.week_ending_date, DELETED.actual_progress, INSERTED.actual_progress;
+            """), {'payload': _to_json_payload(milestone_rows)})
+            for action, m_id, week, before, after in result:
+                changes.append((
+                    action.lower(), 'Milestone_Updates', f"{m_id}/{week}",
+                    None if action == 'INSERT' else {'actual_progress': before}, {'actual_progress': after}
+                ))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return changes
@@ -0,0 +1,283 @@
+"""Report cache that can be shared by several app replicas.
+
+Set `cache_url` in `.streamlit/secrets.toml` to choose the backend:
+
+    cache_url = "redis://cache-host:6379/0"      # shared; needs `pip install redis`
+    cache_url = "sqlite:////mnt/shared/qe_cache.sqlite"   # shared through a common volume
+
+Without it, entries live in this process only, as with st.cache_data.
+
+Entries are grouped into namespaces that each carry a generation counter stored in the
+backend. Invalidating a namespace bumps its counter, so every replica stops reading the old
+entries at once, and they simply expire. The Redis backend also publishes the invalidation,
+letting replicas keep the current generation in memory instead of reading it on every lookup.
+
+Values are stored pickled, and unpickling runs code, so anyone who can write to a shared
+backend can run code in every replica. Keep Redis and the SQLite file reachable by the app
+replicas only, and set `cache_signing_key` so that entries not signed with it are ignored.
+"""
+import datetime
+import decimal
+import functools
+import hashlib
+import hmac
+import inspect
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+INVALIDATION_CHANNEL = "qe-cache-invalidate"
+DEFAULT_TTL = 900
+# With pub/sub, re-read generations this often anyway in case a message was missed
+GENERATION_REFRESH_SECONDS = 30
+# Values hashed by their repr(), which is exact for these types
+_REPR_HASHED_TYPES = (
+    type(None), bool, int, float, complex, str, bytes, decimal.Decimal,
+    datetime.date, datetime.time, datetime.timedelta
+)
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def _hash_argument(hasher, value):
+    """Feed a type-tagged, content-complete encoding of `value` into `hasher`.
+
+    Like st.cache_data, DataFrames and arrays are hashed by their contents rather than their
+    truncated repr(). Types without a reliable encoding are rejected instead of hashing an
+    address; pass them as an underscore-prefixed argument with a version key beside them.
+    """
+    hasher.update(f"{type(value).__module__}.{type(value).__qualname__}:".encode('utf-8'))
+    if isinstance(value, _REPR_HASHED_TYPES):
+        hasher.update(repr(value).encode('utf-8'))
+    elif isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        if isinstance(value, pd.DataFrame):
+            _hash_argument(hasher, [(str(column), str(dtype)) for column, dtype in value.dtypes.items()])
+        else:
+            _hash_argument(hasher, (str(value.name), str(value.dtype)))
+        _hash_argument(hasher, value.shape)
+        hasher.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        _hash_argument(hasher, (str(value.dtype), value.shape))
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{len(value)}[".encode('utf-8'))
+        for item in value:
+            _hash_argument(hasher, item)
+        hasher.update(b"]")
+    elif isinstance(value, dict):
+        hasher.update(f"{len(value)}{{".encode('utf-8'))
+        for key, item in sorted(value.items(), key=lambda pair: repr(pair[0])):
+            _hash_argument(hasher, key)
+            _hash_argument(hasher, item)
+        hasher.update(b"}")
+    else:
+        raise TypeError(
+            f"Cannot hash argument of type {type(value).__name__} for the cache key; "
+            "prefix its parameter name with an underscore to leave it out of the key"
+        )
+
+
+class InProcessBackend:
+    """Dictionary-backed store private to this process."""
+    supports_pubsub = False
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] is not None and entry[1] < time.time():
+                return None
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            # Drop expired entries as new ones arrive so the dict cannot grow without bound
+            now = time.time()
+            self._entries = {k: e for k, e in self._entries.items() if e[1] is None or e[1] >= now}
+            self._entries[key] = (value, now + ttl if ttl else None)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._entries.get(key, (0, None))[0]) + 1
+            self._entries[key] = (value, None)
+            return value
+
+    def publish(self, channel, message):
+        pass
+
+
+class SQLiteBackend:
+    """Store in a SQLite file, shared by every process that can reach the file."""
+    supports_pubsub = False
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)", (key, time.time())
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            now = time.time()
+            self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl if ttl else None)
+            )
+
+    def incr(self, key):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cache (key, value, expires_at) VALUES (?, 1, NULL) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+                (key,)
+            )
+            return int(self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()[0])
+
+    def publish(self, channel, message):
+        pass
+
+
+class RedisBackend:
+    """Store in Redis (or any server speaking its protocol), with pub/sub invalidation."""
+    supports_pubsub = True
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("cache_url points at Redis, but the redis package is not installed (pip install redis)")
+        self._redis = redis.Redis.from_url(url)
+        self._pubsub_thread = None
+
+    def get(self, key):
+        return self._redis.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._redis.set(key, value, ex=ttl)
+
+    def incr(self, key):
+        return self._redis.incr(key)
+
+    def publish(self, channel, message):
+        self._redis.publish(channel, message)
+
+    def subscribe(self, channel, callback):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{channel: lambda message: callback(message['data'].decode('utf-8'))})
+        self._pubsub_thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+
+def create_cache_backend(url=None):
+    url = url if url is not None else st.secrets.get("cache_url", "")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    return InProcessBackend()
+
+
+class SharedCache:
+    """Memoize function results in a backend, grouped into invalidatable namespaces.
+
+    With a `signing_key`, values are stored with an HMAC-SHA256 of the pickle and entries
+    whose signature does not match are treated as misses rather than unpickled.
+    """
+
+    def __init__(self, backend, signing_key=None):
+        self.backend = backend
+        self._signing_key = signing_key.encode('utf-8') if isinstance(signing_key, str) else signing_key
+        # namespace -> (generation, read at); only kept when the backend publishes invalidations
+        self._generations = {}
+        if backend.supports_pubsub:
+            backend.subscribe(INVALIDATION_CHANNEL, self._on_invalidation)
+
+    def _on_invalidation(self, message):
+        namespace, _, generation = message.partition(":")
+        # Messages can arrive out of order; a generation never goes backwards
+        known = self._generations.get(namespace, (0, 0))[0]
+        self._generations[namespace] = (max(int(generation), known), time.time())
+
+    def generation(self, namespace):
+        known = self._generations.get(namespace)
+        if known is not None and time.time() - known[1] < GENERATION_REFRESH_SECONDS:
+            return known[0]
+        generation = int(self.backend.get(f"generation:{namespace}") or 0)
+        if self.backend.supports_pubsub:
+            self._generations[namespace] = (generation, time.time())
+        return generation
+
+    def _dumps(self, value):
+        payload = pickle.dumps(value)
+        if self._signing_key is None:
+            return payload
+        return hmac.new(self._signing_key, payload, hashlib.sha256).digest() + payload
+
+    def _loads(self, stored):
+        """Unpickle a stored value, or return _MISSING when its signature does not verify."""
+        if self._signing_key is None:
+            return pickle.loads(stored)
+        signature, payload = stored[:32], stored[32:]
+        if not hmac.compare_digest(signature, hmac.new(self._signing_key, payload, hashlib.sha256).digest()):
+            logger.warning("Ignoring cache entry with an invalid signature")
+            return _MISSING
+        return pickle.loads(payload)
+
+    def invalidate(self, namespace):
+        """Retire every entry in `namespace` for all replicas sharing the backend."""
+        generation = self.backend.incr(f"generation:{namespace}")
+        if self.backend.supports_pubsub:
+            self._generations[namespace] = (generation, time.time())
+        self.backend.publish(INVALIDATION_CHANNEL, f"{namespace}:{generation}")
+
+    def memoize(self, namespace, ttl=DEFAULT_TTL):
+        """Decorator like st.cache_data: arguments named with a leading underscore are not hashed."""
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                hasher = hashlib.sha256(f"{func.__module__}.{func.__qualname__}".encode('utf-8'))
+                _hash_argument(hasher, [
+                    (name, value) for name, value in bound.arguments.items() if not name.startswith('_')
+                ])
+                key = f"{namespace}:{self.generation(namespace)}:{hasher.hexdigest()}"
+
+                cached = self.backend.get(key)
+                if cached is not None:
+                    value = self._loads(cached)
+                    if value is not _MISSING:
+                        return value
+                value = func(*args, **kwargs)
+                self.backend.set(key, self._dumps(value), ttl)
+                return value
+
+            return wrapper
+        return decorator
+
+
+@st.cache_resource
+def get_shared_cache():
+    """One SharedCache per app process, so the Redis subscriber thread starts only once."""
+    return SharedCache(create_cache_backend(), st.secrets.get("cache_signing_key"))
@@ -0,0 +1,101 @@
+"""Export rows changed since the last run as newline-delimited JSON.
+
+Each table carries a ROWVERSION column that SQL Server bumps on every insert and update.
+The exporter remembers the highest version it has shipped per table in a small watermark
+file, so each run reads only the rows touched since then:
+
+    python changefeed.py --state changefeed_state.json --output changes.ndjson
+
+Every output line is {"table": ..., "version": ..., "row": {...}}. The watermark file is
+only rewritten once the output has been written in full, so a failed run is simply
+repeated. Deleted rows are not reported.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+from db import create_db_engine
+from services import CHANGE_FEED_BATCH_SIZE, CHANGE_FEED_TABLES, change_feed_watermark, fetch_changes
+
+
+def json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def load_watermarks(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(path, watermarks):
+    # Write then rename so an interrupted run never leaves a truncated state file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def iter_changes(conn, table, since, until, batch_size=CHANGE_FEED_BATCH_SIZE):
+    """Yield every row of `table` changed in (since, until], one batch query at a time."""
+    while True:
+        rows = fetch_changes(conn, table, since, until, batch_size)
+        if not rows:
+            return
+        # Read before yielding: callers are free to modify the rows they are given
+        last_version = rows[-1]['_version']
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        since = last_version
+
+
+def export_changes(conn, tables, watermarks, out, batch_size=CHANGE_FEED_BATCH_SIZE):
+    """Write changes for `tables` to `out` and return the advanced watermarks and row counts."""
+    until = change_feed_watermark(conn)
+    new_watermarks, counts = dict(watermarks), {}
+    for table in tables:
+        since = watermarks.get(table, 0)
+        counts[table] = 0
+        for row in iter_changes(conn, table, since, until, batch_size):
+            data = {column: value for column, value in row.items() if column != '_version'}
+            out.write(json.dumps({'table': table, 'version': row['_version'], 'row': data}, default=json_default) + "\n")
+            counts[table] += 1
+        new_watermarks[table] = max(since, until)
+    return new_watermarks, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export changed QE tracker rows as NDJSON")
+    parser.add_argument('--state', default='changefeed_state.json', help="watermark file, updated after a successful run")
+    parser.add_argument('--output', default='-', help="NDJSON output file, or - for stdout")
+    parser.add_argument('--tables', nargs='+', choices=list(CHANGE_FEED_TABLES), default=list(CHANGE_FEED_TABLES))
+    parser.add_argument('--full', action='store_true', help="ignore stored watermarks and export every row")
+    args = parser.parse_args()
+
+    watermarks = {} if args.full else load_watermarks(args.state)
+    engine = create_db_engine()
+    try:
+        with engine.connect() as conn:
+            if args.output == '-':
+                watermarks, counts = export_changes(conn, args.tables, watermarks, sys.stdout)
+            else:
+                with open(args.output, 'w') as out:
+                    watermarks, counts = export_changes(conn, args.tables, watermarks, out)
+    finally:
+        engine.dispose()
+    save_watermarks(args.state, watermarks)
+    summary = ", ".join(f"{table}: {count}" for table, count in counts.items())
+    print(f"Change feed export complete ({summary})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import streamlit as st
+from sqlalchemy import create_engine
+
+
+def _connection_url(server):
+    database = st.secrets["db_name"]
+    username = st.secrets["db_user"]
+    password = st.secrets["db_password"]
+    return f"mssql+pymssql://{username}:{password}@{server}:1433/{database}"
+
+
+# Azure SQL Database engine shared by the app and its background jobs
+def create_db_engine(**engine_kwargs):
+    return create_engine(_connection_url(st.secrets["db_server"]), **engine_kwargs)
+
+
+# Read-only engine for report queries, or None when no read replica is configured.
+# Connections declare ApplicationIntent=ReadOnly, so pointing db_read_server at the primary's
+# own name uses Azure SQL read scale-out, and pointing it at a geo-secondary reads from there.
+def create_read_engine(**engine_kwargs):
+    server = st.secrets.get("db_read_server")
+    if not server:
+        return None
+    connect_args = dict(engine_kwargs.pop('connect_args', {}), read_only=True)
+    return create_engine(_connection_url(server), connect_args=connect_args, **engine_kwargs)
@@ -0,0 +1,73 @@
+"""Gantt chart rendering for the Milestones hierarchy."""
+import io
+
+import matplotlib.dates as mdates
+import pandas as pd
+from matplotlib.figure import Figure
+
+RAG_COLORS = {
+    'Critical': '#dc3545',
+    'At Risk': '#ffc107',
+    'On Track': '#28a745',
+}
+NOT_STARTED_COLOR = '#94a3b8'
+PLANNED_COLOR = '#e2e8f0'
+
+
+def _rag_color(rag):
+    for label, color in RAG_COLORS.items():
+        if label in (rag or ''):
+            return color
+    return NOT_STARTED_COLOR
+
+
+def order_hierarchy(milestones):
+    """Order MilestoneStatus rows parent-first, each parent followed by its sub-milestones."""
+    children = {}
+    for m in milestones:
+        children.setdefault(m.parent_id, []).append(m)
+    ordered = []
+    for parent in children.get(None, []):
+        ordered.append(parent)
+        ordered.extend(children.get(parent.milestone_id, []))
+    # Sub-milestones whose parent is not in the list still get drawn
+    seen = {m.milestone_id for m in ordered}
+    ordered.extend(m for m in milestones if m.milestone_id not in seen)
+    return ordered
+
+
+def render_milestone_gantt(milestones, reference_date, title=None):
+    """Render milestones as a Gantt chart and return PNG bytes.
+
+    Each bar spans the planned start to end date and is filled up to the actual progress in
+    its RAG colour. `milestones` are MilestoneStatus rows from services.fetch_milestone_status.
+    Draws on a standalone Figure rather than pyplot, whose global state is not safe across the
+    threads Streamlit runs sessions on.
+    """
+    rows = [m for m in order_hierarchy(milestones) if m.planned_start and m.planned_end]
+    fig = Figure(figsize=(11, max(2.0, 0.38 * len(rows) + 1.2)), dpi=110)
+    ax = fig.add_subplot()
+    for y, m in enumerate(rows):
+        start = mdates.date2num(pd.Timestamp(m.planned_start))
+        end = mdates.date2num(pd.Timestamp(m.planned_end)) + 1
+        height = 0.7 if m.parent_id is None else 0.5
+        ax.barh(y, end - start, left=start, height=height, color=PLANNED_COLOR, edgecolor='#64748b', linewidth=0.5)
+        progress = min(max((m.actual_progress or 0) / 100, 0), 1)
+        if progress:
+            ax.barh(y, (end - start) * progress, left=start, height=height, color=_rag_color(m.rag))
+    ax.axvline(mdates.date2num(pd.Timestamp(reference_date)), color='#1e40af', linestyle='--', linewidth=1)
+
+    ax.set_yticks(range(len(rows)))
+    ax.set_yticklabels([m.name if m.parent_id is None else f"    {m.name}" for m in rows], fontsize=8)
+    ax.invert_yaxis()
+    ax.xaxis_date()
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%d %b %y'))
+    ax.tick_params(axis='x', labelsize=8)
+    ax.grid(axis='x', color='#e5e7eb', linewidth=0.5)
+    if title:
+        ax.set_title(title, fontsize=10, color='#003366')
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
@@ -0,0 +1,136 @@
+"""Data migrations that remove rows, run explicitly rather than on page load.
+
+Weekly and milestone updates are keyed by unique (project, week) and (milestone, week)
+indexes. Databases that predate them may hold repeated submissions, which must be resolved
+before an index can be built. The app only creates an index when there is nothing to
+resolve, and otherwise asks for:
+
+    python migrations.py dedupe-updates
+
+The latest submission (highest update_id) for each key is kept. The others are moved, not
+deleted, into the matching _Duplicates table so they can be inspected or restored.
+"""
+import argparse
+
+from sqlalchemy import text
+
+from archive import ARCHIVED_MILESTONE_COLUMNS, ARCHIVED_WEEKLY_COLUMNS, _deleted
+from db import create_db_engine
+
+# Table -> (unique index, key columns, included columns, columns preserved, backup table DDL)
+UNIQUE_UPDATE_KEYS = {
+    'qeWeekly_Updates': (
+        'UX_qeWeekly_Updates_project_week', 'project_id, week_ending_date', None, ARCHIVED_WEEKLY_COLUMNS,
+        """
+        CREATE TABLE qeWeekly_Updates_Duplicates (
+            update_id INT PRIMARY KEY,
+            project_id INT NOT NULL,
+            week_ending_date DATE,
+            qe_overall_status NVARCHAR(10),
+            qe_progress_percentage INT,
+            current_week_progress_entry NVARCHAR(MAX),
+            next_release_date DATE,
+            qe_team_size INT,
+            qe_current_week_task NVARCHAR(MAX),
+            qe_automation_tools_used NVARCHAR(MAX),
+            tc_created INT,
+            tc_executed INT,
+            tc_passed_first_round INT,
+            effort_tc_execution FLOAT,
+            tc_automated INT,
+            effort_tc_automation FLOAT,
+            defects_raised_internal INT,
+            sit_defects INT,
+            uat_defects INT,
+            reopened_defects INT,
+            removed_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+        )
+        """
+    ),
+    'Milestone_Updates': (
+        'UX_Milestone_Updates_milestone_week', 'milestone_id, week_ending_date', 'actual_progress', ARCHIVED_MILESTONE_COLUMNS,
+        """
+        CREATE TABLE Milestone_Updates_Duplicates (
+            update_id INT PRIMARY KEY,
+            milestone_id INT NOT NULL,
+            week_ending_date DATE NOT NULL,
+            actual_progress FLOAT NOT NULL,
+            removed_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+        )
+        """
+    ),
+}
+
+
+def count_duplicate_updates(conn, table):
+    """Rows that dedupe_updates would move: every submission for a key except the latest."""
+    key = UNIQUE_UPDATE_KEYS[table][1]
+    return conn.execute(text(f"""
+        SELECT COALESCE(SUM(copies - 1), 0)
+        FROM (SELECT COUNT(*) AS copies FROM {table} GROUP BY {key} HAVING COUNT(*) > 1) d
+    """)).scalar()
+
+
+def create_unique_update_index(conn, table):
+    index, key, include, _, _ = UNIQUE_UPDATE_KEYS[table]
+    conn.execute(text(f"CREATE UNIQUE INDEX {index} ON {table} ({key})" + (f" INCLUDE ({include})" if include else "")))
+
+
+def ensure_unique_update_indexes(conn, existing_indexes):
+    """Create missing unique update indexes where no duplicates block them.
+
+    Returns {table: duplicate rows} for the tables that still need dedupe_updates.
+    """
+    pending = {}
+    for table, (index, *_) in UNIQUE_UPDATE_KEYS.items():
+        if index in existing_indexes:
+            continue
+        duplicates = count_duplicate_updates(conn, table)
+        if duplicates:
+            pending[table] = duplicates
+        else:
+            create_unique_update_index(conn, table)
+    return pending
+
+
+def dedupe_updates(conn, table):
+    """Move all but the latest submission per key into the _Duplicates table, then add the unique index.
+
+    Runs in one transaction and returns the number of rows moved.
+    """
+    index, key, _, columns, backup_ddl = UNIQUE_UPDATE_KEYS[table]
+    backup = f"{table}_Duplicates"
+    try:
+        conn.execute(text(f"IF OBJECT_ID('{backup}') IS NULL {backup_ddl}"))
+        moved = conn.execute(text(f"""
+            WITH ranked AS (
+                SELECT {columns}, ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY update_id DESC) AS rn
+                FROM {table}
+            )
+            DELETE FROM ranked
+            OUTPUT {_deleted(columns)} INTO {backup} ({columns})
+            WHERE rn > 1
+        """)).rowcount
+        if not conn.execute(text("SELECT 1 FROM sys.indexes WHERE name = :name"), {'name': index}).first():
+            create_unique_update_index(conn, table)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run QE tracker data migrations")
+    parser.add_argument('migration', choices=['dedupe-updates'])
+    parser.add_argument('--dry-run', action='store_true', help="only report how many rows would be moved")
+    args = parser.parse_args()
+
+    engine = create_db_engine()
+    with engine.connect() as conn:
+        for table in UNIQUE_UPDATE_KEYS:
+            if args.dry_run:
+                print(f"{table}: {count_duplicate_updates(conn, table)} duplicate rows would be moved to {table}_Duplicates")
+            else:
+                print(f"{table}: moved {dedupe_updates(conn, table)} duplicate rows to {table}_Duplicates")
+    engine.dispose()
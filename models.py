@@ -0,0 +1,185 @@
+"""Table metadata and typed row models for the QE tracker tables.
+
+The Core tables mirror the DDL in app.init_db() and are used to build queries, not to create
+tables. Selecting through them lets the mssql dialect hand back DATE columns as `date`
+objects on every TDS version. Rows are then wrapped in NamedTuples: they are as compact as
+plain tuples, but fields are read by name, so a reordered SELECT cannot shift values into
+the wrong field.
+"""
+from datetime import date
+from typing import NamedTuple, Optional
+
+from sqlalchemy import Column, Date, Float, Integer, MetaData, Table, Unicode, UnicodeText
+
+metadata = MetaData()
+
+projects = Table(
+    'qeProjects', metadata,
+    Column('project_id', Integer, primary_key=True),
+    Column('project_name', Unicode(255), nullable=False),
+    Column('client', Unicode(255)),
+    Column('project_spoc', Unicode(255)),
+    Column('technology_used', Unicode(255)),
+    Column('artifacts_link', UnicodeText),
+    Column('project_status', Unicode(20), nullable=False),
+)
+
+
+def _weekly_update_columns():
+    return [
+        Column('update_id', Integer, primary_key=True),
+        Column('project_id', Integer, nullable=False),
+        Column('week_ending_date', Date),
+        Column('qe_overall_status', Unicode(10)),
+        Column('qe_progress_percentage', Integer),
+        Column('current_week_progress_entry', UnicodeText),
+        Column('next_release_date', Date),
+        Column('qe_team_size', Integer),
+        Column('qe_current_week_task', UnicodeText),
+        Column('qe_automation_tools_used', UnicodeText),
+        Column('tc_created', Integer),
+        Column('tc_executed', Integer),
+        Column('tc_passed_first_round', Integer),
+        Column('effort_tc_execution', Float),
+        Column('tc_automated', Integer),
+        Column('effort_tc_automation', Float),
+        Column('defects_raised_internal', Integer),
+        Column('sit_defects', Integer),
+        Column('uat_defects', Integer),
+        Column('reopened_defects', Integer),
+    ]
+
+
+def _milestone_update_columns():
+    return [
+        Column('update_id', Integer, primary_key=True),
+        Column('milestone_id', Integer, nullable=False),
+        Column('week_ending_date', Date, nullable=False),
+        Column('actual_progress', Float, nullable=False),
+    ]
+
+
+weekly_updates = Table('qeWeekly_Updates', metadata, *_weekly_update_columns())
+# Views over the hot and archived tiers together (see archive.py)
+all_weekly_updates = Table('qeWeekly_Updates_All', metadata, *_weekly_update_columns())
+
+milestones = Table(
+    'Milestones', metadata,
+    Column('milestone_id', Integer, primary_key=True),
+    Column('project_id', Integer, nullable=False),
+    Column('parent_milestone_id', Integer),
+    Column('milestone_name', Unicode(255), nullable=False),
+    Column('planned_start_date', Date, nullable=False),
+    Column('planned_end_date', Date, nullable=False),
+    Column('total_days', Integer, nullable=False),
+    Column('weightage', Float, nullable=False),
+    Column('notes', UnicodeText),
+)
+
+milestone_updates = Table('Milestone_Updates', metadata, *_milestone_update_columns())
+all_milestone_updates = Table('Milestone_Updates_All', metadata, *_milestone_update_columns())
+
+
+class Project(NamedTuple):
+    project_id: int
+    project_name: str
+    client: Optional[str]
+    project_spoc: Optional[str]
+    technology_used: Optional[str]
+    artifacts_link: Optional[str]
+    project_status: str
+
+
+class WeeklyUpdate(NamedTuple):
+    """A weekly update joined with the project it belongs to."""
+    update_id: int
+    week_ending_date: date
+    project_id: int
+    project_name: str
+    client: Optional[str]
+    project_spoc: Optional[str]
+    technology_used: Optional[str]
+    artifacts_link: Optional[str]
+    qe_overall_status: Optional[str]
+    qe_progress_percentage: Optional[int]
+    current_week_progress_entry: Optional[str]
+    next_release_date: Optional[date]
+    qe_team_size: Optional[int]
+    qe_current_week_task: Optional[str]
+    qe_automation_tools_used: Optional[str]
+    tc_created: Optional[int]
+    tc_executed: Optional[int]
+    tc_passed_first_round: Optional[int]
+    effort_tc_execution: Optional[float]
+    tc_automated: Optional[int]
+    effort_tc_automation: Optional[float]
+    defects_raised_internal: Optional[int]
+    sit_defects: Optional[int]
+    uat_defects: Optional[int]
+    reopened_defects: Optional[int]
+    # Change since the project's previous update (services.WEEKLY_DELTA_COLUMNS)
+    qe_progress_percentage_delta: Optional[int] = None
+    tc_executed_delta: Optional[int] = None
+    tc_automated_delta: Optional[int] = None
+    defects_raised_internal_delta: Optional[int] = None
+    sit_defects_delta: Optional[int] = None
+    uat_defects_delta: Optional[int] = None
+    reopened_defects_delta: Optional[int] = None
+
+
+class Milestone(NamedTuple):
+    milestone_id: int
+    milestone_name: str
+    parent_milestone_id: Optional[int]
+    planned_start_date: date
+    planned_end_date: date
+    total_days: int
+    weightage: float
+
+
+class MilestoneStatus(NamedTuple):
+    """A milestone with its progress for one week; progress values are percentages."""
+    milestone_id: int
+    name: str
+    parent_id: Optional[int]
+    planned_start: date
+    planned_end: date
+    total_days: int
+    weightage: float
+    current_status: str
+    actual_progress: float
+    expected_progress: float
+    rag: str
+    notes: Optional[str]
+    progress_delta: Optional[float] = None
+    forecast_slip: str = ""
+
+
+class RollupSummary(NamedTuple):
+    """One week's KPIs summed over the projects of a client or SPOC.
+
+    Milestone progress values are percentages: the average over projects of each project's
+    weightage-weighted top-level milestone progress.
+    """
+    group_name: Optional[str]
+    projects: int
+    green: int
+    amber: int
+    red: int
+    avg_progress: Optional[float]
+    tc_created: Optional[int]
+    tc_executed: Optional[int]
+    tc_passed_first_round: Optional[int]
+    tc_automated: Optional[int]
+    defects_raised_internal: Optional[int]
+    sit_defects: Optional[int]
+    uat_defects: Optional[int]
+    reopened_defects: Optional[int]
+    milestone_progress: Optional[float]
+    milestone_expected: Optional[float]
+    milestone_rag: str = ""
+
+
+def select_columns(table, model):
+    """The table's columns in the model's field order."""
+    return [table.c[field] for field in model._fields]
@@ -0,0 +1,220 @@
+"""HTML and PDF rendering of the weekly QE report and its client/SPOC roll-ups.
+
+Nothing here depends on Streamlit, so scheduled jobs render exactly what the app offers for
+download.
+"""
+import base64
+import io
+
+from xhtml2pdf import pisa
+
+from anomalies import describe_anomaly
+
+REPORT_STYLE = """
+    body { font-family: Arial, sans-serif; margin: 20px; line-height: 1.5; }
+    h2 { color: #003366; margin-bottom: 10px; }
+    h4 { color: #004080; margin-top: 15px; margin-bottom: 8px; }
+    p { margin: 5px 0; }
+    ul { margin: 5px 0; padding-left: 25px; }
+    li { margin-bottom: 5px; }
+    .project-container { margin-bottom: 30px; page-break-inside: avoid; }
+    .header { text-align: center; margin-bottom: 20px; }
+    .status-green { color: green; }
+    .status-amber { color: orange; }
+    .status-red { color: red; }
+    table { width: 100%; border-collapse: collapse; margin-top: 10px; }
+    th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+    th { background-color: #f2f2f2; }
+    .sub-milestone { padding-left: 20px; }
+    .anomaly { color: #b45309; }
+    .gantt { width: 100%; }
+"""
+
+MILESTONE_TABLE_COLUMNS = [
+    'Milestone', 'Planned Start Date', 'Planned End Date', 'Total Days', 'Weightage', 'Current Status',
+    'Actual Progress %', 'Expected Progress %', 'Progress Status (RAG)', 'Forecast Slip', 'Notes'
+]
+
+
+def convert_html_to_pdf(html_content):
+    result = io.BytesIO()
+    pdf = pisa.pisaDocument(io.StringIO(html_content), dest=result)
+    if not pdf.err:
+        return result.getvalue()
+    return None
+
+
+def format_delta(delta, unit=""):
+    """Render a week-over-week change, or nothing when there is no previous update to compare with."""
+    if delta is None:
+        return ""
+    return " (no change)" if delta == 0 else f" ({delta:+g}{unit} WoW)"
+
+
+def _html_list(value, empty):
+    return "".join(f"<li>{line.strip()}</li>" for line in (value or '').splitlines() if line.strip()) or f"<li>{empty}</li>"
+
+
+def _milestone_cells(m):
+    return [
+        m.name, m.planned_start, m.planned_end, m.total_days, f"{m.weightage*100}%" if m.weightage else "",
+        m.current_status, f"{m.actual_progress}%{format_delta(m.progress_delta, ' pts')}", f"{m.expected_progress}%",
+        m.rag, m.forecast_slip, m.notes
+    ]
+
+
+def milestone_rows(milestone_list):
+    """MilestoneStatus rows as MILESTONE_TABLE_COLUMNS dicts for the in-app preview tables."""
+    rows = []
+    for m in milestone_list:
+        row = dict(zip(MILESTONE_TABLE_COLUMNS, _milestone_cells(m)))
+        row['Milestone'] = m.name if m.parent_id is None else f"  - {m.name}"
+        rows.append(row)
+    return rows
+
+
+def milestone_table_html(milestone_list, empty="No milestones available"):
+    """The milestone tracking table shared by the weekly report and the milestone updates PDF."""
+    header = "".join(f"<th>{column}</th>" for column in MILESTONE_TABLE_COLUMNS)
+    rows = "".join(
+        f'<tr><td class="{"" if m.parent_id is None else "sub-milestone"}">{m.name}</td>'
+        + "".join(f"<td>{value}</td>" for value in _milestone_cells(m)[1:]) + "</tr>"
+        for m in milestone_list
+    ) or f'<tr><td colspan="{len(MILESTONE_TABLE_COLUMNS)}">{empty}</td></tr>'
+    return f"<table><tr>{header}</tr>{rows}</table>"
+
+
+def report_document(title, subtitle, body):
+    """Wrap report sections in the shared page layout."""
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>{REPORT_STYLE}</style>
+    </head>
+    <body>
+        <div class="header">
+            <h2>{title}</h2>
+            <p>{subtitle}</p>
+        </div>
+        {body}
+    </body>
+    </html>
+    """
+
+
+def project_section_html(details, milestone_list, anomalies, page_break=False):
+    """One project's weekly report: its WeeklyUpdate, MilestoneStatus rows and anomaly flags by project."""
+    flags = anomalies.get(details.project_id)
+    return f"""
+    <div class="project-container" style="{'page-break-before: always;' if page_break else ''}">
+        <h2>{details.project_name}</h2>
+        <p><strong>Client:</strong> {details.client}</p>
+        <p><strong>Project SPOC:</strong> {details.project_spoc}</p>
+        <p><strong>Technology Used:</strong> {details.technology_used}</p>
+        <p><strong>Artifacts Link:</strong> <a href="{details.artifacts_link}">{details.artifacts_link}</a></p>
+
+        <h4>QE Status & Progress</h4>
+        <p><strong>Overall Status:</strong> <span class="status-{details.qe_overall_status.lower()}">{details.qe_overall_status}</span></p>
+        <p><strong>Progress Percentage:</strong> {details.qe_progress_percentage}%{format_delta(details.qe_progress_percentage_delta, ' pts')}</p>
+        <p><strong>Next Release Date:</strong> {details.next_release_date or 'N/A'}</p>
+        <h5>Current Week Progress Entry</h5>
+        <ul>
+            {_html_list(details.current_week_progress_entry, "No entry")}
+        </ul>
+
+        <h4>QE Team & Resources</h4>
+        <p><strong>Team Size:</strong> {details.qe_team_size}</p>
+        <h5>Current Week Task</h5>
+        <ul>
+            {_html_list(details.qe_current_week_task, "No tasks")}
+        </ul>
+        <h5>Automation Tools Used</h5>
+        <ul>
+            {_html_list(details.qe_automation_tools_used, "None")}
+        </ul>
+
+        <h4>Test Case Metrics</h4>
+        <p><strong>#TC Created:</strong> {details.tc_created}</p>
+        <p><strong>#TC Executed:</strong> {details.tc_executed}{format_delta(details.tc_executed_delta)}</p>
+        <p><strong>#TC Passed in First Round:</strong> {details.tc_passed_first_round}</p>
+        <p><strong>Effort on TC Execution:</strong> {details.effort_tc_execution} hours</p>
+        <p><strong>#TC Automated:</strong> {details.tc_automated}{format_delta(details.tc_automated_delta)}</p>
+        <p><strong>Effort on TC Automation:</strong> {details.effort_tc_automation} hours</p>
+
+        <h4>Defects & Quality Metrics</h4>
+        <p><strong>Defects Raised (Internal):</strong> {details.defects_raised_internal}{format_delta(details.defects_raised_internal_delta)}</p>
+        <p><strong>#SIT Defects:</strong> {details.sit_defects}{format_delta(details.sit_defects_delta)}</p>
+        <p><strong>#UAT Defects:</strong> {details.uat_defects}{format_delta(details.uat_defects_delta)}</p>
+        <p><strong>#Reopened Defects:</strong> {details.reopened_defects}{format_delta(details.reopened_defects_delta)}</p>
+        {('<h4 class="anomaly">Data Quality Flags</h4><ul>' + "".join(f'<li class="anomaly">{describe_anomaly(flag)}</li>' for flag in flags) + '</ul>') if flags else ''}
+
+        <h4 style="page-break-before: always;">Milestone Tracking</h4>
+        {milestone_table_html(milestone_list)}
+    </div>
+    """
+
+
+def _percent(value):
+    return "N/A" if value is None else f"{value:.1f}%"
+
+
+def rollup_summary_html(summary, dimension, sections):
+    """Cover page for one client or SPOC: its RollupSummary and a line per project."""
+    return f"""
+    <div class="project-container">
+        <h2>{dimension}: {summary.group_name or 'Unassigned'}</h2>
+        <h4>Portfolio Summary</h4>
+        <table>
+            <tr><th>Projects</th><th>GREEN</th><th>AMBER</th><th>RED</th><th>Avg. Progress</th>
+                <th>Milestone Progress (weighted)</th><th>Expected</th><th>Milestone Status</th></tr>
+            <tr><td>{summary.projects}</td><td>{summary.green}</td><td>{summary.amber}</td><td>{summary.red}</td>
+                <td>{_percent(summary.avg_progress)}</td><td>{_percent(summary.milestone_progress)}</td>
+                <td>{_percent(summary.milestone_expected)}</td><td>{summary.milestone_rag}</td></tr>
+        </table>
+        <table>
+            <tr><th>#TC Created</th><th>#TC Executed</th><th>#TC Passed in First Round</th><th>#TC Automated</th>
+                <th>Internal Defects</th><th>SIT Defects</th><th>UAT Defects</th><th>Reopened Defects</th></tr>
+            <tr><td>{summary.tc_created}</td><td>{summary.tc_executed}</td><td>{summary.tc_passed_first_round}</td>
+                <td>{summary.tc_automated}</td><td>{summary.defects_raised_internal}</td><td>{summary.sit_defects}</td>
+                <td>{summary.uat_defects}</td><td>{summary.reopened_defects}</td></tr>
+        </table>
+
+        <h4>Projects</h4>
+        <table>
+            <tr><th>Project</th><th>Overall Status</th><th>Progress %</th><th>#TC Executed</th><th>#TC Automated</th><th>SIT / UAT Defects</th></tr>
+            {''.join(
+                f'<tr><td>{d.project_name}</td><td class="status-{d.qe_overall_status.lower()}">{d.qe_overall_status}</td>'
+                f'<td>{d.qe_progress_percentage}%{format_delta(d.qe_progress_percentage_delta, " pts")}</td>'
+                f'<td>{d.tc_executed}</td><td>{d.tc_automated}</td><td>{d.sit_defects} / {d.uat_defects}</td></tr>'
+                for d, _ in sections
+            )}
+        </table>
+    </div>
+    """
+
+
+def milestone_updates_document(project_name, week_ending_date, milestone_list, gantt_png):
+    """A project's milestone table for one week followed by its Gantt chart."""
+    body = f"""
+        <h4>Milestone Tracking</h4>
+        {milestone_table_html(milestone_list, "No milestone updates available")}
+        <h4 style="page-break-before: always;">Milestone Timeline</h4>
+        <img class="gantt" src="data:image/png;base64,{base64.b64encode(gantt_png).decode('ascii')}" />
+    """
+    return report_document(
+        f"Milestone Updates for {project_name}", f"Week Ending: {week_ending_date.strftime('%Y-%m-%d')}", body
+    )
+
+
+def rollup_document(week_ending_date, dimension, summary, sections, anomalies):
+    """One consolidated report for a client or SPOC: the roll-up followed by each project's section."""
+    body = rollup_summary_html(summary, dimension, sections) + "".join(
+        project_section_html(details, milestone_list, anomalies, page_break=True)
+        for details, milestone_list in sections
+    )
+    return report_document(
+        f"{dimension} QE Status Report: {summary.group_name or 'Unassigned'}",
+        f"Week Ending: {week_ending_date.strftime('%Y-%m-%d')}",
+        body
+    )
@@ -0,0 +1,562 @@
+"""Read-side data access shared by the Streamlit app and the JSON API.
+
+Functions here take an open SQLAlchemy connection and return plain Python values, DataFrames
+or the row models in models.py, so they can run outside a Streamlit script.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, and_, case, cast, false, func, literal_column, or_, select, text, true
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import Join
+
+from models import (
+    MilestoneStatus, Project, RollupSummary, WeeklyUpdate, all_milestone_updates, all_weekly_updates,
+    milestone_updates, milestones, projects, select_columns, weekly_updates
+)
+
+PROJECT_PAGE_SIZE = 50
+# Weekly metrics reported with their change since the previous update
+WEEKLY_DELTA_COLUMNS = [
+    'qe_progress_percentage', 'tc_executed', 'tc_automated',
+    'defects_raised_internal', 'sit_defects', 'uat_defects', 'reopened_defects'
+]
+# Connections one report request may hold at once
+REPORT_QUERY_WORKERS = 4
+# Roll-up report groupings -> qeProjects column
+ROLLUP_DIMENSIONS = {'Client': 'client', 'SPOC': 'project_spoc'}
+ROLLUP_SUM_COLUMNS = [
+    'tc_created', 'tc_executed', 'tc_passed_first_round', 'tc_automated',
+    'defects_raised_internal', 'sit_defects', 'uat_defects', 'reopened_defects'
+]
+
+def as_date(value):
+    """Normalise DATE values from raw SQL or API input, which may be 'YYYY-MM-DD' strings."""
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def derive_milestone_status(actual_progress, start, end, total_days, reference_date):
+    """Return (current status, expected progress, RAG) for progress given as a 0-1 fraction."""
+    current_status = (
+        "✅Completed" if actual_progress == 1
+        else "⏳ Pending" if actual_progress == 0
+        else "🕒 In Progress"
+    )
+    expected_progress = 0
+    if start and end and total_days:
+        if reference_date <= start:
+            expected_progress = 0
+        elif reference_date > end:
+            expected_progress = 1
+        else:
+            expected_progress = (reference_date - start).days / total_days
+    rag = "" if not start or start > reference_date else progress_rag(actual_progress, expected_progress)
+    return current_status, expected_progress, rag
+
+
+def progress_rag(actual_progress, expected_progress):
+    """RAG for progress against plan, both as 0-1 fractions."""
+    return (
+        "🚩 Critical" if actual_progress < expected_progress - 0.2
+        else "⚠️ At Risk" if actual_progress < expected_progress - 0.05
+        else "✅ On Track"
+    )
+
+
+def fetch_project_page(conn, search="", status="Active", after=None, limit=PROJECT_PAGE_SIZE):
+    """Return up to `limit` + 1 projects ordered by (project_name, project_id).
+
+    `search` is a prefix matched against project_name or client, and `after` is the
+    (project_name, project_id) key of the last row on the previous page.
+    """
+    query = select(*select_columns(projects, Project)).where(projects.c.project_status == status)
+    if search:
+        # Escape LIKE wildcards so the search stays a plain prefix seek
+        pattern = search.replace('[', '[[]').replace('%', '[%]').replace('_', '[_]') + '%'
+        query = query.where(or_(projects.c.project_name.like(pattern), projects.c.client.like(pattern)))
+    if after is not None:
+        after_name, after_id = after
+        query = query.where(or_(
+            projects.c.project_name > after_name,
+            and_(projects.c.project_name == after_name, projects.c.project_id > after_id)
+        ))
+    query = query.order_by(projects.c.project_name, projects.c.project_id).limit(limit + 1)
+    return [Project._make(row) for row in conn.execute(query)]
+
+
+class OuterApply(Join):
+    """`left OUTER APPLY right` for a lateral subquery, which SQL Server spells without LATERAL."""
+    inherit_cache = True
+
+    def __init__(self, left, right):
+        super().__init__(left, right, true(), isouter=True)
+
+
+@compiles(OuterApply, 'mssql')
+def _compile_outer_apply(element, compiler, **kw):
+    kw['asfrom'] = True
+    return f"{compiler.process(element.left, **kw)} OUTER APPLY {compiler.visit_alias(element.right, lateral=True, **kw)}"
+
+
+def rollup_group_filter(dimension, group_names):
+    """Condition on qeProjects matching any of the client or SPOC names; None is the unassigned group."""
+    column = projects.c[ROLLUP_DIMENSIONS[dimension]]
+    names = [name for name in group_names if name is not None]
+    conditions = [column.in_(names)] if names else []
+    if None in group_names:
+        conditions.append(column.is_(None))
+    return or_(false(), *conditions)
+
+
+def fetch_weekly_updates(conn, week_ending_date=None, project_id=None, after=None, limit=None, include_archive=False,
+                         dimension=None, group_names=None):
+    """Return weekly updates joined with their project, newest week first.
+
+    Each update carries `<metric>_delta` fields for WEEKLY_DELTA_COLUMNS, the change since the
+    project's previous update (None for its first). `after` is the (week_ending_date, update_id)
+    key of the last row already returned. When `limit` is given, up to `limit` + 1 rows are
+    returned so callers can tell if more exist. Only the hot tier is read unless
+    `include_archive` is set. With `dimension` and `group_names`, only projects of those
+    clients or SPOCs are returned.
+    """
+    w = all_weekly_updates if include_archive else weekly_updates
+    page = select(w)
+    if week_ending_date is not None:
+        page = page.where(w.c.week_ending_date == as_date(week_ending_date))
+    if project_id is not None:
+        page = page.where(w.c.project_id == project_id)
+    if group_names is not None:
+        page = page.where(w.c.project_id.in_(
+            select(projects.c.project_id).where(rollup_group_filter(dimension, group_names))
+        ))
+    if after is not None:
+        after_week, after_id = as_date(after[0]), after[1]
+        page = page.where(or_(
+            w.c.week_ending_date < after_week,
+            and_(w.c.week_ending_date == after_week, w.c.update_id < after_id)
+        ))
+    if limit is not None:
+        page = page.order_by(w.c.week_ending_date.desc(), w.c.update_id.desc()).limit(limit + 1)
+    page = page.subquery('w')
+
+    # Only the page's rows look up their project's previous submission: one TOP 1 seek each,
+    # backwards along the (project_id, week_ending_date) unique index
+    earlier = w.alias('earlier')
+    previous = (
+        select(*[earlier.c[column] for column in WEEKLY_DELTA_COLUMNS])
+        .where(earlier.c.project_id == page.c.project_id, earlier.c.week_ending_date < page.c.week_ending_date)
+        .order_by(earlier.c.week_ending_date.desc())
+        .limit(1)
+        .lateral('previous')
+    )
+    deltas = {f'{column}_delta': page.c[column] - previous.c[column] for column in WEEKLY_DELTA_COLUMNS}
+
+    query = (
+        select(*[
+            projects.c[field] if field in projects.c else
+            deltas[field].label(field) if field in deltas else
+            page.c[field]
+            for field in WeeklyUpdate._fields
+        ])
+        .select_from(OuterApply(page.join(projects, page.c.project_id == projects.c.project_id), previous))
+        .order_by(page.c.week_ending_date.desc(), page.c.update_id.desc())
+    )
+    return [WeeklyUpdate._make(row) for row in conn.execute(query)]
+
+
+def fetch_milestone_status(conn, project_id, week_ending_date):
+    """Return the project's milestones with their progress and RAG status for a week, from either tier.
+
+    `progress_delta` is the change in percentage points since the milestone's previous update.
+    """
+    m, mu = milestones, all_milestone_updates
+    week = as_date(week_ending_date)
+    updates = (
+        select(
+            mu.c.milestone_id, mu.c.week_ending_date, mu.c.actual_progress,
+            (mu.c.actual_progress - func.lag(mu.c.actual_progress).over(
+                partition_by=mu.c.milestone_id, order_by=mu.c.week_ending_date
+            )).label('progress_delta')
+        )
+        .where(mu.c.week_ending_date <= week)
+        .where(mu.c.milestone_id.in_(select(m.c.milestone_id).where(m.c.project_id == project_id)))
+        .subquery('mu')
+    )
+    query = (
+        select(m.c.milestone_id, m.c.milestone_name, m.c.parent_milestone_id, m.c.planned_start_date,
+               m.c.planned_end_date, m.c.total_days, m.c.weightage, m.c.notes,
+               updates.c.actual_progress, updates.c.progress_delta)
+        .select_from(m.outerjoin(updates, and_(
+            updates.c.milestone_id == m.c.milestone_id, updates.c.week_ending_date == week
+        )))
+        .where(m.c.project_id == project_id)
+        .order_by(m.c.parent_milestone_id, m.c.milestone_id)
+    )
+    statuses = []
+    for row in conn.execute(query):
+        actual_progress = row.actual_progress or 0.0
+        current_status, expected_progress, rag = derive_milestone_status(
+            actual_progress, row.planned_start_date, row.planned_end_date, row.total_days, week_ending_date
+        )
+        statuses.append(MilestoneStatus(
+            milestone_id=row.milestone_id,
+            name=row.milestone_name,
+            parent_id=row.parent_milestone_id,
+            planned_start=row.planned_start_date,
+            planned_end=row.planned_end_date,
+            total_days=row.total_days,
+            weightage=row.weightage,
+            current_status=current_status,
+            actual_progress=actual_progress * 100,
+            expected_progress=expected_progress * 100,
+            rag=rag,
+            notes=row.notes,
+            progress_delta=None if row.progress_delta is None else row.progress_delta * 100
+        ))
+    return statuses
+
+
+def fetch_latest_weekly_update(conn, project_id):
+    """Return the project's most recent weekly update as a dict, or None.
+
+    A TOP 1 read backwards along the (project_id, week_ending_date) unique index.
+    """
+    w = weekly_updates
+    query = select(w).where(w.c.project_id == project_id).order_by(w.c.week_ending_date.desc()).limit(1)
+    row = conn.execute(query).first()
+    return None if row is None else row._asdict()
+
+
+def fetch_latest_milestone_progress(conn, project_id):
+    """Return {milestone_id: actual_progress} from each milestone's most recent update.
+
+    Ranked per milestone on the (milestone_id, week_ending_date) index, which covers actual_progress.
+    """
+    mu = milestone_updates
+    ranked = (
+        select(
+            mu.c.milestone_id, mu.c.actual_progress,
+            func.row_number().over(partition_by=mu.c.milestone_id, order_by=mu.c.week_ending_date.desc()).label('recency')
+        )
+        .where(mu.c.milestone_id.in_(select(milestones.c.milestone_id).where(milestones.c.project_id == project_id)))
+        .subquery('ranked')
+    )
+    rows = conn.execute(select(ranked.c.milestone_id, ranked.c.actual_progress).where(ranked.c.recency == 1))
+    return {row.milestone_id: row.actual_progress for row in rows}
+
+
+def _project_milestone_progress(week_ending_date):
+    """Subquery of each project's weightage-weighted top-level milestone progress for a week.
+
+    Expected progress follows derive_milestone_status, so roll-ups agree with the report tables.
+    """
+    m, mu = milestones, milestone_updates
+    week = as_date(week_ending_date)
+    expected = case(
+        (m.c.planned_start_date >= week, 0.0),
+        (m.c.planned_end_date < week, 1.0),
+        else_=func.coalesce(
+            cast(func.datediff(literal_column('day'), m.c.planned_start_date, week), Float) / func.nullif(m.c.total_days, 0),
+            0.0
+        )
+    )
+    total_weight = func.nullif(func.sum(m.c.weightage), 0)
+    return (
+        select(
+            m.c.project_id,
+            (func.sum(m.c.weightage * func.coalesce(mu.c.actual_progress, 0.0)) / total_weight).label('actual'),
+            (func.sum(m.c.weightage * expected) / total_weight).label('expected')
+        )
+        .select_from(m.outerjoin(mu, and_(mu.c.milestone_id == m.c.milestone_id, mu.c.week_ending_date == week)))
+        .where(m.c.parent_milestone_id.is_(None))
+        .group_by(m.c.project_id)
+        .subquery('ms')
+    )
+
+
+def fetch_rollup_summaries(conn, week_ending_date, dimension, group_name=None):
+    """Return one RollupSummary per client or SPOC (`dimension` is a ROLLUP_DIMENSIONS key).
+
+    Aggregates the week's updates with one GROUP BY: the week's slice of qeWeekly_Updates is
+    read from the covering IX_qeWeekly_Updates_week_rollup index and joined to qeProjects on
+    its primary key for the grouping column.
+    """
+    week = as_date(week_ending_date)
+    w, p, ms = weekly_updates, projects, _project_milestone_progress(week)
+    group = p.c[ROLLUP_DIMENSIONS[dimension]]
+
+    def status_count(status):
+        return func.sum(case((w.c.qe_overall_status == status, 1), else_=0))
+
+    query = (
+        select(
+            group.label('group_name'),
+            func.count().label('projects'),
+            status_count('GREEN').label('green'),
+            status_count('AMBER').label('amber'),
+            status_count('RED').label('red'),
+            func.avg(cast(w.c.qe_progress_percentage, Float)).label('avg_progress'),
+            *[func.sum(w.c[column]).label(column) for column in ROLLUP_SUM_COLUMNS],
+            (func.avg(ms.c.actual) * 100).label('milestone_progress'),
+            (func.avg(ms.c.expected) * 100).label('milestone_expected')
+        )
+        .select_from(w.join(p, p.c.project_id == w.c.project_id).outerjoin(ms, ms.c.project_id == w.c.project_id))
+        .where(w.c.week_ending_date == week)
+        .group_by(group)
+        .order_by(group)
+    )
+    if group_name is not None:
+        query = query.where(group == group_name)
+
+    summaries = []
+    for row in conn.execute(query):
+        summary = RollupSummary(*row)
+        if summary.milestone_progress is not None:
+            summary = summary._replace(milestone_rag=progress_rag(summary.milestone_progress / 100, summary.milestone_expected / 100))
+        summaries.append(summary)
+    return summaries
+
+
+def group_report_sections(sections, dimension):
+    """Group (WeeklyUpdate, milestones) report sections by client or SPOC, keeping report order."""
+    column = ROLLUP_DIMENSIONS[dimension]
+    groups = {}
+    for details, milestone_list in sections:
+        groups.setdefault(getattr(details, column), []).append((details, milestone_list))
+    return groups
+
+
+def _run_query(engine, query):
+    with engine.connect() as conn:
+        return query(conn)
+
+
+def run_concurrently(engine, queries, max_workers=REPORT_QUERY_WORKERS):
+    """Run independent read queries at once, each on its own pooled connection.
+
+    `queries` maps a key to a callable taking a connection, and results come back under the
+    same keys.
+    """
+    if not queries:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as pool:
+        futures = {key: pool.submit(_run_query, engine, query) for key, query in queries.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+
+def _iter_report_sections(engine, week_ending_date, updates, milestones, max_workers):
+    """Yield (update, milestones) in report order, each as soon as its milestone query returns."""
+    if milestones is not None:
+        yield from ((update, milestones) for update in updates)
+        return
+    if not updates:
+        return
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(updates)))
+    try:
+        futures = [
+            pool.submit(_run_query, engine, lambda conn, pid=update.project_id: fetch_milestone_status(conn, pid, week_ending_date))
+            for update in updates
+        ]
+        for update, future in zip(updates, futures):
+            yield update, future.result()
+    finally:
+        # A caller that stops early should not wait on queries it will never read
+        pool.shutdown(cancel_futures=True)
+
+
+def stream_weekly_report(engine, week_ending_date, project_id=None, extra_queries=None,
+                         max_workers=REPORT_QUERY_WORKERS, dimension=None, group_names=None):
+    """Load the weekly report for one project or the whole portfolio with concurrent queries.
+
+    The updates and any `extra_queries` (a mapping as for run_concurrently) run together first;
+    for a single project its milestones join that round. Returns (extra results, sections),
+    where `sections` is a generator of (WeeklyUpdate, [MilestoneStatus]) in report order. For
+    the portfolio, each project's milestones are fetched in the background and its section is
+    yielded as soon as they arrive, so callers can render the first project without waiting
+    for the last. `dimension` and `group_names` limit the portfolio to some clients or SPOCs.
+    """
+    queries = dict(extra_queries or {})
+    queries['updates'] = lambda conn: fetch_weekly_updates(
+        conn, week_ending_date=week_ending_date, project_id=project_id, include_archive=project_id is not None,
+        dimension=dimension, group_names=group_names
+    )
+    if project_id is not None:
+        queries['milestones'] = lambda conn: fetch_milestone_status(conn, project_id, week_ending_date)
+    results = run_concurrently(engine, queries, max_workers)
+
+    updates, milestones = results.pop('updates'), results.pop('milestones', None)
+    return results, _iter_report_sections(engine, week_ending_date, updates, milestones, max_workers)
+
+
+# Milestone completion forecasting
+FORECAST_WINDOW_WEEKS = 4
+
+
+def forecast_milestones(history, window=FORECAST_WINDOW_WEEKS):
+    """Project each milestone's finish date from its recent progress velocity.
+
+    `history` holds milestone_id, planned_start_date, planned_end_date, week_ending_date and
+    actual_progress for the last `window` updates of each milestone. Velocity is the least-squares
+    slope of progress over those weeks, computed for all milestones at once; milestones with a
+    single update or a flat trend fall back to average velocity since the planned start.
+    Returns projected_finish, slip_days and status indexed by milestone_id.
+    """
+    if history.empty:
+        return pd.DataFrame(columns=['projected_finish', 'slip_days', 'status'])
+    history = history.sort_values(['milestone_id', 'week_ending_date'])
+    history = history.groupby('milestone_id').tail(window).copy()
+    history['day'] = (history['week_ending_date'] - pd.Timestamp('1970-01-01')) / pd.Timedelta(days=1)
+
+    grouped = history.groupby('milestone_id')
+    dx = history['day'] - grouped['day'].transform('mean')
+    dy = history['actual_progress'] - grouped['actual_progress'].transform('mean')
+    fit = pd.DataFrame({'cov': dx * dy, 'var': dx * dx, 'milestone_id': history['milestone_id']}).groupby('milestone_id').sum()
+
+    forecast = grouped.last()[['planned_start_date', 'planned_end_date', 'week_ending_date', 'actual_progress']]
+    forecast['velocity'] = (fit['cov'] / fit['var'].where(fit['var'] > 0)).where(lambda v: v > 0)
+    days_since_start = (forecast['week_ending_date'] - forecast['planned_start_date']) / pd.Timedelta(days=1)
+    average_velocity = (forecast['actual_progress'] / days_since_start.where(days_since_start > 0)).where(lambda v: v > 0)
+    forecast['velocity'] = forecast['velocity'].fillna(average_velocity)
+
+    remaining_days = (1 - forecast['actual_progress']).clip(lower=0) / forecast['velocity']
+    forecast['projected_finish'] = forecast['week_ending_date'] + pd.to_timedelta(np.ceil(remaining_days), unit='D')
+    forecast['slip_days'] = (forecast['projected_finish'] - forecast['planned_end_date']).dt.days
+    forecast['status'] = np.select(
+        [forecast['actual_progress'] >= 1, forecast['velocity'].isna()],
+        ['Complete', 'No progress'],
+        default='Forecast'
+    )
+    forecast.loc[forecast['status'] != 'Forecast', ['projected_finish', 'slip_days']] = None
+    return forecast[['projected_finish', 'slip_days', 'status']]
+
+
+def fetch_milestone_forecasts(conn, as_of, window=FORECAST_WINDOW_WEEKS):
+    """Forecast every milestone in the portfolio from its updates up to `as_of`, in one pass."""
+    history = pd.read_sql(text("""
+        SELECT milestone_id, planned_start_date, planned_end_date, week_ending_date, actual_progress
+        FROM (
+            SELECT m.milestone_id, m.planned_start_date, m.planned_end_date, mu.week_ending_date, mu.actual_progress,
+                   ROW_NUMBER() OVER (PARTITION BY mu.milestone_id ORDER BY mu.week_ending_date DESC) AS recency
+            FROM Milestone_Updates mu
+            JOIN Milestones m ON m.milestone_id = mu.milestone_id
+            WHERE mu.week_ending_date <= :as_of
+        ) recent
+        WHERE recency <= :window
+    """), conn, params={'as_of': str(as_of), 'window': window},
+        parse_dates=['planned_start_date', 'planned_end_date', 'week_ending_date'])
+    return forecast_milestones(history, window)
+
+
+def format_forecast_slip(forecasts, milestone_id):
+    """Render a milestone's forecast slip for the milestone tables."""
+    if milestone_id not in forecasts.index:
+        return "No updates"
+    forecast = forecasts.loc[milestone_id]
+    if forecast['status'] != 'Forecast':
+        return forecast['status']
+    slip = int(forecast['slip_days'])
+    finish = forecast['projected_finish'].strftime('%Y-%m-%d')
+    return f"+{slip}d ({finish})" if slip > 0 else f"On time ({finish})"
+
+
+# Lag of readable secondaries as reported by the primary: geo-replication links first, then
+# the high-availability replicas that serve read scale-out
+REPLICA_LAG_QUERIES = [
+    "SELECT MAX(replication_lag_sec) FROM sys.dm_geo_replication_link_status",
+    "SELECT MAX(secondary_lag_seconds) FROM sys.dm_database_replica_states WHERE is_primary_replica = 0",
+]
+
+
+def fetch_replica_lag(conn):
+    """Return the replica lag in seconds, or None when it cannot be read.
+
+    Run on a primary connection; the DMVs need VIEW DATABASE STATE.
+    """
+    for query in REPLICA_LAG_QUERIES:
+        try:
+            lag = conn.execute(text(query)).scalar()
+        except DBAPIError:
+            conn.rollback()
+            continue
+        if lag is not None:
+            return float(lag)
+    return None
+
+
+# Tables exposed through the change feed, keyed to their primary key column
+CHANGE_FEED_TABLES = {
+    'qeProjects': 'project_id',
+    'qeWeekly_Updates': 'update_id',
+    'Milestones': 'milestone_id',
+    'Milestone_Updates': 'update_id',
+    'qeWeekly_Updates_Archive': 'update_id',
+    'Milestone_Updates_Archive': 'update_id',
+}
+CHANGE_FEED_BATCH_SIZE = 1000
+
+
+def change_feed_watermark(conn):
+    """Return the highest row version that no open transaction can still commit below.
+
+    Reading up to MIN_ACTIVE_ROWVERSION() - 1 rather than @@DBTS means a row written by a
+    transaction that is still in flight is never skipped by a consumer that has already
+    advanced past it.
+    """
+    return conn.execute(text("SELECT CAST(MIN_ACTIVE_ROWVERSION() AS BIGINT) - 1")).scalar()
+
+
+# How each versioned table narrows to one project, for fetch_data_version
+DATA_VERSION_FILTERS = {
+    'qeProjects': "project_id = :project_id",
+    'qeWeekly_Updates': "project_id = :project_id",
+    'qeWeekly_Updates_Archive': "project_id = :project_id",
+    'Milestones': "project_id = :project_id",
+    'Milestone_Updates': "milestone_id IN (SELECT milestone_id FROM Milestones WHERE project_id = :project_id)",
+    'Milestone_Updates_Archive': "milestone_id IN (SELECT milestone_id FROM Milestones WHERE project_id = :project_id)",
+}
+
+
+def fetch_data_version(conn, tables, project_id=None):
+    """Return [(row count, highest row version)] for `tables`, optionally for one project only.
+
+    Inserts and updates move the row version and deletes move the count, so the result changes
+    whenever anything read from these tables could. Both come from the row_version indexes in
+    one round trip, far cheaper than the query they stand in for.
+    """
+    parts = [
+        f"SELECT {position} AS position, COUNT_BIG(*) AS row_count, CAST(MAX(row_version) AS BIGINT) AS version "
+        f"FROM {table}" + (f" WHERE {DATA_VERSION_FILTERS[table]}" if project_id is not None else "")
+        for position, table in enumerate(tables)
+    ]
+    rows = conn.execute(text(" UNION ALL ".join(parts) + " ORDER BY position"), {'project_id': project_id})
+    return [(row.row_count, row.version) for row in rows]
+
+
+def fetch_changes(conn, table, since, until, limit=CHANGE_FEED_BATCH_SIZE):
+    """Return up to `limit` rows of `table` changed after row version `since`, up to `until`.
+
+    Rows come back oldest change first with the row version as an integer `_version`; pass
+    the last `_version` back as `since` to read the next batch. Deletes are not captured.
+    """
+    if table not in CHANGE_FEED_TABLES:
+        raise ValueError(f"Unknown change feed table: {table}")
+    rows = conn.execute(text(f"""
+        SELECT TOP (:limit) *, CAST(row_version AS BIGINT) AS _version
+        FROM {table}
+        WHERE row_version > CAST(CAST(:since AS BIGINT) AS BINARY(8))
+          AND row_version <= CAST(CAST(:until AS BIGINT) AS BINARY(8))
+        ORDER BY row_version
+    """), {'limit': limit, 'since': since, 'until': until}).fetchall()
+    changes = []
+    for row in rows:
+        change = dict(row._mapping)
+        del change['row_version']
+        changes.append(change)
+    return changes
@@ -0,0 +1,104 @@
+import os
+
+import duckdb
+import pytest
+
+import analytics
+
+
+class FakeDatabase:
+    """Rows per change feed table, each carrying the row version it was last written at."""
+
+    def __init__(self, monkeypatch):
+        self.tables = {source: {} for source in analytics.ANALYTICS_SOURCES}
+        self.version = 0
+        monkeypatch.setattr(analytics, 'change_feed_watermark', lambda conn: self.version)
+        monkeypatch.setattr(analytics, 'iter_changes', self.iter_changes)
+        monkeypatch.setattr(analytics, 'fetch_data_version', self.fetch_data_version)
+
+    def write(self, source, key, **row):
+        self.version += 1
+        self.tables[source][key] = dict(row, _version=self.version)
+
+    def delete(self, source, key):
+        del self.tables[source][key]
+
+    def iter_changes(self, conn, source, since, until):
+        for row in self.tables[source].values():
+            if since < row['_version'] <= until:
+                yield row
+
+    def fetch_data_version(self, conn, tables):
+        return [(len(self.tables[table]), None) for table in tables]
+
+
+@pytest.fixture
+def database(monkeypatch):
+    return FakeDatabase(monkeypatch)
+
+
+def project_names(store):
+    return list(analytics.run_analytics_query("SELECT project_name FROM projects ORDER BY project_id", store)['project_name'])
+
+
+def test_refresh_appends_changed_rows(database, tmp_path):
+    store = str(tmp_path)
+    database.write('qeProjects', 1, project_id=1, project_name='Apollo')
+    assert analytics.refresh_analytics_store(None, store)[0]['qeProjects'] == 1
+
+    database.write('qeProjects', 1, project_id=1, project_name='Apollo 2')
+    database.write('qeProjects', 2, project_id=2, project_name='Gemini')
+    counts, rebuilt = analytics.refresh_analytics_store(None, store)
+
+    assert counts['qeProjects'] == 2
+    assert rebuilt == []
+    assert project_names(store) == ['Apollo 2', 'Gemini']
+
+
+def test_deleted_rows_trigger_a_rebuild(database, tmp_path):
+    store = str(tmp_path)
+    database.write('qeProjects', 1, project_id=1, project_name='Apollo')
+    database.write('qeProjects', 2, project_id=2, project_name='Gemini')
+    analytics.refresh_analytics_store(None, store)
+
+    database.delete('qeProjects', 2)
+    database.write('qeProjects', 3, project_id=3, project_name='Mercury')
+    counts, rebuilt = analytics.refresh_analytics_store(None, store)
+
+    assert rebuilt == ['qeProjects']
+    assert counts['qeProjects'] == 2
+    assert project_names(store) == ['Apollo', 'Mercury']
+    assert len(os.listdir(tmp_path / 'qeProjects')) == 1
+
+
+def test_full_refresh_rebuilds_every_table(database, tmp_path):
+    store = str(tmp_path)
+    database.write('qeProjects', 1, project_id=1, project_name='Apollo')
+    analytics.refresh_analytics_store(None, store)
+
+    counts, rebuilt = analytics.refresh_analytics_store(None, store, full=True)
+
+    assert rebuilt == list(analytics.ANALYTICS_SOURCES)
+    assert counts['qeProjects'] == 1
+    assert project_names(store) == ['Apollo']
+
+
+def test_unrefreshed_store_has_empty_tables(tmp_path):
+    assert analytics.run_analytics_query("SELECT count(*) AS n FROM weekly_updates", str(tmp_path))['n'][0] == 0
+
+
+@pytest.mark.parametrize('sql', [
+    "SELECT * FROM read_csv('/etc/passwd')",
+    "COPY projects TO '{store}/leak.csv'",
+    "ATTACH '{store}/other.duckdb'",
+    "SELECT * FROM read_parquet('{store}/qeProjects/*.parquet')",
+    "SET enable_external_access = true",
+])
+def test_queries_cannot_touch_files(database, tmp_path, sql):
+    store = str(tmp_path)
+    database.write('qeProjects', 1, project_id=1, project_name='Apollo')
+    analytics.refresh_analytics_store(None, store)
+
+    with pytest.raises(duckdb.Error):
+        analytics.run_analytics_query(sql.format(store=store), store)
+    assert not os.path.exists(tmp_path / 'leak.csv')
@@ -0,0 +1,83 @@
+import pandas as pd
+
+from anomalies import ANOMALY_METRICS, describe_anomaly, detect_anomalies
+
+
+def updates(project_id, series, metric='tc_executed', start='2026-05-01'):
+    """Weekly rows for one project: `series` for `metric`, a steady value for every other metric."""
+    weeks = pd.date_range(start, periods=len(series), freq='7D')
+    frame = pd.DataFrame({'project_id': project_id, 'week_ending_date': weeks})
+    for column in ANOMALY_METRICS:
+        frame[column] = 10.0
+    frame[metric] = series
+    return frame
+
+
+def test_spike_is_flagged_against_the_preceding_weeks():
+    flags = detect_anomalies(updates(1, [100, 104, 98, 102, 101, 99, 500]))
+
+    assert len(flags) == 1
+    flag = flags.iloc[0]
+    assert (flag['project_id'], flag['metric'], flag['value']) == (1, 'tc_executed', 500)
+    assert flag['week_ending_date'] == pd.Timestamp('2026-06-12')
+    assert flag['method'] == 'z-score'
+    # The baseline is the six earlier weeks only, not the spike itself
+    assert flag['baseline'] == 604 / 6
+    assert flag['score'] > 3
+
+
+def test_normal_variation_is_not_flagged():
+    assert detect_anomalies(updates(1, [100, 104, 98, 102, 101, 99, 103])).empty
+
+
+def test_change_from_a_flat_history_uses_the_relative_move():
+    flags = detect_anomalies(updates(1, [20, 20, 20, 20, 5], metric='sit_defects'))
+
+    assert list(flags['method']) == ['flat-baseline']
+    assert flags.iloc[0]['metric'] == 'sit_defects'
+    assert flags.iloc[0]['score'] == -0.75
+
+
+def test_needs_minimum_history_before_flagging():
+    assert detect_anomalies(updates(1, [100, 101, 500])).empty
+
+
+def test_only_the_window_forms_the_baseline():
+    # Eight weeks near 100, four near 200, then back to 100
+    series = [100, 102, 98, 101, 99, 103, 97, 100, 200, 204, 196, 202, 100]
+    last_week = pd.Timestamp('2026-07-24')
+
+    recent = detect_anomalies(updates(1, series), window=4)
+    assert last_week in set(recent['week_ending_date'])
+    assert recent.loc[recent['week_ending_date'] == last_week, 'baseline'].item() == 200.5
+
+    whole = detect_anomalies(updates(1, series), window=12)
+    assert last_week not in set(whole['week_ending_date'])
+
+
+def test_projects_have_independent_baselines():
+    frame = pd.concat([
+        updates(1, [100, 104, 98, 102, 101, 99, 103]),
+        updates(2, [500, 510, 495, 505, 502, 498, 503]),
+    ])
+
+    assert detect_anomalies(frame).empty
+
+
+def test_missing_values_are_skipped():
+    flags = detect_anomalies(updates(1, [100, 104, None, 98, 102, None, 500]))
+
+    assert list(flags['value']) == [500]
+
+
+def test_empty_updates():
+    flags = detect_anomalies(updates(1, []))
+
+    assert flags.empty
+    assert list(flags.columns) == ['project_id', 'week_ending_date', 'metric', 'value', 'baseline', 'score', 'method']
+
+
+def test_describe_anomaly():
+    flag = detect_anomalies(updates(1, [100, 104, 98, 102, 101, 99, 500])).iloc[0]
+
+    assert describe_anomaly(flag) == "tc executed = 500 (recent average 100.7, z-score)"
@@ -0,0 +1,40 @@
+import base64
+import json
+from datetime import date
+from http import HTTPStatus
+
+import pytest
+
+from api import ApiError, _parse_cursor_week, decode_cursor, encode_cursor
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii')
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(['Apollo', 7])) == ['Apollo', 7]
+    assert decode_cursor(encode_cursor([date(2026, 7, 3), 12]), _parse_cursor_week) == [date(2026, 7, 3), 12]
+    assert decode_cursor(None) is None
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    raw_cursor({'name': 'Apollo', 'id': 7}),
+    raw_cursor('Apollo'),
+    raw_cursor(['Apollo']),
+    raw_cursor(['Apollo', 7, 8]),
+    raw_cursor(['Apollo', '7']),
+    raw_cursor(['Apollo', True]),
+    raw_cursor([7, 7]),
+])
+def test_malformed_cursor_is_a_bad_request(cursor):
+    with pytest.raises(ApiError) as error:
+        decode_cursor(cursor)
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_weekly_cursor_needs_a_date():
+    with pytest.raises(ApiError) as error:
+        decode_cursor(raw_cursor(['2026-13-40', 1]), _parse_cursor_week)
+    assert error.value.status == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,68 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from audit import AuditLog
+
+
+class FlakyEngine:
+    """Engine whose transactions fail `failures` times before inserts start succeeding."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = 0
+        self.rows = []
+        self.written = threading.Event()
+
+    @contextmanager
+    def begin(self):
+        self.attempts += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        yield self
+
+    def execute(self, statement, rows):
+        self.rows.extend(rows)
+        self.written.set()
+
+
+def audit_log(engine, **kwargs):
+    return AuditLog(engine, flush_seconds=0.01, retry_seconds=0.01, max_retry_seconds=0.05, **kwargs)
+
+
+def test_entries_are_written_in_batches():
+    engine = FlakyEngine()
+    log = audit_log(engine, batch_size=10)
+    for i in range(3):
+        log.record("alice", "insert", "qeProjects", i, after={'project_name': f"P{i}"})
+    log.close()
+
+    assert [row['entity_id'] for row in engine.rows] == ['0', '1', '2']
+    assert engine.rows[0]['username'] == "alice"
+    assert engine.rows[0]['after_values'] == '{"project_name": "P0"}'
+
+
+def test_failed_batch_is_retried_until_it_succeeds():
+    engine = FlakyEngine(failures=3)
+    log = audit_log(engine)
+    log.record("alice", "update", "Milestones", 7)
+
+    assert engine.written.wait(5)
+    assert engine.attempts == 4
+    assert [row['entity_id'] for row in engine.rows] == ['7']
+    log.close()
+
+
+def test_close_makes_one_last_attempt_and_returns():
+    engine = FlakyEngine(failures=100)
+    log = AuditLog(engine, flush_seconds=0.01, retry_seconds=60)
+    log.record("alice", "delete", "qeProjects", 1)
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    log.close(timeout=5)
+
+    assert time.monotonic() - started < 5
+    assert engine.attempts == 2
+    assert engine.rows == []
@@ -0,0 +1,140 @@
+import pandas as pd
+import pytest
+
+from bulk_import import validate_milestone_import, validate_weekly_import
+
+PROJECTS = {'Apollo': 1, 'Gemini': 2}
+
+
+def weekly_row(**overrides):
+    row = {
+        'project_name': 'Apollo', 'week_ending_date': '2026-07-03', 'qe_overall_status': 'green',
+        'next_release_date': '2026-08-01', 'current_week_progress_entry': 'Regression run',
+        'qe_current_week_task': 'Automate smoke suite', 'qe_automation_tools_used': 'Playwright',
+        'qe_progress_percentage': '40', 'qe_team_size': '3', 'tc_created': '120', 'tc_executed': '100',
+        'tc_passed_first_round': '90', 'tc_automated': '60', 'defects_raised_internal': '4',
+        'sit_defects': '2', 'uat_defects': '1', 'reopened_defects': '0',
+        'effort_tc_execution': '12.5', 'effort_tc_automation': '8',
+    }
+    return row | overrides
+
+
+def milestone_lookup():
+    return pd.DataFrame({
+        'project_name': ['Apollo', 'Apollo', 'Gemini'],
+        'milestone_name': ['Design', 'Build', 'Design'],
+        'milestone_id': [10, 11, 20],
+    })
+
+
+def errors_for(report, column):
+    return report.loc[report['column'] == column, ['row', 'error']].values.tolist()
+
+
+def test_weekly_valid_rows_are_typed_and_keyed_by_project():
+    valid, report = validate_weekly_import(pd.DataFrame([weekly_row(), weekly_row(project_name=' Gemini ')]), PROJECTS)
+    assert report.empty
+    assert valid['project_id'].tolist() == [1, 2]
+    assert valid['qe_overall_status'].tolist() == ['GREEN', 'GREEN']
+    assert str(valid['week_ending_date'].iloc[0]) == '2026-07-03'
+    assert valid['tc_created'].dtype.kind == 'i'
+
+
+def test_weekly_bad_dates_are_reported_per_spreadsheet_row():
+    df = pd.DataFrame([
+        weekly_row(),
+        weekly_row(week_ending_date='31/31/2026'),
+        weekly_row(week_ending_date=None, project_name='Gemini'),
+        weekly_row(project_name='Gemini', week_ending_date='2026-07-10', next_release_date='soon'),
+    ])
+    valid, report = validate_weekly_import(df, PROJECTS)
+    # Row 1 holds the headers, so the second data row is spreadsheet row 3
+    assert errors_for(report, 'week_ending_date') == [[3, 'Missing or invalid date'], [4, 'Missing or invalid date']]
+    assert errors_for(report, 'next_release_date') == [[5, 'Invalid date']]
+    assert len(valid) == 1
+
+
+def test_weekly_blank_release_date_is_allowed():
+    valid, report = validate_weekly_import(pd.DataFrame([weekly_row(next_release_date=None)]), PROJECTS)
+    assert report.empty
+    assert valid['next_release_date'].isna().all()
+
+
+def test_weekly_unknown_project_and_status():
+    df = pd.DataFrame([weekly_row(project_name='Mercury'), weekly_row(qe_overall_status='BLUE', week_ending_date='2026-07-10')])
+    valid, report = validate_weekly_import(df, PROJECTS)
+    assert errors_for(report, 'project_name') == [[2, 'Unknown project']]
+    assert errors_for(report, 'qe_overall_status') == [[3, 'Must be one of GREEN, AMBER, RED']]
+    assert valid.empty
+
+
+def test_weekly_duplicate_project_week_flags_every_copy():
+    df = pd.DataFrame([weekly_row(), weekly_row(), weekly_row(week_ending_date='2026-07-10')])
+    valid, report = validate_weekly_import(df, PROJECTS)
+    assert errors_for(report, 'week_ending_date') == [[2, 'Duplicate project/week in file'], [3, 'Duplicate project/week in file']]
+    assert len(valid) == 1
+
+
+@pytest.mark.parametrize('column, value, message', [
+    ('qe_progress_percentage', '101', 'Must be between 0 and 100'),
+    ('tc_created', '-1', 'Must be a non-negative whole number'),
+    ('tc_executed', '2.5', 'Must be a non-negative whole number'),
+    ('sit_defects', 'many', 'Must be a non-negative whole number'),
+    ('effort_tc_execution', '-0.5', 'Must be a non-negative number'),
+])
+def test_weekly_numeric_ranges(column, value, message):
+    valid, report = validate_weekly_import(pd.DataFrame([weekly_row(**{column: value})]), PROJECTS)
+    assert errors_for(report, column) == [[2, message]]
+    assert valid.empty
+
+
+def test_weekly_missing_columns_reject_the_file():
+    df = pd.DataFrame([weekly_row()]).drop(columns=['tc_created', 'uat_defects'])
+    valid, report = validate_weekly_import(df, PROJECTS)
+    assert valid.empty
+    assert sorted(report['column']) == ['tc_created', 'uat_defects']
+    assert set(report['error']) == {'Missing column'}
+
+
+def test_milestone_valid_rows_convert_percent_to_fraction():
+    df = pd.DataFrame({
+        'project_name': ['Apollo', 'Gemini'], 'milestone_name': ['Build', 'Design'],
+        'week_ending_date': ['2026-07-03', '2026-07-03'], 'actual_progress': ['45', '100'],
+    })
+    valid, report = validate_milestone_import(df, milestone_lookup())
+    assert report.empty
+    assert valid['milestone_id'].tolist() == [11, 20]
+    assert valid['actual_progress'].tolist() == [0.45, 1.0]
+
+
+def test_milestone_name_must_belong_to_the_project():
+    df = pd.DataFrame({
+        'project_name': ['Gemini', 'Mercury'], 'milestone_name': ['Build', 'Design'],
+        'week_ending_date': ['2026-07-03', '2026-07-03'], 'actual_progress': ['10', '10'],
+    })
+    valid, report = validate_milestone_import(df, milestone_lookup())
+    assert errors_for(report, 'milestone_name') == [[2, 'Unknown milestone for project'], [3, 'Unknown milestone for project']]
+    assert valid.empty
+
+
+@pytest.mark.parametrize('value', ['-1', '100.5', 'half', None])
+def test_milestone_progress_out_of_range(value):
+    df = pd.DataFrame({
+        'project_name': ['Apollo'], 'milestone_name': ['Design'],
+        'week_ending_date': ['2026-07-03'], 'actual_progress': [value],
+    })
+    valid, report = validate_milestone_import(df, milestone_lookup())
+    assert errors_for(report, 'actual_progress') == [[2, 'Must be between 0 and 100']]
+    assert valid.empty
+
+
+def test_milestone_bad_date_and_duplicates():
+    df = pd.DataFrame({
+        'project_name': ['Apollo', 'Apollo', 'Apollo'], 'milestone_name': ['Design', 'Design', 'Build'],
+        'week_ending_date': ['2026-07-03', '2026-07-03', 'not a date'], 'actual_progress': ['10', '20', '30'],
+    })
+    valid, report = validate_milestone_import(df, milestone_lookup())
+    assert errors_for(report, 'week_ending_date') == [
+        [2, 'Duplicate milestone/week in file'], [3, 'Duplicate milestone/week in file'], [4, 'Missing or invalid date']
+    ]
+    assert valid.empty
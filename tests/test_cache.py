@@ -0,0 +1,209 @@
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache
+from cache import InProcessBackend, RedisBackend, SharedCache, SQLiteBackend
+
+
+class FakeRedisServer:
+    """The parts of a Redis server the cache uses, shared by every client 'connected' to it."""
+
+    def __init__(self):
+        self.values = {}
+        self.subscribers = {}
+
+    def get(self, key):
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at <= cache.time.time():
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        self.values[key] = (value, cache.time.time() + ex if ex else None)
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.values[key] = (str(value).encode('utf-8'), None)
+        return value
+
+    def publish(self, channel, message):
+        for handler in self.subscribers.get(channel, []):
+            handler({'data': message.encode('utf-8')})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        server = self
+
+        class PubSub:
+            def subscribe(self, **handlers):
+                for channel, handler in handlers.items():
+                    server.subscribers.setdefault(channel, []).append(handler)
+
+            def run_in_thread(self, sleep_time, daemon):
+                return None
+
+        return PubSub()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    server = FakeRedisServer()
+    module = types.ModuleType('redis')
+    module.Redis = types.SimpleNamespace(from_url=lambda url: server)
+    monkeypatch.setitem(sys.modules, 'redis', module)
+    return server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=['in-process', 'sqlite', 'redis'])
+def replicas(request, tmp_path):
+    """Two SharedCache instances on one backend, as two app replicas would have."""
+    if request.param == 'in-process':
+        backend = InProcessBackend()
+        return SharedCache(backend), SharedCache(backend)
+    if request.param == 'sqlite':
+        path = str(tmp_path / "cache.sqlite")
+        return SharedCache(SQLiteBackend(path)), SharedCache(SQLiteBackend(path))
+    request.getfixturevalue('fake_redis')
+    return SharedCache(RedisBackend("redis://cache")), SharedCache(RedisBackend("redis://cache"))
+
+
+def counting(shared_cache, calls, namespace="reports", ttl=60):
+    @shared_cache.memoize(namespace, ttl=ttl)
+    def load(project_id, _conn=None):
+        calls.append(project_id)
+        return {'project_id': project_id, 'call': len(calls)}
+    return load
+
+
+def test_replicas_share_entries(replicas):
+    first, second = replicas
+    calls = []
+    load_first, load_second = counting(first, calls), counting(second, calls)
+
+    assert load_first(1) == {'project_id': 1, 'call': 1}
+    assert load_second(1) == {'project_id': 1, 'call': 1}
+    assert load_second(2)['call'] == 2
+    assert calls == [1, 2]
+
+
+def test_invalidate_is_seen_by_every_replica(replicas):
+    first, second = replicas
+    calls = []
+    load_first, load_second = counting(first, calls), counting(second, calls)
+    load_first(1)
+    load_second(1)
+
+    first.invalidate("reports")
+
+    assert load_second(1)['call'] == 2
+    assert load_first(1)['call'] == 2
+    assert calls == [1, 1]
+
+
+def test_invalidate_leaves_other_namespaces(replicas):
+    first, second = replicas
+    calls = []
+    load_gantt = counting(second, calls, namespace="gantt")
+    load_gantt(1)
+
+    first.invalidate("reports")
+
+    assert load_gantt(1)['call'] == 1
+
+
+def test_entries_expire_after_ttl(replicas, clock):
+    first, second = replicas
+    calls = []
+    load_first, load_second = counting(first, calls, ttl=60), counting(second, calls, ttl=60)
+    load_first(1)
+
+    clock[0] += 59
+    assert load_second(1)['call'] == 1
+    clock[0] += 2
+    assert load_second(1)['call'] == 2
+
+
+def test_underscore_arguments_are_not_part_of_the_key():
+    calls = []
+    load = counting(SharedCache(InProcessBackend()), calls)
+
+    load(1, _conn=object())
+    load(1, _conn=object())
+
+    assert calls == [1]
+
+
+def test_dataframes_are_keyed_by_content():
+    shared_cache = SharedCache(InProcessBackend())
+
+    @shared_cache.memoize("reports")
+    def total(frame):
+        return frame['value'].sum()
+
+    # Same shape, dtypes and truncated repr; only a middle row differs
+    frame = pd.DataFrame({'value': np.arange(1000)})
+    changed = frame.copy()
+    changed.loc[500, 'value'] = -1
+    assert repr(frame) == repr(changed)
+
+    assert total(frame) == frame['value'].sum()
+    assert total(changed) == changed['value'].sum()
+    assert total(frame.copy()) == frame['value'].sum()
+
+
+def test_arrays_and_containers_are_keyed_by_content():
+    shared_cache = SharedCache(InProcessBackend())
+
+    @shared_cache.memoize("reports")
+    def identity(value):
+        return value
+
+    assert identity(np.zeros(2000)).sum() == 0
+    assert identity(np.ones(2000)).sum() == 2000
+    assert identity({'a': [1, 2]}) == {'a': [1, 2]}
+    assert identity({'a': [1, 3]}) == {'a': [1, 3]}
+    # Equal reprs of different types do not collide
+    assert identity(1) == 1
+    assert identity('1') == '1'
+
+
+def test_unhashable_argument_types_are_rejected():
+    shared_cache = SharedCache(InProcessBackend())
+
+    @shared_cache.memoize("reports")
+    def describe(value):
+        return str(value)
+
+    with pytest.raises(TypeError, match="underscore"):
+        describe(object())
+
+
+def test_signed_entries_reject_tampering():
+    backend = InProcessBackend()
+    calls = []
+    load = counting(SharedCache(backend, signing_key="secret"), calls)
+    load(1)
+
+    key = next(key for key in backend._entries if not key.startswith("generation:"))
+    value, expires_at = backend._entries[key]
+    backend._entries[key] = (value[:32] + cache.pickle.dumps({'forged': True}), expires_at)
+
+    assert load(1) == {'project_id': 1, 'call': 2}
+
+
+def test_entries_signed_with_another_key_are_ignored():
+    backend = InProcessBackend()
+    calls = []
+    counting(SharedCache(backend, signing_key="old"), calls)(1)
+
+    assert counting(SharedCache(backend, signing_key="new"), calls)(1)['call'] == 2
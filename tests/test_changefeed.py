@@ -0,0 +1,51 @@
+import io
+import json
+
+import pytest
+
+import changefeed
+
+
+class FakeFeed:
+    """Serves fetch_changes from a list of rows ordered by row version."""
+
+    def __init__(self, monkeypatch, rows, watermark):
+        self.rows = rows
+        self.calls = []
+        monkeypatch.setattr(changefeed, 'fetch_changes', self.fetch_changes)
+        monkeypatch.setattr(changefeed, 'change_feed_watermark', lambda conn: watermark)
+
+    def fetch_changes(self, conn, table, since, until, limit):
+        self.calls.append(since)
+        return [dict(row) for row in self.rows if since < row['_version'] <= until][:limit]
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    rows = [{'project_id': i, 'project_name': f"P{i}", '_version': 10 * i} for i in range(1, 6)]
+    return FakeFeed(monkeypatch, rows, watermark=100)
+
+
+def test_iter_changes_pages_through_batches(feed):
+    rows = list(changefeed.iter_changes(None, 'qeProjects', 0, 100, batch_size=2))
+
+    assert [row['project_id'] for row in rows] == [1, 2, 3, 4, 5]
+    assert feed.calls == [0, 20, 40]
+
+
+def test_iter_changes_allows_callers_to_modify_rows(feed):
+    versions = [row.pop('_version') for row in changefeed.iter_changes(None, 'qeProjects', 0, 100, batch_size=2)]
+
+    assert versions == [10, 20, 30, 40, 50]
+
+
+def test_export_changes_spanning_several_batches(feed):
+    out = io.StringIO()
+
+    watermarks, counts = changefeed.export_changes(None, ['qeProjects'], {'qeProjects': 10}, out, batch_size=2)
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [line['version'] for line in lines] == [20, 30, 40, 50]
+    assert lines[0]['row'] == {'project_id': 2, 'project_name': "P2"}
+    assert counts == {'qeProjects': 4}
+    assert watermarks == {'qeProjects': 100}
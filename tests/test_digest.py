@@ -0,0 +1,82 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("xhtml2pdf")
+
+import digest  # noqa: E402
+
+WEEK = date(2024, 3, 8)
+GROUPS = [('Client', 'Acme'), ('Client', 'Globex'), ('SPOC', 'Dana')]
+
+
+class FailingTransport:
+    """Records sent digests and raises on the send numbered `fail_at`."""
+    requires_recipients = False
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.sent = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, message, stem):
+        if len(self.sent) == self.fail_at:
+            raise ConnectionError("mail server went away")
+        self.sent.append(stem)
+
+
+@pytest.fixture
+def transports(monkeypatch):
+    queue = []
+    monkeypatch.setattr(digest, 'st', SimpleNamespace(secrets={}))
+    monkeypatch.setattr(digest, 'load_digest_data', lambda engine, week: ({}, None, []))
+    monkeypatch.setattr(digest, 'build_digests', lambda week, summaries, anomalies, sections, skip=frozenset(): (
+        (dimension, label, {}, digest.digest_key(dimension, label))
+        for dimension, label in GROUPS if digest.digest_key(dimension, label) not in skip
+    ))
+    monkeypatch.setattr(digest, 'create_transport', lambda: queue.pop(0))
+    return queue
+
+
+def test_failed_run_resumes_with_unsent_digests(tmp_path, transports):
+    state_path = tmp_path / "digest_state.json"
+    first, second = FailingTransport(fail_at=2), FailingTransport()
+    transports.extend([first, second])
+
+    with pytest.raises(ConnectionError):
+        digest.run_once(None, state_path, WEEK)
+    digest.run_once(None, state_path, WEEK)
+
+    assert first.sent == ['Client:Acme', 'Client:Globex']
+    assert second.sent == ['SPOC:Dana']
+    state = digest.load_watermarks(state_path)
+    assert state['last_week'] == str(WEEK)
+    assert 'in_progress' not in state
+
+
+def test_progress_from_another_week_is_ignored(tmp_path, transports):
+    state_path = tmp_path / "digest_state.json"
+    digest.save_watermarks(state_path, {'in_progress': {'week': '2024-03-01', 'sent': ['Client:Acme']}})
+    transport = FailingTransport()
+    transports.append(transport)
+
+    digest.run_once(None, state_path, WEEK)
+
+    assert transport.sent == ['Client:Acme', 'Client:Globex', 'SPOC:Dana']
+
+
+def test_force_resends_everything(tmp_path, transports):
+    state_path = tmp_path / "digest_state.json"
+    digest.save_watermarks(state_path, {'in_progress': {'week': str(WEEK), 'sent': ['Client:Acme']}})
+    transport = FailingTransport()
+    transports.append(transport)
+
+    digest.run_once(None, state_path, WEEK, force=True)
+
+    assert transport.sent == ['Client:Acme', 'Client:Globex', 'SPOC:Dana']
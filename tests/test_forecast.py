@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from services import forecast_milestones, format_forecast_slip
+
+
+def history(milestone_id, weeks, progress, start='2026-06-01', end='2026-07-31'):
+    return pd.DataFrame({
+        'milestone_id': milestone_id,
+        'planned_start_date': pd.Timestamp(start),
+        'planned_end_date': pd.Timestamp(end),
+        'week_ending_date': pd.to_datetime(weeks),
+        'actual_progress': progress,
+    })
+
+
+def test_velocity_is_the_trend_of_the_last_window_updates():
+    # The first week's 0.9 falls outside the four-week window; the rest climb 0.1 a week
+    weeks = ['2026-06-05', '2026-06-12', '2026-06-19', '2026-06-26', '2026-07-03']
+    forecast = forecast_milestones(history(1, weeks, [0.9, 0.1, 0.2, 0.3, 0.4]), window=4)
+
+    row = forecast.loc[1]
+    assert row['status'] == 'Forecast'
+    # 0.6 remaining at 0.1 per 7 days is 42 days after the last update
+    assert row['projected_finish'] == pd.Timestamp('2026-08-14')
+    assert row['slip_days'] == 14
+
+
+def test_single_update_falls_back_to_average_velocity_since_start():
+    forecast = forecast_milestones(history(2, ['2026-07-01'], [0.3]))
+
+    # 0.3 in 30 days is 0.01 a day, so the remaining 0.7 takes 70 days
+    assert forecast.loc[2, 'projected_finish'] == pd.Timestamp('2026-09-09')
+    assert forecast.loc[2, 'slip_days'] == 40
+
+
+def test_early_finish_is_reported_on_time():
+    forecast = forecast_milestones(history(3, ['2026-06-12', '2026-06-19'], [0.5, 0.9]))
+
+    assert forecast.loc[3, 'slip_days'] < 0
+    assert format_forecast_slip(forecast, 3).startswith("On time (")
+
+
+@pytest.mark.parametrize('progress, status', [
+    ([1.0, 1.0], 'Complete'),
+    ([0.0, 0.0], 'No progress'),
+])
+def test_complete_and_stalled_milestones_have_no_projection(progress, status):
+    forecast = forecast_milestones(history(4, ['2026-06-26', '2026-07-03'], progress, start='2026-07-01'))
+
+    assert forecast.loc[4, 'status'] == status
+    assert pd.isna(forecast.loc[4, 'projected_finish'])
+    assert format_forecast_slip(forecast, 4) == status
+
+
+def test_milestones_are_forecast_independently():
+    combined = pd.concat([
+        history(1, ['2026-06-26', '2026-07-03'], [0.3, 0.4]),
+        history(2, ['2026-07-01'], [0.3]),
+    ])
+    forecast = forecast_milestones(combined)
+
+    assert forecast.loc[1, 'projected_finish'] == pd.Timestamp('2026-08-14')
+    assert forecast.loc[2, 'projected_finish'] == pd.Timestamp('2026-09-09')
+
+
+def test_format_forecast_slip():
+    forecast = forecast_milestones(history(1, ['2026-06-26', '2026-07-03'], [0.3, 0.4]))
+
+    assert format_forecast_slip(forecast, 1) == "+14d (2026-08-14)"
+    assert format_forecast_slip(forecast, 99) == "No updates"
+
+
+def test_empty_history():
+    forecast = forecast_milestones(history(1, [], []))
+
+    assert forecast.empty
+    assert list(forecast.columns) == ['projected_finish', 'slip_days', 'status']